@@ -3,7 +3,7 @@ Authentication and rate limiting middleware.
 """
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi import Request
+from fastapi import Request, WebSocket
 from typing import Dict
 import time
 from app.core.config import settings
@@ -15,6 +15,7 @@ logger = logging.getLogger(__name__)
 rate_limiter_storage: Dict[str, Dict] = {}
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def verify_api_key(credentials: HTTPAuthorizationCredentials = Security(security)) -> str:
@@ -40,6 +41,48 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Security(security
     return credentials.credentials
 
 
+def verify_websocket_api_key(websocket: WebSocket) -> bool:
+    """
+    Verify the API key of a WebSocket handshake.
+    
+    Browsers cannot set headers on WebSocket requests, so the key may also
+    be passed as the api_key query parameter.
+    
+    Args:
+        websocket: WebSocket connection before accept
+        
+    Returns:
+        True if the API key is valid
+    """
+    scheme, _, token = websocket.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer":
+        token = websocket.query_params.get("api_key", "")
+    
+    if token != settings.api_key:
+        logger.warning(f"Invalid WebSocket API key attempt: {token[:10]}...")
+        return False
+    return True
+
+
+def websocket_rate_limit(websocket: WebSocket) -> bool:
+    """
+    Authenticate a WebSocket handshake and count it against the hourly limit.
+    
+    Args:
+        websocket: WebSocket connection before accept
+        
+    Returns:
+        True if the API key is valid and under its rate limit
+    """
+    if not verify_websocket_api_key(websocket):
+        return False
+    
+    if not check_rate_limit(settings.api_key):
+        logger.warning(f"Rate limit exceeded for WebSocket API key: {settings.api_key[:10]}...")
+        return False
+    return True
+
+
 def rate_limit(request: Request, api_key: str = Depends(verify_api_key)) -> None:
     """
     Rate limiting middleware.
@@ -51,6 +94,24 @@ def rate_limit(request: Request, api_key: str = Depends(verify_api_key)) -> None
     Raises:
         HTTPException: If rate limit exceeded
     """
+    if not check_rate_limit(api_key):
+        logger.warning(f"Rate limit exceeded for API key: {api_key[:10]}...")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded. Maximum {settings.rate_limit_per_hour} requests per hour."
+        )
+
+
+def check_rate_limit(api_key: str) -> bool:
+    """
+    Count a request against the API key's hourly limit.
+    
+    Args:
+        api_key: Verified API key
+        
+    Returns:
+        True if the request is allowed, False if the limit is exceeded
+    """
     client_id = api_key  # Use API key as client identifier
     current_time = int(time.time())
     current_hour = current_time // 3600  # Hour bucket
@@ -70,20 +131,17 @@ def rate_limit(request: Request, api_key: str = Depends(verify_api_key)) -> None
         client_data[current_hour] = 0
     
     if client_data[current_hour] >= settings.rate_limit_per_hour:
-        logger.warning(f"Rate limit exceeded for API key: {api_key[:10]}...")
-        raise HTTPException(
-            status_code=429,
-            detail=f"Rate limit exceeded. Maximum {settings.rate_limit_per_hour} requests per hour."
-        )
+        return False
     
     # Increment request count
     client_data[current_hour] += 1
     
     logger.debug(f"Rate limit check passed: {client_data[current_hour]}/{settings.rate_limit_per_hour}")
+    return True
 
 
 # Optional dependency for endpoints that don't require auth (like health check)
-def optional_auth(credentials: HTTPAuthorizationCredentials = Security(security, auto_error=False)) -> str:
+def optional_auth(credentials: HTTPAuthorizationCredentials = Security(optional_security)) -> str:
     """
     Optional authentication that doesn't raise errors.
     
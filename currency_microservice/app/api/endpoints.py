@@ -1,33 +1,50 @@
 """
 API endpoints for the currency exchange rate microservice.
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, WebSocket
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, List, Optional
-from datetime import date, datetime
+from typing import Dict, List, Literal, Optional
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+import asyncio
+import json
 
-from app.database.connection import get_db, check_database_connection
+from app.database.connection import get_db
 from app.services.exchange_rate_service import exchange_rate_service
 from app.services.cache_service import cache_service
-from app.services.external_api_service import ExternalAPIService
+from app.services.local_cache_service import local_cache_service
+from app.services.external_api_service import external_api_service as external_api
 from app.services.seeding_service import seeding_service
+from app.services.backfill_service import backfill_service
+from app.services.health_service import health_service
+from app.services.quota_service import quota_service
+from app.services.provider_health_service import provider_health_service
+from app.services.leader_service import leader_service
+from app.services.scheduler_service import scheduler_service
+from app.services.job_run_service import job_run_service
+from app.services.rate_stream_service import rate_stream_service
 from app.models.exchange_rate import (
-    ExchangeRateResponse, 
+    RateQuoteResponse,
     CurrencyConversion, 
     HealthStatus, 
-    ErrorResponse
+    ErrorResponse,
+    RateStatsResponse,
+    HistoricalConversionRequest,
+    HistoricalConversionResponse
 )
-from app.api.auth import rate_limit, optional_auth
+from app.models.rate_record import render_rate, render_rates
+from app.models.backfill import BackfillStatus
+from app.models.job_run import SchedulerStatusResponse, ScheduledJob
+from app.api.auth import rate_limit, optional_auth, websocket_rate_limit
 from app.core.config import settings
+from app.core.currencies import currency_registry
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Create router
 router = APIRouter(prefix="/api/v1")
-external_api = ExternalAPIService()
 
 
 @router.get(
@@ -40,26 +57,41 @@ async def health_check(
     request: Request,
     api_key: str = Depends(optional_auth)
 ):
-    """Check service health including database and Redis connectivity."""
+    """Report the last background probe of database, Redis, scheduler and data freshness."""
     
-    # Check database
-    db_status = await check_database_connection()
+    health_info = health_service.get_status()
     
-    # Check Redis
-    redis_status = await cache_service.is_connected()
+    status_code = 200 if health_info.status == "healthy" else 503
+    return JSONResponse(content=health_info.model_dump(mode="json"), status_code=status_code)
+
+
+@router.get(
+    "/livez",
+    summary="Liveness Probe",
+    description="Cheap liveness probe; never touches the database or Redis."
+)
+async def liveness_probe():
+    """Report whether the process and its health prober are alive."""
     
-    status = "healthy" if db_status and redis_status else "unhealthy"
+    if not health_service.is_alive():
+        return JSONResponse(content={"status": "dead"}, status_code=503)
     
-    health_info = HealthStatus(
-        status=status,
-        timestamp=datetime.now(),
-        version=settings.version,
-        database=db_status,
-        redis=redis_status
-    )
+    return {"status": "alive"}
+
+
+@router.get(
+    "/readyz",
+    response_model=HealthStatus,
+    summary="Readiness Probe",
+    description="Cheap readiness probe served from the last background dependency check."
+)
+async def readiness_probe():
+    """Report whether the service can serve traffic, from cached probe state."""
+    
+    health_info = health_service.get_status()
     
-    status_code = 200 if status == "healthy" else 503
-    return JSONResponse(content=health_info.dict(), status_code=status_code)
+    status_code = 200 if health_service.is_ready() else 503
+    return JSONResponse(content=health_info.model_dump(mode="json"), status_code=status_code)
 
 
 @router.get(
@@ -71,12 +103,68 @@ async def health_check(
 )
 async def get_supported_currencies():
     """Get list of supported currencies."""
-    return await external_api.get_supported_currencies()
+    return currency_registry.codes
+
+
+@router.get(
+    "/rates/stream",
+    summary="Stream Rate Snapshots",
+    description="Server-sent events announcing each new rate snapshot; pull rates when an event arrives.",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Snapshot event stream"},
+        503: {"model": ErrorResponse, "description": "Worker is at its streaming connection limit"}
+    },
+    dependencies=[Depends(rate_limit)]
+)
+async def stream_rate_snapshots(
+    last_event_id: Optional[str] = Header(None, description="Version of the last snapshot event received")
+):
+    """Stream snapshot-version events instead of polling for new rates."""
+    
+    if not rate_stream_service.accepting():
+        raise HTTPException(
+            status_code=503,
+            detail="Rate stream is not accepting connections on this worker"
+        )
+    
+    last_version = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    return StreamingResponse(
+        rate_stream_service.sse(last_version),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/rates/stream/ws")
+async def stream_rate_snapshots_ws(websocket: WebSocket):
+    """Push snapshot-version events over a WebSocket (same events as the SSE stream)."""
+    
+    if not websocket_rate_limit(websocket) or not rate_stream_service.accepting():
+        await websocket.close(code=1008)
+        return
+    
+    # Hold the slot from the handshake on, so concurrent handshakes cannot overshoot the limit
+    with rate_stream_service.connection():
+        await websocket.accept()
+        
+        async def push():
+            async for event in rate_stream_service.events():
+                if event is not None:
+                    await websocket.send_text(json.dumps(event, separators=(",", ":")))
+        
+        pusher = asyncio.create_task(push())
+        try:
+            # Idle until the client disconnects; incoming messages are ignored
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            pusher.cancel()
 
 
 @router.get(
     "/rates/{base}/{target}",
-    response_model=ExchangeRateResponse,
+    response_model=RateQuoteResponse,
     summary="Get Specific Exchange Rate",
     description="Get exchange rate between two currencies for a specific date (defaults to today).",
     responses={
@@ -94,15 +182,14 @@ async def get_exchange_rate(
     """Get exchange rate between two specific currencies."""
     
     # Validate currency codes
-    supported_currencies = await external_api.get_supported_currencies()
-    if base.upper() not in supported_currencies or target.upper() not in supported_currencies:
+    base = currency_registry.normalize(base)
+    target = currency_registry.normalize(target)
+    if base is None or target is None:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported currency. Supported currencies: {', '.join(supported_currencies)}"
+            detail=f"Unsupported currency. Supported currencies: {currency_registry.display}"
         )
     
-    base = base.upper()
-    target = target.upper()
     rate_date = date or date.today()
     
     rate = await exchange_rate_service.get_rate(db, base, target, rate_date)
@@ -113,12 +200,62 @@ async def get_exchange_rate(
             detail=f"Exchange rate not found for {base}/{target} on {rate_date}"
         )
     
-    return rate
+    # Records are rendered directly; the response model only documents the schema
+    return Response(content=render_rate(rate), media_type="application/json")
+
+
+@router.get(
+    "/rates/{base}/{target}/stats",
+    response_model=RateStatsResponse,
+    summary="Get Period Statistics",
+    description="Get average, min, max and volatility of an exchange rate per month, quarter or year.",
+    responses={
+        404: {"model": ErrorResponse, "description": "No rates found in range"},
+        400: {"model": ErrorResponse, "description": "Invalid currency codes or date range"}
+    },
+    dependencies=[Depends(rate_limit)]
+)
+async def get_rate_statistics(
+    base: str,
+    target: str,
+    period: Literal["month", "quarter", "year"] = Query("month", description="Aggregation period"),
+    start: Optional[date] = Query(None, description="Range start (YYYY-MM-DD), defaults to one year before end"),
+    end: Optional[date] = Query(None, description="Range end (YYYY-MM-DD), defaults to today"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get per-period statistics for a currency pair."""
+    
+    base = currency_registry.normalize(base)
+    target = currency_registry.normalize(target)
+    if base is None or target is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported currency. Supported currencies: {currency_registry.display}"
+        )
+    
+    range_end = end or date.today()
+    range_start = start or range_end - timedelta(days=365)
+    
+    if range_start > range_end:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid date range: start must not be after end"
+        )
+    
+    stats = await exchange_rate_service.get_rate_statistics(db, base, target, period, range_start, range_end)
+    
+    if not stats:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No exchange rates found for {base}/{target} between {range_start} and {range_end}"
+        )
+    
+    return stats
 
 
 @router.get(
     "/rates/{base}",
-    response_model=Dict[str, ExchangeRateResponse],
+    response_model=Dict[str, RateQuoteResponse],
     summary="Get All Rates for Base Currency",
     description="Get latest exchange rates from base currency to all supported currencies.",
     responses={
@@ -135,25 +272,24 @@ async def get_all_rates_for_base(
     """Get all exchange rates for a base currency."""
     
     # Validate currency code
-    supported_currencies = await external_api.get_supported_currencies()
-    if base.upper() not in supported_currencies:
+    base_code = currency_registry.normalize(base)
+    if base_code is None:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported currency: {base}. Supported currencies: {', '.join(supported_currencies)}"
+            detail=f"Unsupported currency: {base}. Supported currencies: {currency_registry.display}"
         )
     
-    base = base.upper()
+    base = base_code
     
     if date:
         # Get rates for specific date
-        rates = {}
-        for target in supported_currencies:
-            if target == base:
-                continue
-            rate = await exchange_rate_service.get_rate(db, base, target, date)
-            if rate:
-                rates[target] = rate
+        rates = await exchange_rate_service.get_rates_for_date(db, base, date)
     else:
+        # Serve the body pre-rendered at ingest when available
+        body = await exchange_rate_service.get_rendered_latest_rates(base)
+        if body:
+            return Response(content=body, media_type="application/json")
+        
         # Get latest rates
         rates = await exchange_rate_service.get_latest_rates(db, base)
     
@@ -163,12 +299,12 @@ async def get_all_rates_for_base(
             detail=f"No exchange rates found for {base}" + (f" on {date}" if date else "")
         )
     
-    return rates
+    return Response(content=render_rates(rates), media_type="application/json")
 
 
 @router.get(
     "/rates/latest",
-    response_model=Dict[str, ExchangeRateResponse],
+    response_model=Dict[str, RateQuoteResponse],
     summary="Get Latest Rates",
     description="Get latest exchange rates for the default base currency.",
     dependencies=[Depends(rate_limit)]
@@ -178,6 +314,10 @@ async def get_latest_rates(
 ):
     """Get latest exchange rates for the default base currency."""
     
+    body = await exchange_rate_service.get_rendered_latest_rates(settings.base_currency)
+    if body:
+        return Response(content=body, media_type="application/json")
+    
     rates = await exchange_rate_service.get_latest_rates(db, settings.base_currency)
     
     if not rates:
@@ -186,7 +326,7 @@ async def get_latest_rates(
             detail=f"No latest exchange rates found for {settings.base_currency}"
         )
     
-    return rates
+    return Response(content=render_rates(rates), media_type="application/json")
 
 
 @router.post(
@@ -210,14 +350,13 @@ async def convert_currency(
     """Convert currency using exchange rates."""
     
     # Validate currency codes
-    supported_currencies = await external_api.get_supported_currencies()
-    from_curr = from_currency.upper()
-    to_curr = to_currency.upper()
+    from_curr = currency_registry.normalize(from_currency)
+    to_curr = currency_registry.normalize(to_currency)
     
-    if from_curr not in supported_currencies or to_curr not in supported_currencies:
+    if from_curr is None or to_curr is None:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported currency. Supported currencies: {', '.join(supported_currencies)}"
+            detail=f"Unsupported currency. Supported currencies: {currency_registry.display}"
         )
     
     conversion_date = date or date.today()
@@ -235,6 +374,44 @@ async def convert_currency(
     return conversion
 
 
+@router.post(
+    "/convert/historical",
+    response_model=HistoricalConversionResponse,
+    summary="Convert Dated Amounts",
+    description="Convert many amounts recorded in different currencies on different dates to one target currency.",
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid parameters"}
+    },
+    dependencies=[Depends(rate_limit)]
+)
+async def convert_historical(
+    request: HistoricalConversionRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Convert a batch of dated amounts, reporting per-item rate dates and failures."""
+    
+    to_curr = currency_registry.normalize(request.target_currency)
+    
+    if to_curr is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported currency: {request.target_currency.upper()}. Supported currencies: {currency_registry.display}"
+        )
+    
+    if len(request.items) > settings.historical_conversion_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items. Maximum {settings.historical_conversion_max_items} per request."
+        )
+    
+    items = [
+        item.model_copy(update={"currency": currency_registry.intern(item.currency.upper())})
+        for item in request.items
+    ]
+    
+    return await exchange_rate_service.convert_historical(db, items, to_curr)
+
+
 @router.post(
     "/admin/fetch-rates",
     summary="Manually Trigger Rate Fetch",
@@ -264,6 +441,118 @@ async def manually_fetch_rates(
     return {"message": f"Exchange rates fetched and stored successfully for {base_currency}"}
 
 
+@router.post(
+    "/admin/backfill",
+    status_code=202,
+    summary="Backfill Historical Rates",
+    description="Load historical exchange rates for a base currency over a date range in the background (admin only).",
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid date range or currency"}
+    },
+    dependencies=[Depends(rate_limit)]
+)
+async def start_backfill(
+    background_tasks: BackgroundTasks,
+    start: date = Query(..., description="First date to load (YYYY-MM-DD)"),
+    end: date = Query(..., description="Last date to load (YYYY-MM-DD)"),
+    base: Optional[str] = Query(None, description="Base currency (defaults to configured base)"),
+    concurrency: Optional[int] = Query(None, ge=1, le=64, description="Maximum concurrent provider requests")
+):
+    """Start a resumable historical backfill."""
+    
+    base_currency = base.upper() if base else settings.base_currency
+    if base_currency not in currency_registry:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported currency: {base_currency}. Supported currencies: {currency_registry.display}"
+        )
+    
+    if start > end or end > date.today():
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid date range: start must not be after end, and end must not be in the future"
+        )
+    
+    background_tasks.add_task(
+        backfill_service.run_backfill_job, base_currency, start, end, concurrency=concurrency
+    )
+    
+    return {
+        "message": f"Backfill started for {base_currency} from {start} to {end}",
+        "base_currency": base_currency,
+        "start": start,
+        "end": end
+    }
+
+
+@router.get(
+    "/admin/backfill",
+    response_model=List[BackfillStatus],
+    summary="Backfill Progress",
+    description="List historical backfill checkpoints and their progress (admin only).",
+    dependencies=[Depends(rate_limit)]
+)
+async def list_backfills(db: AsyncSession = Depends(get_db)):
+    """List backfill checkpoints."""
+    return await backfill_service.list_backfills(db)
+
+
+@router.get(
+    "/admin/providers/quota",
+    summary="Provider Quota Usage",
+    description="Get daily and monthly upstream call counts against each provider's limits (admin only).",
+    dependencies=[Depends(rate_limit)]
+)
+async def get_provider_quotas():
+    """Get upstream quota usage per provider."""
+    return [
+        await quota_service.get_usage(provider)
+        for provider in external_api.get_providers()
+    ]
+
+
+@router.get(
+    "/admin/providers/health",
+    summary="Provider Health",
+    description="Get circuit breaker state, rolling success rate and EWMA latency per provider, in current fallback order (admin only).",
+    dependencies=[Depends(rate_limit)]
+)
+async def get_provider_health():
+    """Get provider health in fallback order."""
+    return provider_health_service.get_status(external_api.get_providers())
+
+
+@router.get(
+    "/admin/leader",
+    summary="Scheduler Leadership",
+    description="Show whether the answering worker holds the scheduler leader lease (admin only).",
+    dependencies=[Depends(rate_limit)]
+)
+async def get_leader_status():
+    """Get this worker's leader election status."""
+    return leader_service.get_status()
+
+
+@router.get(
+    "/admin/scheduler",
+    response_model=SchedulerStatusResponse,
+    summary="Scheduler Runs",
+    description="List upcoming scheduled jobs, recent job runs and duration percentiles per job (admin only).",
+    dependencies=[Depends(rate_limit)]
+)
+async def get_scheduler_status(
+    job_id: Optional[str] = Query(None, description="Only list runs of this job"),
+    limit: int = Query(50, ge=1, le=500, description="Number of recent runs"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get scheduled jobs and their run history."""
+    return SchedulerStatusResponse(
+        upcoming=[ScheduledJob(**job) for job in scheduler_service.list_jobs()],
+        recent_runs=await job_run_service.list_recent(db, job_id, limit),
+        stats=await job_run_service.get_duration_stats(db)
+    )
+
+
 @router.delete(
     "/admin/cache",
     summary="Clear Cache",
@@ -274,6 +563,7 @@ async def clear_cache():
     """Clear all cached data."""
     
     success = await cache_service.clear_cache()
+    await local_cache_service.publish()
     
     if not success:
         raise HTTPException(
@@ -392,8 +682,7 @@ async def get_seeding_status(db: AsyncSession = Depends(get_db)):
     }
 
 
-# Error handlers
-@router.exception_handler(HTTPException)
+# Error handlers (registered on the application in app.main)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions with consistent error format."""
     return JSONResponse(
@@ -401,5 +690,5 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         content=ErrorResponse(
             detail=exc.detail,
             timestamp=datetime.now()
-        ).dict()
+        ).model_dump(mode="json")
     )
\ No newline at end of file
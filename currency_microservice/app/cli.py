@@ -0,0 +1,143 @@
+"""
+Command line entry points for operational tasks.
+
+Usage:
+    python -m app.cli backfill --start 2015-01-01 --end 2024-12-31 [--base USD]
+    python -m app.cli record --base USD [--date 2024-01-31] [--data-dir replay_data]
+    python -m app.cli stub-upstream [--port 9000] [--latency-ms 50] [--error-rate 0.1]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import date
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def _run_backfill(args: argparse.Namespace) -> int:
+    """Initialize the database and cache and run a backfill to completion."""
+    from app.database.connection import init_database, close_database_connection
+    from app.services.backfill_service import backfill_service
+    from app.services.cache_service import cache_service
+    from app.services.currency_service import currency_service
+    from app.services.http_client_service import http_client_service
+
+    # Without Redis the batches could not drop cached stats or tell running workers to evict
+    await init_database()
+    await cache_service.connect()
+    try:
+        await currency_service.start()
+        status = await backfill_service.run_backfill_job(
+            args.base.upper(),
+            args.start,
+            args.end,
+            concurrency=args.concurrency,
+            batch_days=args.batch_days,
+        )
+    finally:
+        await currency_service.stop()
+        await http_client_service.close()
+        await cache_service.disconnect()
+        await close_database_connection()
+
+    if status is None:
+        return 1
+
+    logger.info(
+        f"Backfill {status.status}: {status.days_loaded} days loaded, "
+        f"{status.days_failed} days failed, {status.rates_written} rates written"
+    )
+    return 0 if status.status == "completed" else 1
+
+
+async def _record(args: argparse.Namespace) -> int:
+    """Fetch rates from the live providers and record them for offline replay."""
+    from app.services.external_api_service import external_api_service
+    from app.services.http_client_service import http_client_service
+    from app.services.replay_service import ReplayStore
+
+    try:
+        rates = await external_api_service.fetch_exchange_rates(args.base.upper(), args.date)
+    finally:
+        await http_client_service.close()
+
+    if not rates:
+        logger.error(f"No provider returned rates for {args.base.upper()}")
+        return 1
+
+    path = ReplayStore(args.data_dir).save(args.base, args.date, rates)
+    logger.info(f"Recorded {len(rates)} rates to {path}")
+    return 0
+
+
+async def _run_stub(args: argparse.Namespace) -> int:
+    """Serve recorded payloads over the upstream provider wire formats."""
+    import uvicorn
+    from app.services.replay_service import FaultInjector, ReplayStore
+    from app.upstream_stub import create_stub_app
+
+    app = create_stub_app(
+        ReplayStore(args.data_dir),
+        FaultInjector(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            timeout_rate=args.timeout_rate,
+            seed=args.seed,
+        ),
+    )
+    server = uvicorn.Server(uvicorn.Config(app, host=args.host, port=args.port, log_level="warning"))
+    logger.info(f"Upstream stub serving {args.data_dir or settings.replay_data_dir} on {args.host}:{args.port}")
+    await server.serve()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the CLI argument parser."""
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=settings.app_name)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill = subparsers.add_parser("backfill", help="Load historical exchange rates for a date range")
+    backfill.add_argument("--base", default=settings.base_currency, help="Base currency code")
+    backfill.add_argument("--start", type=date.fromisoformat, required=True, help="First date (YYYY-MM-DD)")
+    backfill.add_argument("--end", type=date.fromisoformat, required=True, help="Last date (YYYY-MM-DD)")
+    backfill.add_argument("--concurrency", type=int, default=None, help="Maximum concurrent provider requests")
+    backfill.add_argument("--batch-days", type=int, default=None, help="Days stored per transaction")
+    backfill.set_defaults(handler=_run_backfill)
+
+    record = subparsers.add_parser("record", help="Record live provider rates for offline replay")
+    record.add_argument("--base", default=settings.base_currency, help="Base currency code")
+    record.add_argument("--date", type=date.fromisoformat, default=None, help="Historical date (defaults to latest)")
+    record.add_argument("--data-dir", default=None, help="Recording directory")
+    record.set_defaults(handler=_record)
+
+    stub = subparsers.add_parser("stub-upstream", help="Serve recorded rates as a local upstream provider")
+    stub.add_argument("--host", default="127.0.0.1", help="Bind address")
+    stub.add_argument("--port", type=int, default=9000, help="Bind port")
+    stub.add_argument("--data-dir", default=None, help="Recording directory")
+    stub.add_argument("--latency-ms", type=float, default=None, help="Added latency per request")
+    stub.add_argument("--jitter-ms", type=float, default=None, help="Random extra latency per request")
+    stub.add_argument("--error-rate", type=float, default=None, help="Share of requests answered with 503")
+    stub.add_argument("--timeout-rate", type=float, default=None, help="Share of requests that stall past the client timeout")
+    stub.add_argument("--seed", type=int, default=None, help="Random seed for reproducible faults")
+    stub.set_defaults(handler=_run_stub)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    """CLI entry point."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    args = build_parser().parse_args(argv)
+    return asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
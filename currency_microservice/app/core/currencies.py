@@ -0,0 +1,94 @@
+"""
+Interned registry of supported currency codes.
+"""
+import itertools
+import json
+import sys
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+# Active ISO 4217 codes, plus the fund, SDR and precious-metal codes providers quote
+ISO_4217_CODES = frozenset("""
+AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BHD BIF BMD BND BOB BRL BSD BTN BWP
+BYN BZD CAD CDF CHF CLF CLP CNY COP CRC CUP CVE CZK DJF DKK DOP DZD EGP ERN ETB EUR FJD FKP
+GBP GEL GHS GIP GMD GNF GTQ GYD HKD HNL HTG HUF IDR ILS INR IQD IRR ISK JMD JOD JPY KES KGS
+KHR KMF KPW KRW KWD KYD KZT LAK LBP LKR LRD LSL LYD MAD MDL MGA MKD MMK MNT MOP MRU MUR MVR
+MWK MXN MYR MZN NAD NGN NIO NOK NPR NZD OMR PAB PEN PGK PHP PKR PLN PYG QAR RON RSD RUB RWF
+SAR SBD SCR SDG SEK SGD SHP SLE SLL SOS SRD SSP STN SVC SYP SZL THB TJS TMT TND TOP TRY TTD
+TWD TZS UAH UGX USD UYU UZS VED VES VND VUV WST XAF XAG XAU XCD XCG XDR XOF XPD XPF XPT YER
+ZAR ZMW ZWG
+""".split())
+
+
+def _casings(code: str) -> Iterator[str]:
+    """Every upper/lower-case spelling of a code (8 for an ISO code)."""
+    return map("".join, itertools.product(*({char.lower(), char.upper()} for char in code)))
+
+
+class CurrencyRegistry:
+    """
+    Supported ISO 4217 codes mapped to dense integer ids.
+
+    Ids follow the canonical (configured) order, so they index arrays and
+    rate matrices directly. Lookups accept any casing and resolve in O(1)
+    to the one interned string per code, so DB rows, cache entries and
+    response dicts share a single copy of each code.
+    """
+
+    def __init__(self, codes: Iterable[str] = ()):
+        self.load(codes)
+
+    def load(self, codes: Iterable[str]):
+        """Replace the registered codes, keeping the first occurrence's position."""
+        canonical = tuple(dict.fromkeys(sys.intern(code.strip().upper()) for code in codes))
+        self._lookup: Dict[str, str] = {
+            variant: code for code in canonical for variant in _casings(code)
+        }
+        self._ids: Dict[str, int] = {code: index for index, code in enumerate(canonical)}
+        self._json: Dict[str, str] = {code: json.dumps(code) for code in canonical}
+        self._codes: Tuple[str, ...] = canonical
+        self.display = ", ".join(canonical)
+
+    @property
+    def codes(self) -> Tuple[str, ...]:
+        """Registered codes in canonical order (shared, never copied)."""
+        return self._codes
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._lookup
+
+    def normalize(self, code: str) -> Optional[str]:
+        """Canonical code for any casing, or None if unsupported."""
+        return self._lookup.get(code)
+
+    def intern(self, code: str) -> str:
+        """The shared string for a supported code; other codes pass through."""
+        return self._lookup.get(code, code)
+
+    def id_of(self, code: str) -> Optional[int]:
+        """Dense id of a code, or None if unsupported."""
+        return self._ids.get(self._lookup.get(code))
+
+    def code_of(self, currency_id: int) -> str:
+        """Code registered under an id."""
+        return self._codes[currency_id]
+
+    def sort_key(self, code: str) -> Tuple[int, str]:
+        """Order codes canonically, unregistered codes last and alphabetically."""
+        return self._ids.get(code, len(self._codes)), code
+
+    def json(self, code: str) -> str:
+        """JSON string literal for a code, precomputed for registered codes."""
+        fragment = self._json.get(code)
+        return fragment if fragment is not None else json.dumps(code)
+
+
+# Global registry instance
+currency_registry = CurrencyRegistry(settings.supported_currencies)
@@ -0,0 +1,82 @@
+"""
+Non-blocking logging setup and sampled ASGI request logging.
+"""
+import atexit
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+access_logger = logging.getLogger("app.access")
+
+
+def setup_logging(level: int) -> QueueListener:
+    """
+    Route all log records through a queue to a background writer thread.
+
+    Request handlers only enqueue records; formatting and the stdout write
+    happen on the listener thread, so a slow log sink never blocks the
+    event loop.
+    """
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # QueueHandler formats the message before enqueueing; keep it bare so the
+    # listener's formatter is applied exactly once
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+    return listener
+
+
+class RequestLoggingMiddleware:
+    """
+    Pure ASGI middleware emitting one access record per sampled request.
+
+    Server errors and requests slower than slow_ms are always logged;
+    other requests are logged with probability sample_rate. The record
+    carries method, path, status and duration as attributes for
+    structured formatters.
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, slow_ms: float = 1000.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if status >= 500 or duration_ms >= self.slow_ms or random.random() < self.sample_rate:
+                access_logger.info(
+                    "%s %s %d %.1fms",
+                    scope["method"], scope["path"], status, duration_ms,
+                    extra={
+                        "http_method": scope["method"],
+                        "http_path": scope["path"],
+                        "http_status": status,
+                        "duration_ms": round(duration_ms, 1),
+                    },
+                )
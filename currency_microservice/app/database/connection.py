@@ -2,20 +2,53 @@
 Database connection and session management.
 """
 import asyncio
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import event, text, select, delete, insert
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateTable, CreateIndex
 from app.core.config import settings
 from app.models.exchange_rate import Base
+from app.models import backfill  # noqa: F401  (registers backfill tables)
+from app.models import job_run  # noqa: F401  (registers job history table)
+from app.models import currency  # noqa: F401  (registers discovered currencies table)
+from app.models.schema_version import SchemaVersionDB
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def _create_engine():
+    """Create the async engine for the configured storage backend."""
+    if settings.embedded:
+        sqlite_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{settings.sqlite_path}",
+            echo=settings.debug,
+        )
+
+        @event.listens_for(sqlite_engine.sync_engine, "connect")
+        def _configure_sqlite(dbapi_connection, connection_record):
+            # WAL lets readers proceed while the ingest job writes
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+            cursor.close()
+
+        return sqlite_engine
+
+    return create_async_engine(
+        settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
+        poolclass=NullPool if settings.debug else None,
+        echo=settings.debug,
+    )
+
+
 # Create async engine
-engine = create_async_engine(
-    settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
-    poolclass=NullPool if settings.debug else None,
-    echo=settings.debug,
-)
+engine = _create_engine()
 
 # Create session factory
 async_session_factory = async_sessionmaker(
@@ -38,22 +71,84 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+def schema_fingerprint() -> str:
+    """Hash the DDL of every registered table and index."""
+    dialect = postgresql.dialect()
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    return digest.hexdigest()
+
+
+async def _stored_schema_fingerprint() -> Optional[str]:
+    """Read the fingerprint of the last applied schema, or None if there is none."""
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(select(SchemaVersionDB.fingerprint).limit(1))
+            return result.scalar()
+    except Exception as e:
+        logger.debug(f"No stored schema fingerprint: {e}")
+        return None
+
+
 async def init_database():
-    """Initialize database tables."""
+    """
+    Initialize database tables.
+
+    With settings.fast_startup, DDL is skipped when the stored schema
+    fingerprint matches the current models, saving the catalog round trips
+    create_all makes for every table on every boot.
+    """
+    fingerprint = schema_fingerprint()
     try:
+        if settings.fast_startup and await _stored_schema_fingerprint() == fingerprint:
+            logger.info("Database schema is up to date, skipping DDL")
+            return
+
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(delete(SchemaVersionDB))
+            await conn.execute(insert(SchemaVersionDB).values(
+                id=1, fingerprint=fingerprint, applied_at=datetime.now(timezone.utc)
+            ))
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
 
 
+async def prewarm_pool(connections: int) -> int:
+    """
+    Open up to `connections` pooled connections concurrently so the first
+    requests do not pay for connection setup.
+
+    Only as many as the pool's pool_size stay open afterwards; overflow
+    connections are closed when they are returned.
+
+    Returns:
+        Number of connections opened
+    """
+    async def _open() -> bool:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to pre-open database connection: {e}")
+            return False
+
+    # Check out concurrently so each attempt opens its own connection instead of reusing a returned one
+    results = await asyncio.gather(*(_open() for _ in range(connections)))
+    return sum(results)
+
+
 async def check_database_connection() -> bool:
     """Check if database connection is working."""
     try:
-        async with engine.begin() as conn:
-            await conn.execute("SELECT 1")
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         return True
     except Exception as e:
         logger.error(f"Database connection check failed: {e}")
@@ -1,49 +1,90 @@
 """
 Main FastAPI application for the currency exchange rate microservice.
 """
-from fastapi import FastAPI, Request
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-import uvicorn
 import logging
-import sys
 
 from app.core.config import settings
-from app.database.connection import init_database, close_database_connection
+from app.core.request_logging import RequestLoggingMiddleware, access_logger, setup_logging
+from app.database.connection import init_database, close_database_connection, prewarm_pool
 from app.services.cache_service import cache_service
 from app.services.scheduler_service import scheduler_service
-from app.services.seeding_service import seeding_service
-from app.api.endpoints import router
+from app.services.leader_service import leader_service
+from app.services.health_service import health_service
+from app.services.snapshot_service import snapshot_service
+from app.services.currency_service import currency_service
+from app.services.local_cache_service import local_cache_service
+from app.services.rate_stream_service import rate_stream_service
+from app.services.http_client_service import http_client_service
+from app.services.external_api_service import external_api_service
+from app.api.endpoints import router, http_exception_handler
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO if not settings.debug else logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Configure logging (records are written by a background thread)
+setup_logging(logging.INFO if not settings.debug else logging.DEBUG)
 
 logger = logging.getLogger(__name__)
 
+import_seconds = time.perf_counter() - _import_started
+
+
+async def _warm_up(started: float):
+    """Pre-open database connections, re-probe, then let readiness through."""
+    try:
+        opened = await prewarm_pool(settings.db_pool_min_connections)
+        logger.info(f"Pre-opened {opened} database connections")
+        await health_service.probe()
+    except Exception as e:
+        logger.error(f"Startup warm-up failed: {e}")
+    finally:
+        health_service.set_warming(False)
+        logger.info(f"Ready in {time.perf_counter() - started:.3f}s")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     # Startup
-    logger.info(f"Starting {settings.app_name} v{settings.version}")
+    started = time.perf_counter()
+    logger.info(f"Starting {settings.app_name} v{settings.version} (imports took {import_seconds:.3f}s)")
+    warm_up_task = None
     
     try:
-        # Initialize database
-        await init_database()
-        logger.info("Database initialized")
+        # Report not-ready until warm-up finishes
+        health_service.set_warming(settings.fast_startup)
+        
+        # Initialize database, open upstream HTTP pools and connect to Redis concurrently
+        await asyncio.gather(
+            init_database(),
+            http_client_service.start(external_api_service.get_providers()),
+            cache_service.connect(),
+        )
+        logger.info("Database initialized and cache service connected")
         
-        # Connect to Redis
-        await cache_service.connect()
-        logger.info("Cache service connected")
+        # Map the last ingest's rate snapshot once Redis can confirm its version
+        await snapshot_service.start()
+        
+        # Register the currencies discovered by earlier ingests
+        await currency_service.start()
+        
+        # Follow snapshot events for streaming clients
+        await rate_stream_service.start()
+        
+        # Follow rate invalidations for this worker's local cache
+        await local_cache_service.start()
+        
+        # Compete for scheduler leadership across workers and replicas
+        await leader_service.start()
         
         # Start background scheduler
         await scheduler_service.start()
@@ -53,7 +94,15 @@ async def lifespan(app: FastAPI):
         if settings.debug:
             await _initialize_test_data()
         
-        logger.info("Application startup completed successfully")
+        # Start background health prober
+        await health_service.start()
+        logger.info("Health prober started")
+        
+        # Warm connection pools in the background; readiness flips once done
+        if settings.fast_startup:
+            warm_up_task = asyncio.create_task(_warm_up(started))
+        
+        logger.info(f"Application startup completed in {time.perf_counter() - started:.3f}s")
         
     except Exception as e:
         logger.error(f"Application startup failed: {e}")
@@ -65,14 +114,39 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down application")
     
     try:
+        # Abandon warm-up if it is still running
+        if warm_up_task and not warm_up_task.done():
+            warm_up_task.cancel()
+        
+        # Stop health prober
+        await health_service.stop()
+        
+        # Stop following snapshot versions
+        await snapshot_service.stop()
+        
+        # Stop following currency set changes
+        await currency_service.stop()
+        
+        # Stop the streaming event subscriber
+        await rate_stream_service.stop()
+        
+        # Stop the local cache invalidation listener
+        await local_cache_service.stop()
+        
         # Stop scheduler
         await scheduler_service.stop()
         logger.info("Scheduler service stopped")
         
+        # Hand scheduler leadership over before Redis goes away
+        await leader_service.stop()
+        
         # Disconnect from Redis
         await cache_service.disconnect()
         logger.info("Cache service disconnected")
         
+        # Close upstream HTTP connection pools
+        await http_client_service.close()
+        
         # Close database connections
         await close_database_connection()
         logger.info("Database connections closed")
@@ -93,39 +167,32 @@ app = FastAPI(
     redoc_url="/redoc" if settings.debug else None,
 )
 
-# Add middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Add middleware; each one is left out entirely when its policy would make it a no-op
+if settings.cors_origins:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
-app.add_middleware(
-    TrustedHostMiddleware,
-    allowed_hosts=["*"]  # Configure appropriately for production
-)
+if "*" not in settings.trusted_hosts:
+    app.add_middleware(
+        TrustedHostMiddleware,
+        allowed_hosts=settings.trusted_hosts
+    )
+
+if settings.request_log_enabled and access_logger.isEnabledFor(logging.INFO):
+    app.add_middleware(
+        RequestLoggingMiddleware,
+        sample_rate=settings.request_log_sample_rate,
+        slow_ms=settings.request_log_slow_ms
+    )
 
 # Include API routes
 app.include_router(router)
-
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Middleware to log all requests."""
-    start_time = time.time()
-    
-    # Log request
-    logger.info(f"Request: {request.method} {request.url}")
-    
-    response = await call_next(request)
-    
-    # Log response
-    process_time = time.time() - start_time
-    logger.info(f"Response: {response.status_code} - {process_time:.3f}s")
-    
-    return response
+app.add_exception_handler(HTTPException, http_exception_handler)
 
 
 @app.exception_handler(Exception)
@@ -157,6 +224,7 @@ async def _initialize_test_data():
     """Initialize test data for development and testing."""
     try:
         from app.database.connection import async_session_factory
+        from app.services.seeding_service import seeding_service
         
         logger.info("🧪 Debug mode: Initializing test currency data")
         
@@ -187,8 +255,7 @@ async def _initialize_test_data():
 
 if __name__ == "__main__":
     # For development only
-    import time
-    from datetime import datetime
+    import uvicorn
     
     uvicorn.run(
         "app.main:app",
@@ -0,0 +1,48 @@
+"""
+Database models for historical backfill progress.
+"""
+from sqlalchemy import Column, Integer, String, Date, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from pydantic import BaseModel, Field
+from datetime import datetime
+from datetime import date as date_type
+from typing import Optional
+
+from app.models.exchange_rate import Base
+
+
+class BackfillCheckpointDB(Base):
+    """SQLAlchemy model tracking how far a backfill range has been loaded."""
+
+    __tablename__ = "backfill_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    base_currency = Column(String(3), nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    completed_through = Column(Date, nullable=True)
+    status = Column(String(16), nullable=False, default="pending")
+    days_loaded = Column(Integer, nullable=False, default=0)
+    days_failed = Column(Integer, nullable=False, default=0)
+    rates_written = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('base_currency', 'start_date', 'end_date', name='unique_backfill_range'),
+    )
+
+
+class BackfillStatus(BaseModel):
+    """Model for backfill progress responses."""
+    base_currency: str = Field(..., max_length=3, description="Base currency being backfilled")
+    start_date: date_type = Field(..., description="First date of the range")
+    end_date: date_type = Field(..., description="Last date of the range")
+    completed_through: Optional[date_type] = Field(None, description="Last date durably loaded")
+    status: str = Field(..., description="pending, running, completed, incomplete (days failed) or failed")
+    days_loaded: int = Field(0, description="Days with rates stored")
+    days_failed: int = Field(0, description="Days no provider could serve")
+    rates_written: int = Field(0, description="Rate rows written")
+    updated_at: Optional[datetime] = Field(None, description="Last checkpoint time")
+
+    class Config:
+        from_attributes = True
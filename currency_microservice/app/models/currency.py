@@ -0,0 +1,16 @@
+"""
+Database model for currencies discovered from providers.
+"""
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+
+from app.models.exchange_rate import Base
+
+
+class CurrencyDB(Base):
+    """SQLAlchemy model for a supported currency code."""
+
+    __tablename__ = "currencies"
+
+    code = Column(String(3), primary_key=True)
+    discovered_at = Column(DateTime(timezone=True), server_default=func.now())
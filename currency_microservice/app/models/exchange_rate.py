@@ -6,11 +6,18 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from pydantic import BaseModel, Field
 from datetime import date, datetime
+from datetime import date as date_type
 from decimal import Decimal
-from typing import Optional
+from typing import List, Literal, Optional
 
 Base = declarative_base()
 
+# Storage precision of exchange_rates.rate; rates must fit it after rounding
+RATE_PRECISION = 10
+RATE_SCALE = 6
+RATE_QUANTUM = Decimal(1).scaleb(-RATE_SCALE)
+MAX_STORABLE_RATE = Decimal(10) ** (RATE_PRECISION - RATE_SCALE) - RATE_QUANTUM
+
 
 class ExchangeRateDB(Base):
     """SQLAlchemy model for exchange rates."""
@@ -20,7 +27,7 @@ class ExchangeRateDB(Base):
     id = Column(Integer, primary_key=True, index=True)
     base_currency = Column(String(3), nullable=False, index=True)
     target_currency = Column(String(3), nullable=False, index=True)
-    rate = Column(Numeric(10, 6), nullable=False)
+    rate = Column(Numeric(RATE_PRECISION, RATE_SCALE), nullable=False)
     date = Column(Date, nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -35,7 +42,7 @@ class ExchangeRateBase(BaseModel):
     base_currency: str = Field(..., max_length=3, description="Base currency code (e.g., USD)")
     target_currency: str = Field(..., max_length=3, description="Target currency code (e.g., EUR)")
     rate: Decimal = Field(..., gt=0, description="Exchange rate")
-    date: date = Field(..., description="Rate date")
+    date: date_type = Field(..., description="Rate date")
 
 
 class ExchangeRateCreate(ExchangeRateBase):
@@ -52,6 +59,18 @@ class ExchangeRateResponse(ExchangeRateBase):
         from_attributes = True
 
 
+class RateQuoteResponse(ExchangeRateBase):
+    """
+    Model for the rate read endpoints.
+    
+    Reads may be answered by the snapshot or a cache tier, which hold no
+    row id or storage time, so only the rate itself is returned.
+    """
+    
+    class Config:
+        from_attributes = True
+
+
 class ExchangeRateUpdate(BaseModel):
     """Model for updating exchange rates."""
     rate: Optional[Decimal] = Field(None, gt=0, description="New exchange rate")
@@ -67,6 +86,63 @@ class CurrencyConversion(BaseModel):
     rate_date: date = Field(..., description="Date of exchange rate")
 
 
+class HistoricalConversionItem(BaseModel):
+    """A single dated amount to convert."""
+    amount: Decimal = Field(..., gt=0, description="Amount to convert")
+    currency: str = Field(..., max_length=3, description="Currency of the amount")
+    date: date_type = Field(..., description="Date the amount was recorded")
+
+
+class HistoricalConversionRequest(BaseModel):
+    """Model for batch conversion of dated amounts."""
+    target_currency: str = Field(..., max_length=3, description="Currency to convert every item to")
+    items: List[HistoricalConversionItem] = Field(..., min_length=1, description="Dated amounts to convert")
+
+
+class HistoricalConversionResult(BaseModel):
+    """Conversion outcome for one item of a batch request."""
+    index: int = Field(..., description="Position of the item in the request")
+    original_amount: Decimal = Field(..., description="Original amount")
+    original_currency: str = Field(..., max_length=3, description="Original currency")
+    date: date_type = Field(..., description="Requested date")
+    converted_amount: Optional[Decimal] = Field(None, description="Converted amount, if a rate was found")
+    exchange_rate: Optional[Decimal] = Field(None, description="Exchange rate used")
+    rate_date: Optional[date_type] = Field(None, description="Date of the exchange rate used")
+    error: Optional[str] = Field(None, description="Why the item could not be converted")
+
+
+class HistoricalConversionResponse(BaseModel):
+    """Model for batch conversion responses."""
+    target_currency: str = Field(..., max_length=3, description="Target currency")
+    converted: int = Field(..., description="Number of items converted")
+    failed: int = Field(..., description="Number of items without an available rate")
+    results: List[HistoricalConversionResult] = Field(..., description="Per-item results in request order")
+
+
+class RatePeriodStats(BaseModel):
+    """Aggregate statistics for one currency pair over one period."""
+    period_start: date_type = Field(..., description="First day of the period")
+    period_end: date_type = Field(..., description="Last day of the period")
+    first_rate_date: date_type = Field(..., description="First date with a rate in the period")
+    last_rate_date: date_type = Field(..., description="Last date with a rate in the period")
+    observations: int = Field(..., description="Number of daily rates in the period")
+    average: Decimal = Field(..., description="Mean rate")
+    min: Decimal = Field(..., description="Lowest rate")
+    max: Decimal = Field(..., description="Highest rate")
+    stddev: Optional[Decimal] = Field(None, description="Sample standard deviation of the rate")
+    volatility: Optional[Decimal] = Field(None, description="Sample standard deviation of daily log returns")
+
+
+class RateStatsResponse(BaseModel):
+    """Model for period statistics responses."""
+    base_currency: str = Field(..., max_length=3, description="Base currency code")
+    target_currency: str = Field(..., max_length=3, description="Target currency code")
+    period: Literal["month", "quarter", "year"] = Field(..., description="Aggregation period")
+    start: date_type = Field(..., description="Requested range start")
+    end: date_type = Field(..., description="Requested range end")
+    periods: List[RatePeriodStats] = Field(..., description="Statistics per period, oldest first")
+
+
 class HealthStatus(BaseModel):
     """Model for health check response."""
     status: str = Field(..., description="Service status")
@@ -74,6 +150,10 @@ class HealthStatus(BaseModel):
     version: str = Field(..., description="Service version")
     database: bool = Field(..., description="Database connectivity")
     redis: bool = Field(..., description="Redis connectivity")
+    scheduler: Optional[bool] = Field(None, description="Background scheduler running")
+    latest_rate_date: Optional[date_type] = Field(None, description="Most recent stored rate date for the base currency")
+    rates_fresh: Optional[bool] = Field(None, description="Latest stored rates are within the allowed age")
+    checked_at: Optional[datetime] = Field(None, description="When dependencies were last probed")
     
     
 class ErrorResponse(BaseModel):
@@ -0,0 +1,74 @@
+"""
+Database models for scheduled job run history.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional
+
+from app.models.exchange_rate import Base
+
+
+class JobRunDB(Base):
+    """SQLAlchemy model recording one execution of a scheduled job."""
+
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(64), nullable=False)
+    instance_id = Column(String(128), nullable=True)
+    status = Column(String(16), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    rows_written = Column(Integer, nullable=True)
+    provider = Column(String(64), nullable=True)
+    cache_keys_warmed = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index('idx_job_run_job_started', 'job_id', 'started_at'),
+    )
+
+
+class JobRunResponse(BaseModel):
+    """Model for a recorded job run."""
+    job_id: str = Field(..., description="Scheduled job identifier")
+    instance_id: Optional[str] = Field(None, description="Worker that ran the job")
+    status: str = Field(..., description="succeeded or failed")
+    started_at: datetime = Field(..., description="Run start time")
+    finished_at: Optional[datetime] = Field(None, description="Run end time")
+    duration_ms: Optional[int] = Field(None, description="Run duration in milliseconds")
+    rows_written: Optional[int] = Field(None, description="Rate rows written")
+    provider: Optional[str] = Field(None, description="Provider that served the rates")
+    cache_keys_warmed: Optional[int] = Field(None, description="Cache keys written by warming")
+    error: Optional[str] = Field(None, description="Failure reason")
+
+    class Config:
+        from_attributes = True
+
+
+class JobDurationStats(BaseModel):
+    """Duration percentiles over a job's recorded history."""
+    job_id: str = Field(..., description="Scheduled job identifier")
+    runs: int = Field(..., description="Recorded runs")
+    failures: int = Field(..., description="Failed runs")
+    p50_ms: Optional[float] = Field(None, description="Median duration")
+    p90_ms: Optional[float] = Field(None, description="90th percentile duration")
+    p99_ms: Optional[float] = Field(None, description="99th percentile duration")
+    last_started_at: Optional[datetime] = Field(None, description="Start time of the latest run")
+
+
+class ScheduledJob(BaseModel):
+    """An upcoming scheduled job on the answering worker."""
+    id: str = Field(..., description="Scheduled job identifier")
+    name: Optional[str] = Field(None, description="Job callable name")
+    next_run_time: Optional[datetime] = Field(None, description="Next fire time")
+    trigger: str = Field(..., description="Trigger description")
+
+
+class SchedulerStatusResponse(BaseModel):
+    """Model for scheduler instrumentation responses."""
+    upcoming: List[ScheduledJob] = Field(..., description="Jobs scheduled on the answering worker")
+    recent_runs: List[JobRunResponse] = Field(..., description="Most recent runs across the cluster")
+    stats: List[JobDurationStats] = Field(..., description="Duration percentiles per job")
@@ -0,0 +1,77 @@
+"""
+Lightweight exchange rate records and their JSON rendering for hot read paths.
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Mapping
+
+from app.core.currencies import currency_registry
+
+
+class RateRecord:
+    """
+    An exchange rate as served by the read endpoints.
+
+    Carries the RateQuoteResponse fields without pydantic validation;
+    render_rate/render_rates produce the same JSON the response model would.
+    """
+
+    __slots__ = ("base_currency", "target_currency", "rate", "date")
+
+    def __init__(self, base_currency: str, target_currency: str, rate: Decimal, date: date):
+        self.base_currency = base_currency
+        self.target_currency = target_currency
+        self.rate = rate
+        self.date = date
+
+    @classmethod
+    def from_db(cls, row) -> "RateRecord":
+        """Build a record from an ExchangeRateDB row."""
+        return cls(
+            currency_registry.intern(row.base_currency),
+            currency_registry.intern(row.target_currency),
+            row.rate,
+            row.date,
+        )
+
+    @classmethod
+    def from_cached(cls, data: Mapping[str, Any]) -> "RateRecord":
+        """Build a record from a cached dict (values stored as strings)."""
+        return cls(
+            currency_registry.intern(data["base_currency"]),
+            currency_registry.intern(data["target_currency"]),
+            Decimal(data["rate"]),
+            date.fromisoformat(data["date"]),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Fields in response order, as model_dump() would return them."""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RateRecord) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"RateRecord({self.base_currency}/{self.target_currency} {self.rate} on {self.date})"
+
+
+def render_rate(record) -> str:
+    """
+    Render a rate as JSON matching RateQuoteResponse serialization.
+
+    Accepts a RateRecord or anything with the same attributes. Decimals
+    keep their exact string form.
+    """
+    return (
+        f'{{"base_currency":{currency_registry.json(record.base_currency)},'
+        f'"target_currency":{currency_registry.json(record.target_currency)},'
+        f'"rate":"{record.rate}",'
+        f'"date":"{record.date.isoformat()}"}}'
+    )
+
+
+def render_rates(records: Mapping[str, Any]) -> str:
+    """Render a {target: rate} mapping as a JSON object."""
+    return "{" + ",".join(
+        f"{currency_registry.json(target)}:{render_rate(record)}" for target, record in records.items()
+    ) + "}"
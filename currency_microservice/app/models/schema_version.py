@@ -0,0 +1,16 @@
+"""
+Database model recording the applied schema fingerprint.
+"""
+from sqlalchemy import Column, Integer, String, DateTime
+
+from app.models.exchange_rate import Base
+
+
+class SchemaVersionDB(Base):
+    """SQLAlchemy model holding the fingerprint of the last applied table metadata."""
+
+    __tablename__ = "schema_version"
+
+    id = Column(Integer, primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    applied_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,294 @@
+"""
+Historical backfill service for loading past exchange rates in bulk.
+"""
+import asyncio
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.connection import async_session_factory
+from app.models.backfill import BackfillCheckpointDB, BackfillStatus
+from app.services.currency_service import currency_service
+from app.services.exchange_rate_service import exchange_rate_service, rebase_rates
+from app.services.external_api_service import ExternalAPIService, external_api_service
+from app.services.local_cache_service import local_cache_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderBudget:
+    """Token bucket limiting how fast a single provider is called."""
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate_per_second = rate_per_second
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request token is available and consume it."""
+        if self.rate_per_second <= 0:
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate_per_second)
+
+
+class BackfillService:
+    """Service for fetching and storing historical exchange rate snapshots."""
+
+    def __init__(self, external_api: ExternalAPIService = None):
+        self.external_api = external_api or external_api_service
+
+    def _create_budgets(self) -> Dict[str, ProviderBudget]:
+        """Create a fresh request budget for every provider."""
+        return {
+            provider: ProviderBudget(settings.backfill_provider_rate_per_second)
+            for provider in self.external_api.get_providers()
+        }
+
+    async def _fetch_day(
+        self,
+        base: str,
+        rate_date: date,
+        semaphore: asyncio.Semaphore,
+        budgets: Dict[str, ProviderBudget]
+    ) -> Tuple[date, Optional[Dict[str, Decimal]]]:
+        """
+        Fetch one historical snapshot, falling back across providers.
+
+        A provider's request budget is only spent when it is actually called,
+        not for cached payloads or providers skipped for quota or breaker.
+        """
+        async with semaphore:
+            for provider in self.external_api.get_providers():
+                try:
+                    rates = await self.external_api.fetch_from_provider(
+                        provider, base, rate_date, before_call=budgets[provider].acquire
+                    )
+                except Exception as e:
+                    logger.error(f"Backfill fetch from {provider} failed for {base} on {rate_date}: {e}")
+                    continue
+                if rates:
+                    return rate_date, rates
+
+        logger.warning(f"No provider returned rates for {base} on {rate_date}")
+        return rate_date, None
+
+    async def _build_rows(
+        self,
+        base: str,
+        snapshots: List[Tuple[date, Optional[Dict[str, Decimal]]]],
+        bases: List[str]
+    ) -> List[dict]:
+        """Turn fetched anchor snapshots into validated exchange_rates rows for every base."""
+        rows = []
+        for rate_date, rates in snapshots:
+            if not rates:
+                continue
+            for base_currency, targets in rebase_rates(rates, base, bases).items():
+                for target_currency, rate in targets.items():
+                    if not await self.external_api.validate_rate(base_currency, target_currency, rate):
+                        logger.warning(
+                            f"Invalid rate skipped: {base_currency}/{target_currency} = {rate} on {rate_date}"
+                        )
+                        continue
+                    rows.append({
+                        "base_currency": base_currency,
+                        "target_currency": target_currency,
+                        "rate": rate,
+                        "date": rate_date,
+                    })
+        return rows
+
+    async def _store_batch(
+        self,
+        db: AsyncSession,
+        rows: List[dict],
+        checkpoint: BackfillCheckpointDB
+    ) -> int:
+        """Upsert a batch of rows and advance the checkpoint in one transaction."""
+        await currency_service.discover(db, {row["target_currency"] for row in rows})
+        await exchange_rate_service.bulk_upsert_rates(db, rows)
+
+        checkpoint.rates_written += len(rows)
+        await db.commit()
+        await exchange_rate_service.invalidate_period_stats(rows)
+        await local_cache_service.publish(
+            {row["base_currency"] for row in rows},
+            {row["date"] for row in rows}
+        )
+        return len(rows)
+
+    async def _get_or_create_checkpoint(
+        self,
+        db: AsyncSession,
+        base: str,
+        start: date,
+        end: date
+    ) -> BackfillCheckpointDB:
+        """Load the checkpoint for a range, creating it on first run."""
+        result = await db.execute(
+            select(BackfillCheckpointDB).where(
+                and_(
+                    BackfillCheckpointDB.base_currency == base,
+                    BackfillCheckpointDB.start_date == start,
+                    BackfillCheckpointDB.end_date == end
+                )
+            )
+        )
+        checkpoint = result.scalar_one_or_none()
+        if checkpoint is None:
+            checkpoint = BackfillCheckpointDB(
+                base_currency=base,
+                start_date=start,
+                end_date=end,
+                status="pending",
+                days_loaded=0,
+                days_failed=0,
+                rates_written=0,
+            )
+            db.add(checkpoint)
+            await db.commit()
+        return checkpoint
+
+    async def run_backfill(
+        self,
+        db: AsyncSession,
+        base: str,
+        start: date,
+        end: date,
+        concurrency: int = None,
+        batch_days: int = None,
+        bases: List[str] = None
+    ) -> BackfillStatus:
+        """
+        Backfill historical rates for a base currency over a date range.
+
+        Dates are fetched concurrently in batches; each batch is stored in a
+        single transaction together with the checkpoint, so an interrupted
+        run resumes after the last stored batch. completed_through never
+        passes a day no provider could serve: such a run ends "incomplete"
+        and a rerun fetches again from the first failed day.
+
+        Args:
+            db: Database session
+            base: Base currency code
+            start: First date to load (inclusive)
+            end: Last date to load (inclusive)
+            concurrency: Maximum in-flight provider requests
+            batch_days: Number of days stored per transaction
+            bases: Base currencies derived from each fetched snapshot of
+                `base`, as the daily ingest does (defaults to `base` only)
+
+        Returns:
+            Final checkpoint status for the range ("completed", or
+            "incomplete" when days failed)
+        """
+        if start > end:
+            raise ValueError("Backfill start date must not be after end date")
+
+        concurrency = concurrency or settings.backfill_concurrency
+        batch_days = batch_days or settings.backfill_batch_days
+        bases = bases or [base]
+
+        checkpoint = await self._get_or_create_checkpoint(db, base, start, end)
+        if checkpoint.status == "completed":
+            logger.info(f"Backfill for {base} {start}..{end} already completed")
+            return BackfillStatus.model_validate(checkpoint)
+
+        resume_from = start
+        if checkpoint.completed_through:
+            resume_from = checkpoint.completed_through + timedelta(days=1)
+
+        # Everything after completed_through is fetched again, failures included
+        checkpoint.days_loaded = (resume_from - start).days
+        checkpoint.days_failed = 0
+        checkpoint.status = "running"
+        await db.commit()
+        logger.info(f"Starting backfill for {base} from {resume_from} to {end} (concurrency={concurrency})")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        budgets = self._create_budgets()
+        first_failure: Optional[date] = None
+
+        try:
+            batch_start = resume_from
+            while batch_start <= end:
+                batch_end = min(batch_start + timedelta(days=batch_days - 1), end)
+                days = [
+                    batch_start + timedelta(days=offset)
+                    for offset in range((batch_end - batch_start).days + 1)
+                ]
+
+                snapshots = await asyncio.gather(
+                    *(self._fetch_day(base, day, semaphore, budgets) for day in days)
+                )
+                rows = await self._build_rows(base, snapshots, bases)
+
+                loaded = sum(1 for _, rates in snapshots if rates)
+                checkpoint.days_loaded += loaded
+                checkpoint.days_failed += len(days) - loaded
+                if first_failure is None:
+                    failed = [rate_date for rate_date, rates in snapshots if not rates]
+                    if failed:
+                        first_failure = failed[0]
+                        if first_failure > resume_from:
+                            checkpoint.completed_through = first_failure - timedelta(days=1)
+                    else:
+                        checkpoint.completed_through = batch_end
+                written = await self._store_batch(db, rows, checkpoint)
+
+                logger.info(f"Backfill {base}: stored {written} rates for {batch_start}..{batch_end}")
+                batch_start = batch_end + timedelta(days=1)
+
+            checkpoint.status = "completed" if checkpoint.days_failed == 0 else "incomplete"
+            await db.commit()
+            await db.refresh(checkpoint)
+
+        except Exception as e:
+            logger.error(f"Backfill for {base} failed: {e}")
+            await db.rollback()
+            checkpoint.status = "failed"
+            await db.commit()
+            raise
+
+        logger.info(
+            f"Backfill {checkpoint.status} for {base}: {checkpoint.days_loaded} days loaded, "
+            f"{checkpoint.days_failed} days failed, {checkpoint.rates_written} rates written"
+        )
+        return BackfillStatus.model_validate(checkpoint)
+
+    async def run_backfill_job(self, base: str, start: date, end: date, **kwargs) -> Optional[BackfillStatus]:
+        """Run a backfill in its own database session (for background tasks and the CLI)."""
+        try:
+            async with async_session_factory() as db:
+                return await self.run_backfill(db, base, start, end, **kwargs)
+        except Exception as e:
+            logger.error(f"Backfill job for {base} {start}..{end} failed: {e}")
+            return None
+
+    async def list_backfills(self, db: AsyncSession) -> List[BackfillStatus]:
+        """List all known backfill checkpoints, most recently updated first."""
+        result = await db.execute(
+            select(BackfillCheckpointDB).order_by(BackfillCheckpointDB.updated_at.desc())
+        )
+        return [BackfillStatus.model_validate(cp) for cp in result.scalars().all()]
+
+
+# Global backfill service instance
+backfill_service = BackfillService()
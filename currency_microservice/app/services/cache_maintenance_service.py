@@ -0,0 +1,115 @@
+"""
+Incremental, time-budgeted cache maintenance.
+"""
+import calendar
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.cache_service import cache_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+CURSOR_KEY = "maintenance:cache:cursor"
+
+
+def _parse_date(value: str) -> Optional[date]:
+    """Parse an ISO date key segment, or None if it is not one."""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+class CacheMaintenanceService:
+    """
+    Walks the keyspace a slice at a time with SCAN.
+
+    The SCAN cursor is stored in Redis between ticks, and each tick stops
+    once its time budget is spent, so a pass over a large keyspace is
+    spread over many short ticks instead of one long stall. Along the way
+    it enforces date retention and folds old per-pair keys into one hash
+    per date.
+    """
+
+    def _retention_cutoff(self, today: date) -> date:
+        """Dates before this are dropped from the cache."""
+        return today - timedelta(days=settings.cache_retention_days)
+
+    def _compaction_cutoff(self, today: date) -> date:
+        """Per-pair keys for dates before this are folded into per-date hashes."""
+        return today - timedelta(days=settings.cache_compact_after_days)
+
+    def _expire_at(self, rate_date: date) -> int:
+        """Unix time at which a compacted date leaves the retention window."""
+        end = rate_date + timedelta(days=settings.cache_retention_days + 1)
+        return calendar.timegm(end.timetuple())
+
+    async def run_tick(self, today: date = None) -> Dict[str, int]:
+        """
+        Advance the keyspace walk until the time budget is spent or a pass completes.
+
+        Returns:
+            Counts of scanned, expired and compacted keys and completed passes
+        """
+        stats = {"scanned": 0, "expired": 0, "compacted": 0, "passes": 0}
+        if not await cache_service.is_connected():
+            return stats
+
+        today = today or date.today()
+        redis = cache_service.redis_client
+        deadline = time.monotonic() + settings.cache_maintenance_budget_ms / 1000
+        cursor = int(await redis.get(CURSOR_KEY) or 0)
+
+        while True:
+            cursor, keys = await redis.scan(cursor=cursor, count=settings.cache_maintenance_scan_count)
+            stats["scanned"] += len(keys)
+            await self._process_keys(keys, today, stats)
+
+            if cursor == 0:
+                stats["passes"] += 1
+                break
+            if time.monotonic() >= deadline:
+                break
+
+        await redis.set(CURSOR_KEY, cursor)
+        return stats
+
+    async def _process_keys(self, keys: List[str], today: date, stats: Dict[str, int]):
+        """Expire keys past retention and compact old per-pair keys in one batch."""
+        retention_cutoff = self._retention_cutoff(today)
+        compaction_cutoff = self._compaction_cutoff(today)
+        expired: List[str] = []
+        to_compact: List[Tuple[str, str, str, date]] = []
+
+        for key in keys:
+            parts = key.split(":")
+            if parts[0] == "rate" and len(parts) == 4:
+                rate_date = _parse_date(parts[3])
+                if rate_date is None:
+                    continue
+                if rate_date < retention_cutoff:
+                    expired.append(key)
+                elif rate_date < compaction_cutoff:
+                    to_compact.append((key, parts[1], parts[2], rate_date))
+            elif parts[0] in ("rates", "cross_rates") and len(parts) == 2:
+                rate_date = _parse_date(parts[1])
+                if rate_date is not None and rate_date < retention_cutoff:
+                    expired.append(key)
+
+        redis = cache_service.redis_client
+        if expired:
+            await redis.unlink(*expired)
+            stats["expired"] += len(expired)
+
+        if to_compact:
+            stats["compacted"] += await cache_service.compact_rates(
+                [(base, target, rate_date) for _, base, target, rate_date in to_compact],
+                self._expire_at
+            )
+
+
+# Global cache maintenance service instance
+cache_maintenance_service = CacheMaintenanceService()
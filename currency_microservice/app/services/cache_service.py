@@ -3,15 +3,32 @@ Redis cache service for exchange rates.
 """
 import json
 import redis.asyncio as redis
-from typing import Optional, List, Dict, Any
+from typing import Callable, Optional, List, Dict, Any, Tuple
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from app.core.config import settings
 from app.models.exchange_rate import ExchangeRateResponse
+from app.services.memory_cache import MemoryCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Keys per DEL command when dropping period statistics
+PERIOD_STATS_DELETE_CHUNK = 1000
+
+# Prefixes of cached data; quota counters, leader leases, fencing tokens,
+# version counters and the maintenance cursor share the DB and must survive a clear
+CACHE_KEY_PREFIXES = (
+    "rate:",
+    "rates:",
+    "latest_rates:",
+    "response:",
+    "cross_rates:",
+    "stats:",
+    "provider_response:",
+)
+CLEAR_SCAN_COUNT = 1000
+
 
 class CacheService:
     """Redis-based caching service for exchange rates."""
@@ -22,6 +39,10 @@ class CacheService:
     async def connect(self):
         """Connect to Redis."""
         try:
+            if settings.embedded:
+                self.redis_client = MemoryCache(settings.embedded_cache_max_entries)
+                logger.info("Using in-process cache (embedded mode)")
+                return
             self.redis_client = redis.from_url(
                 settings.redis_url,
                 encoding="utf-8",
@@ -39,6 +60,11 @@ class CacheService:
             await self.redis_client.close()
             logger.info("Disconnected from Redis")
     
+    @property
+    def connected(self) -> bool:
+        """Whether a client was set up; unlike is_connected this costs no round trip."""
+        return self.redis_client is not None
+    
     async def is_connected(self) -> bool:
         """Check if Redis is connected."""
         if not self.redis_client:
@@ -53,10 +79,50 @@ class CacheService:
         """Generate cache key for exchange rate."""
         return f"rate:{base}:{target}:{date.isoformat()}"
     
+    def _compacted_rates_key(self, date: date) -> str:
+        """Generate cache key for the per-date hash of compacted pair rates."""
+        return f"rates:{date.isoformat()}"
+    
     def _latest_rates_key(self, base: str) -> str:
         """Generate cache key for latest rates."""
         return f"latest_rates:{base}"
     
+    def _snapshot_version_key(self) -> str:
+        """Generate cache key for the newest published rate snapshot version."""
+        return "snapshot:version"
+    
+    def _currencies_version_key(self) -> str:
+        """Generate cache key for the version of the supported currency set."""
+        return "currencies:version"
+    
+    def _rate_events_channel(self) -> str:
+        """Generate pub/sub channel name for rate snapshot events."""
+        return "events:rates"
+    
+    def _last_rate_event_key(self) -> str:
+        """Generate cache key for the newest rate snapshot event."""
+        return "events:rates:last"
+    
+    def _invalidations_channel(self) -> str:
+        """Generate pub/sub channel name for rate invalidation events."""
+        return "events:invalidation"
+    
+    def _invalidation_version_key(self) -> str:
+        """Generate cache key for the rate invalidation counter."""
+        return "invalidation:version"
+    
+    def _rendered_rates_key(self, base: str) -> str:
+        """Generate cache key for the serialized latest-rates response body."""
+        return f"response:rates:{base}"
+    
+    def _cross_rates_key(self, rate_date: date) -> str:
+        """Generate cache key for the cross-rate matrix of a date."""
+        return f"cross_rates:{rate_date.isoformat()}"
+    
+    def _period_stats_key(self, base: str, target: str, period: str, period_start: date) -> str:
+        """Generate cache key for statistics of a closed period."""
+        return f"stats:{base}:{target}:{period}:{period_start.isoformat()}"
+    
     async def get_rate(self, base: str, target: str, date: date) -> Optional[Decimal]:
         """Get cached exchange rate."""
         if not await self.is_connected():
@@ -65,6 +131,9 @@ class CacheService:
         try:
             key = self._rate_key(base, target, date)
             cached_rate = await self.redis_client.get(key)
+            if not cached_rate and date < date.today() - timedelta(days=settings.cache_compact_after_days):
+                # Older dates may have been folded into the per-date hash
+                cached_rate = await self.redis_client.hget(self._compacted_rates_key(date), f"{base}:{target}")
             if cached_rate:
                 return Decimal(cached_rate)
         except Exception as e:
@@ -86,6 +155,22 @@ class CacheService:
             logger.error(f"Cache set_rate error: {e}")
             return False
     
+    async def set_rates(self, entries: List[tuple], ttl: int = None) -> bool:
+        """Cache many (base, target, date, rate) entries in one pipelined round trip."""
+        if not entries or not await self.is_connected():
+            return False
+        
+        try:
+            ttl_seconds = ttl or settings.cache_ttl_seconds
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for base, target, rate_date, rate in entries:
+                    pipe.setex(self._rate_key(base, target, rate_date), ttl_seconds, str(rate))
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Cache set_rates error: {e}")
+            return False
+    
     async def get_latest_rates(self, base: str) -> Optional[Dict[str, Any]]:
         """Get cached latest rates for base currency."""
         if not await self.is_connected():
@@ -115,6 +200,274 @@ class CacheService:
             logger.error(f"Cache set_latest_rates error: {e}")
             return False
     
+    async def get_snapshot_version(self) -> Optional[int]:
+        """Get the newest published rate snapshot version."""
+        if not await self.is_connected():
+            return None
+        
+        try:
+            version = await self.redis_client.get(self._snapshot_version_key())
+            return int(version) if version else None
+        except Exception as e:
+            logger.error(f"Cache get_snapshot_version error: {e}")
+            return None
+    
+    async def set_snapshot_version(self, version: int) -> bool:
+        """Publish a new rate snapshot version to other workers."""
+        if not await self.is_connected():
+            return False
+        
+        try:
+            await self.redis_client.set(self._snapshot_version_key(), version)
+            return True
+        except Exception as e:
+            logger.error(f"Cache set_snapshot_version error: {e}")
+            return False
+    
+    async def get_currencies_version(self) -> Optional[int]:
+        """Get the version of the supported currency set."""
+        if not await self.is_connected():
+            return None
+        
+        try:
+            version = await self.redis_client.get(self._currencies_version_key())
+            return int(version) if version else None
+        except Exception as e:
+            logger.error(f"Cache get_currencies_version error: {e}")
+            return None
+    
+    async def set_currencies_version(self, version: int) -> bool:
+        """Tell other workers the supported currency set changed."""
+        if not await self.is_connected():
+            return False
+        
+        try:
+            await self.redis_client.set(self._currencies_version_key(), version)
+            return True
+        except Exception as e:
+            logger.error(f"Cache set_currencies_version error: {e}")
+            return False
+    
+    async def publish_rate_event(self, event: Dict[str, Any]) -> bool:
+        """Record the newest rate snapshot event and broadcast it to every worker."""
+        if not await self.is_connected():
+            return False
+        
+        try:
+            payload = json.dumps(event)
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.set(self._last_rate_event_key(), payload)
+                pipe.publish(self._rate_events_channel(), payload)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Cache publish_rate_event error: {e}")
+            return False
+    
+    async def get_last_rate_event(self) -> Optional[Dict[str, Any]]:
+        """Get the newest rate snapshot event."""
+        if not await self.is_connected():
+            return None
+        
+        try:
+            payload = await self.redis_client.get(self._last_rate_event_key())
+            return json.loads(payload) if payload else None
+        except Exception as e:
+            logger.error(f"Cache get_last_rate_event error: {e}")
+            return None
+    
+    async def subscribe_rate_events(self):
+        """Open a pub/sub subscription to rate snapshot events, or None without Redis."""
+        if not await self.is_connected():
+            return None
+        
+        try:
+            pubsub = self.redis_client.pubsub()
+            await pubsub.subscribe(self._rate_events_channel())
+            return pubsub
+        except Exception as e:
+            logger.error(f"Cache subscribe_rate_events error: {e}")
+            return None
+    
+    async def publish_invalidation(self, event: Dict[str, Any]) -> Optional[int]:
+        """Number a rate invalidation event and broadcast it to every worker."""
+        if not await self.is_connected():
+            return None
+        
+        try:
+            version = await self.redis_client.incr(self._invalidation_version_key())
+            await self.redis_client.publish(self._invalidations_channel(), json.dumps({**event, "version": version}))
+            return version
+        except Exception as e:
+            logger.error(f"Cache publish_invalidation error: {e}")
+            return None
+    
+    async def get_invalidation_version(self) -> Optional[int]:
+        """Get the number of the newest rate invalidation event."""
+        if not await self.is_connected():
+            return None
+        
+        try:
+            version = await self.redis_client.get(self._invalidation_version_key())
+            return int(version) if version else 0
+        except Exception as e:
+            logger.error(f"Cache get_invalidation_version error: {e}")
+            return None
+    
+    async def subscribe_invalidations(self):
+        """Open a pub/sub subscription to rate invalidation events, or None without Redis."""
+        if not await self.is_connected():
+            return None
+        
+        try:
+            pubsub = self.redis_client.pubsub()
+            await pubsub.subscribe(self._invalidations_channel())
+            return pubsub
+        except Exception as e:
+            logger.error(f"Cache subscribe_invalidations error: {e}")
+            return None
+    
+    async def get_rendered_rates(self, base: str) -> Optional[str]:
+        """Get the pre-serialized latest-rates response body for a base currency."""
+        if not await self.is_connected():
+            return None
+        
+        try:
+            return await self.redis_client.get(self._rendered_rates_key(base))
+        except Exception as e:
+            logger.error(f"Cache get_rendered_rates error: {e}")
+            return None
+    
+    async def get_cross_rate(self, base: str, target: str, rate_date: date) -> Optional[Decimal]:
+        """Get a rate from the cross-rate matrix of a date."""
+        if not await self.is_connected():
+            return None
+        
+        try:
+            cached_rate = await self.redis_client.hget(self._cross_rates_key(rate_date), f"{base}:{target}")
+            if cached_rate:
+                return Decimal(cached_rate)
+        except Exception as e:
+            logger.error(f"Cache get_cross_rate error: {e}")
+        
+        return None
+    
+    async def swap_in_snapshot(
+        self,
+        rate_date: date,
+        pairs: List[tuple],
+        snapshots: Dict[str, Dict[str, Any]],
+        bodies: Dict[str, str],
+        cross_rates: Dict[str, Dict[str, Decimal]],
+        ttl: int = None
+    ) -> bool:
+        """
+        Write every cache tier for a snapshot in one MULTI/EXEC.
+        
+        Per-pair entries, per-base latest snapshots, rendered response bodies
+        and the cross-rate matrix are replaced together, so readers see either
+        the previous snapshot or the new one, never a mix.
+        """
+        if not await self.is_connected():
+            return False
+        
+        try:
+            ttl_seconds = ttl or settings.cache_ttl_seconds
+            cross_key = self._cross_rates_key(rate_date)
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                for base, target, pair_date, rate in pairs:
+                    pipe.setex(self._rate_key(base, target, pair_date), ttl_seconds, str(rate))
+                for base, data in snapshots.items():
+                    pipe.setex(self._latest_rates_key(base), ttl_seconds, json.dumps(data, default=str))
+                for base, body in bodies.items():
+                    pipe.setex(self._rendered_rates_key(base), ttl_seconds, body)
+                if cross_rates:
+                    pipe.delete(cross_key)
+                    pipe.hset(cross_key, mapping={
+                        f"{base}:{target}": str(rate)
+                        for base, targets in cross_rates.items()
+                        for target, rate in targets.items()
+                    })
+                    pipe.expire(cross_key, ttl_seconds)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Cache swap_in_snapshot error: {e}")
+            return False
+    
+    async def get_period_stats(
+        self, 
+        base: str, 
+        target: str, 
+        period: str, 
+        period_starts: List[date]
+    ) -> Dict[date, Dict[str, Any]]:
+        """Get cached statistics for several closed periods in one round trip."""
+        if not period_starts or not await self.is_connected():
+            return {}
+        
+        try:
+            keys = [self._period_stats_key(base, target, period, start) for start in period_starts]
+            values = await self.redis_client.mget(keys)
+            return {
+                start: json.loads(value)
+                for start, value in zip(period_starts, values)
+                if value
+            }
+        except Exception as e:
+            logger.error(f"Cache get_period_stats error: {e}")
+            return {}
+    
+    async def set_period_stats(
+        self, 
+        base: str, 
+        target: str, 
+        period: str, 
+        stats: Dict[date, Dict[str, Any]]
+    ) -> bool:
+        """Cache statistics for closed periods without expiry (dropped when their rates are rewritten)."""
+        if not stats or not await self.is_connected():
+            return False
+        
+        try:
+            await self.redis_client.mset({
+                self._period_stats_key(base, target, period, start): json.dumps(data, default=str)
+                for start, data in stats.items()
+            })
+            return True
+        except Exception as e:
+            logger.error(f"Cache set_period_stats error: {e}")
+            return False
+    
+    async def delete_period_stats(self, entries: List[Tuple[str, str, str, date]]) -> bool:
+        """Delete cached statistics for (base, target, period, period_start) entries, e.g. after rates were rewritten."""
+        if not entries or not await self.is_connected():
+            return False
+        
+        try:
+            keys = [self._period_stats_key(*entry) for entry in entries]
+            for i in range(0, len(keys), PERIOD_STATS_DELETE_CHUNK):
+                await self.redis_client.delete(*keys[i:i + PERIOD_STATS_DELETE_CHUNK])
+            return True
+        except Exception as e:
+            logger.error(f"Cache delete_period_stats error: {e}")
+            return False
+    
+    async def delete_latest_rates(self, bases: List[str]) -> bool:
+        """Delete cached latest-rate snapshots and rendered bodies for several base currencies."""
+        if not bases or not await self.is_connected():
+            return False
+        
+        try:
+            await self.redis_client.delete(
+                *[self._latest_rates_key(base) for base in bases],
+                *[self._rendered_rates_key(base) for base in bases]
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Cache delete_latest_rates error: {e}")
+            return False
+    
     async def delete_rate(self, base: str, target: str, date: date) -> bool:
         """Delete cached exchange rate."""
         if not await self.is_connected():
@@ -123,19 +476,66 @@ class CacheService:
         try:
             key = self._rate_key(base, target, date)
             await self.redis_client.delete(key)
+            await self.redis_client.hdel(self._compacted_rates_key(date), f"{base}:{target}")
             return True
         except Exception as e:
             logger.error(f"Cache delete_rate error: {e}")
             return False
     
+    async def compact_rates(self, pairs: List[tuple], expire_at: Callable[[date], int]) -> int:
+        """
+        Fold per-pair rate keys into their per-date hash.
+        
+        Args:
+            pairs: (base, target, date) of the per-pair keys to fold
+            expire_at: Unix time at which a date's hash should expire
+            
+        Returns:
+            Number of keys compacted
+        """
+        if not pairs or not await self.is_connected():
+            return 0
+        
+        try:
+            values = await self.redis_client.mget([self._rate_key(*pair) for pair in pairs])
+            compacted = 0
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                for (base, target, rate_date), value in zip(pairs, values):
+                    if value is None:
+                        continue
+                    hash_key = self._compacted_rates_key(rate_date)
+                    pipe.hset(hash_key, f"{base}:{target}", value)
+                    pipe.expireat(hash_key, expire_at(rate_date))
+                    pipe.unlink(self._rate_key(base, target, rate_date))
+                    compacted += 1
+                await pipe.execute()
+            return compacted
+        except Exception as e:
+            logger.error(f"Cache compact_rates error: {e}")
+            return 0
+    
     async def clear_cache(self) -> bool:
-        """Clear all cached data."""
+        """
+        Clear all cached data.
+        
+        Only keys under CACHE_KEY_PREFIXES are removed (SCAN + UNLINK); the
+        coordination state kept in the same DB is left alone.
+        """
         if not await self.is_connected():
             return False
         
         try:
-            await self.redis_client.flushdb()
-            logger.info("Cache cleared successfully")
+            # Walk the whole keyspace before unlinking so the scan cursor stays valid
+            keys = []
+            cursor = 0
+            while True:
+                cursor, batch = await self.redis_client.scan(cursor=cursor, count=CLEAR_SCAN_COUNT)
+                keys.extend(key for key in batch if key.startswith(CACHE_KEY_PREFIXES))
+                if cursor == 0:
+                    break
+            for i in range(0, len(keys), PERIOD_STATS_DELETE_CHUNK):
+                await self.redis_client.unlink(*keys[i:i + PERIOD_STATS_DELETE_CHUNK])
+            logger.info(f"Cache cleared successfully ({len(keys)} keys)")
             return True
         except Exception as e:
             logger.error(f"Cache clear error: {e}")
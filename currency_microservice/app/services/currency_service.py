@@ -0,0 +1,133 @@
+"""
+Data-driven supported currency set, discovered from providers.
+"""
+import asyncio
+import time
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.currencies import ISO_4217_CODES, currency_registry
+from app.database.connection import async_session_factory
+from app.models.currency import CurrencyDB
+from app.services.cache_service import cache_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CurrencyService:
+    """
+    Keeps the currency registry in step with the currencies table.
+
+    The configured supported_currencies are always registered first, so
+    their ids are stable; codes discovered from provider responses follow
+    in alphabetical order. Discovery stores new ISO 4217 codes and bumps a
+    version in Redis, and every worker reloads the table when it sees a
+    newer version.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _canonical(stored: Iterable[str]) -> List[str]:
+        """Configured codes first, then stored codes alphabetically."""
+        configured = [code.upper() for code in settings.supported_currencies]
+        return configured + sorted(set(stored) - set(configured))
+
+    async def load(self, db: AsyncSession) -> int:
+        """
+        Load the stored currencies into the registry.
+
+        Returns:
+            Number of registered currencies
+        """
+        result = await db.execute(select(CurrencyDB.code))
+        currency_registry.load(self._canonical(result.scalars().all()))
+        return len(currency_registry)
+
+    async def discover(self, db: AsyncSession, codes: Iterable[str]) -> List[str]:
+        """
+        Register provider-quoted ISO 4217 codes that are not supported yet.
+
+        Args:
+            db: Database session (committed when new codes are stored)
+            codes: Currency codes seen in a provider response, with rates
+                that passed validation (codes whose rates cannot be stored
+                must not be registered)
+
+        Returns:
+            The newly registered codes
+        """
+        if not settings.currency_discovery_enabled:
+            return []
+
+        new_codes = sorted({
+            code.upper() for code in codes
+            if code not in currency_registry and code.upper() in ISO_4217_CODES
+        })
+        if not new_codes:
+            return []
+
+        insert = sqlite_insert if settings.embedded else pg_insert
+        stmt = insert(CurrencyDB).values([{"code": code} for code in new_codes])
+        await db.execute(stmt.on_conflict_do_nothing(index_elements=["code"]))
+        await db.commit()
+
+        await self.load(db)
+        self.version = time.time_ns() // 1_000_000
+        await cache_service.set_currencies_version(self.version)
+        logger.info(f"Discovered {len(new_codes)} currencies: {', '.join(new_codes)}")
+        return new_codes
+
+    async def start(self):
+        """Load the stored currencies and start following changes from other workers."""
+        if self._task and not self._task.done():
+            logger.warning("Currency sync is already running")
+            return
+
+        async with async_session_factory() as db:
+            count = await self.load(db)
+        self.version = await cache_service.get_currencies_version()
+        logger.info(f"Loaded {count} supported currencies")
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        """Stop the sync loop."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sync_loop(self):
+        """Check the currency set version forever at the configured interval."""
+        while True:
+            await asyncio.sleep(settings.currency_sync_interval_seconds)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Currency sync failed: {e}")
+
+    async def sync(self):
+        """Reload the registry if another worker discovered currencies."""
+        live_version = await cache_service.get_currencies_version()
+        if live_version is None or live_version == self.version:
+            return
+
+        async with async_session_factory() as db:
+            count = await self.load(db)
+        self.version = live_version
+        logger.info(f"Reloaded {count} supported currencies (v{live_version})")
+
+
+# Global currency service instance
+currency_service = CurrencyService()
@@ -2,26 +2,70 @@
 Exchange rate service for database operations and business logic.
 """
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
+from sqlalchemy import select, and_, desc, func, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import date, datetime, timedelta
 from decimal import Decimal
+import statistics
 
-from app.models.exchange_rate import ExchangeRateDB, ExchangeRateCreate, ExchangeRateResponse, CurrencyConversion
+from app.models.exchange_rate import (
+    ExchangeRateDB,
+    ExchangeRateCreate,
+    ExchangeRateResponse,
+    CurrencyConversion,
+    RatePeriodStats,
+    RateStatsResponse,
+    HistoricalConversionItem,
+    HistoricalConversionResult,
+    HistoricalConversionResponse,
+)
+from app.models.rate_record import RateRecord, render_rates
 from app.services.cache_service import cache_service
-from app.services.external_api_service import ExternalAPIService
+from app.services.currency_service import currency_service
+from app.services.external_api_service import ExternalAPIService, external_api_service
+from app.services.job_run_service import record_job_metrics
+from app.services.local_cache_service import local_cache_service
+from app.services.rate_stream_service import rate_stream_service
+from app.services.snapshot_service import snapshot_service
 from app.core.config import settings
+from app.core.currencies import currency_registry
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+STATS_PERIODS = ("month", "quarter", "year")
+
+# Bind parameters one statement may carry (asyncpg's limit)
+MAX_BIND_PARAMS = 32767
+
+
+def period_start(period: str, day: date) -> date:
+    """Get the first day of the month, quarter or year containing a date."""
+    if period == "month":
+        return day.replace(day=1)
+    if period == "quarter":
+        return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+    if period == "year":
+        return date(day.year, 1, 1)
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def next_period_start(period: str, start: date) -> date:
+    """Get the first day of the period following the one starting at `start`."""
+    months = {"month": 1, "quarter": 3, "year": 12}[period]
+    month_index = start.year * 12 + start.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
 class ExchangeRateService:
     """Service for managing exchange rates."""
     
-    def __init__(self):
-        self.external_api = ExternalAPIService()
+    def __init__(self, external_api: ExternalAPIService = None):
+        self.external_api = external_api or external_api_service
     
     async def get_rate(
         self, 
@@ -29,7 +73,7 @@ class ExchangeRateService:
         base: str, 
         target: str, 
         rate_date: date = None
-    ) -> Optional[ExchangeRateResponse]:
+    ) -> Optional[RateRecord]:
         """
         Get exchange rate for specific currency pair and date.
         
@@ -45,19 +89,25 @@ class ExchangeRateService:
         if rate_date is None:
             rate_date = date.today()
         
+        # Serve from the mapped snapshot while it is current
+        snapshot_rate = snapshot_service.get_rate(base, target, rate_date)
+        if snapshot_rate is not None:
+            return RateRecord(base, target, snapshot_rate, rate_date)
+        
+        # Then this worker's own cache
+        local_rate = local_cache_service.get_rate(base, target, rate_date)
+        if local_rate is not None:
+            return RateRecord(base, target, local_rate, rate_date)
+        generation = local_cache_service.generation
+        
         # Check cache first
         cached_rate = await cache_service.get_rate(base, target, rate_date)
         if cached_rate:
             logger.debug(f"Rate cache hit: {base}/{target} on {rate_date}")
+            local_cache_service.set_rate(base, target, rate_date, cached_rate, generation)
             # Create response from cached data
-            return ExchangeRateResponse(
-                id=0,  # Cache doesn't store ID
-                base_currency=base,
-                target_currency=target,
-                rate=cached_rate,
-                date=rate_date,
-                created_at=datetime.now()
-            )
+            # Cache doesn't store ID
+            return RateRecord(base, target, cached_rate, rate_date)
         
         # Query database
         result = await db.execute(
@@ -74,15 +124,61 @@ class ExchangeRateService:
         if rate_record:
             # Cache the rate
             await cache_service.set_rate(base, target, rate_date, rate_record.rate)
-            return ExchangeRateResponse.from_orm(rate_record)
+            local_cache_service.set_rate(base, target, rate_date, rate_record.rate, generation)
+            return RateRecord.from_db(rate_record)
         
         return None
     
+    async def get_rates_for_date(
+        self,
+        db: AsyncSession,
+        base: str,
+        rate_date: date
+    ) -> Dict[str, RateRecord]:
+        """
+        Get every supported rate of a base currency on a date in one read.
+        
+        Args:
+            db: Database session
+            base: Base currency code
+            rate_date: Date of the rates
+            
+        Returns:
+            Dictionary mapping target currency to exchange rate, in registry order
+        """
+        snapshot_rates = snapshot_service.get_rates(base, rate_date)
+        if snapshot_rates:
+            records = [RateRecord(base, target, rate, rate_date) for target, rate in snapshot_rates.items()]
+        else:
+            result = await db.execute(
+                select(ExchangeRateDB).where(
+                    and_(
+                        ExchangeRateDB.base_currency == base,
+                        ExchangeRateDB.date == rate_date
+                    )
+                )
+            )
+            records = [RateRecord.from_db(row) for row in result.scalars().all()]
+        
+        records.sort(key=lambda record: currency_registry.sort_key(record.target_currency))
+        return {
+            record.target_currency: record
+            for record in records
+            if record.target_currency in currency_registry and record.target_currency != base
+        }
+    
+    async def get_latest_rate_date(self, db: AsyncSession, base: str) -> Optional[date]:
+        """Get the most recent date with stored rates for a base currency."""
+        result = await db.execute(
+            select(func.max(ExchangeRateDB.date)).where(ExchangeRateDB.base_currency == base)
+        )
+        return result.scalar_one_or_none()
+    
     async def get_latest_rates(
         self, 
         db: AsyncSession, 
         base: str
-    ) -> Dict[str, ExchangeRateResponse]:
+    ) -> Dict[str, RateRecord]:
         """
         Get latest rates for all supported currencies from base currency.
         
@@ -93,14 +189,30 @@ class ExchangeRateService:
         Returns:
             Dictionary mapping target currency to exchange rate
         """
+        # Serve from the mapped snapshot while it is current
+        snapshot_rates = snapshot_service.get_latest_rates(base)
+        if snapshot_rates:
+            snapshot_date, rates = snapshot_rates
+            return {
+                target: RateRecord(base, target, rate, snapshot_date)
+                for target, rate in rates.items()
+            }
+        
+        local_rates = local_cache_service.get_latest_rates(base)
+        if local_rates is not None:
+            return local_rates
+        generation = local_cache_service.generation
+        
         # Check cache first
         cached_rates = await cache_service.get_latest_rates(base)
         if cached_rates:
             logger.debug(f"Latest rates cache hit for {base}")
-            return {
-                currency: ExchangeRateResponse(**rate_data)
+            records = {
+                currency_registry.intern(currency): RateRecord.from_cached(rate_data)
                 for currency, rate_data in cached_rates.items()
             }
+            local_cache_service.set_latest_rates(base, records, generation)
+            return records
         
         # Query database for latest rates
         today = date.today()
@@ -132,16 +244,29 @@ class ExchangeRateService:
         cache_data = {}
         
         for rate in rates:
-            rate_response = ExchangeRateResponse.from_orm(rate)
-            response_dict[rate.target_currency] = rate_response
-            cache_data[rate.target_currency] = rate_response.dict()
+            record = RateRecord.from_db(rate)
+            response_dict[rate.target_currency] = record
+            cache_data[rate.target_currency] = record.to_dict()
         
         # Cache the results
         if cache_data:
             await cache_service.set_latest_rates(base, cache_data)
+            local_cache_service.set_latest_rates(base, response_dict, generation)
         
         return response_dict
     
+    async def get_rendered_latest_rates(self, base: str) -> Optional[str]:
+        """Get the latest-rates response body pre-rendered at ingest, if cached."""
+        body = local_cache_service.get_rendered_rates(base)
+        if body is not None:
+            return body
+        generation = local_cache_service.generation
+        
+        body = await cache_service.get_rendered_rates(base)
+        if body:
+            local_cache_service.set_rendered_rates(base, body, generation)
+        return body
+    
     async def create_rate(
         self, 
         db: AsyncSession, 
@@ -157,7 +282,7 @@ class ExchangeRateService:
         Returns:
             Created exchange rate
         """
-        db_rate = ExchangeRateDB(**rate_data.dict())
+        db_rate = ExchangeRateDB(**rate_data.model_dump())
         
         try:
             db.add(db_rate)
@@ -172,8 +297,11 @@ class ExchangeRateService:
                 rate_data.rate
             )
             
+            await self.invalidate_period_stats([rate_data.model_dump()])
+            await self._announce_rate_change(rate_data.base_currency, rate_data.date)
+            
             logger.info(f"Created rate: {rate_data.base_currency}/{rate_data.target_currency} = {rate_data.rate} on {rate_data.date}")
-            return ExchangeRateResponse.from_orm(db_rate)
+            return ExchangeRateResponse.model_validate(db_rate)
             
         except IntegrityError:
             # Rate already exists for this date, update it
@@ -204,63 +332,554 @@ class ExchangeRateService:
                 rate_data.rate
             )
             
+            await self.invalidate_period_stats([rate_data.model_dump()])
+            await self._announce_rate_change(rate_data.base_currency, rate_data.date)
+            
             logger.info(f"Updated rate: {rate_data.base_currency}/{rate_data.target_currency} = {rate_data.rate} on {rate_data.date}")
-            return ExchangeRateResponse.from_orm(existing_rate)
+            return ExchangeRateResponse.model_validate(existing_rate)
+    
+    async def invalidate_period_stats(self, rows: List[dict]):
+        """
+        Drop cached statistics of the closed periods written rates fall in, for both pair directions.
+        
+        Args:
+            rows: Written rates as dicts with base_currency, target_currency and date
+        """
+        open_from = period_start("month", date.today())
+        entries = set()
+        for row in rows:
+            if row["date"] >= open_from:
+                continue  # Open periods are never cached
+            for period in STATS_PERIODS:
+                start = period_start(period, row["date"])
+                entries.add((row["base_currency"], row["target_currency"], period, start))
+                entries.add((row["target_currency"], row["base_currency"], period, start))
+        await cache_service.delete_period_stats(sorted(entries))
+    
+    async def _announce_rate_change(self, base: str, rate_date: date):
+        """Drop the base's latest-rates snapshot and evict the change from every worker's cache."""
+        await cache_service.delete_latest_rates([base])
+        await local_cache_service.publish([base], [rate_date])
+    
+    async def bulk_upsert_rates(self, db: AsyncSession, rows: List[dict]) -> int:
+        """
+        Insert or update many rates with multi-row statements (caller commits).
+        
+        Rows are sent in chunks that stay under the driver's bind parameter
+        limit, all inside the caller's transaction.
+        
+        Args:
+            db: Database session
+            rows: Dicts with base_currency, target_currency, rate and date
+            
+        Returns:
+            Number of rows written
+        """
+        if not rows:
+            return 0
+        
+        if settings.embedded:
+            # SQLite names the conflict target by its columns, not the constraint
+            insert = sqlite_insert
+            conflict_target = {"index_elements": ["base_currency", "target_currency", "date"]}
+        else:
+            insert = pg_insert
+            conflict_target = {"constraint": "unique_rate_per_day"}
+        
+        chunk_rows = MAX_BIND_PARAMS // len(rows[0])
+        for i in range(0, len(rows), chunk_rows):
+            stmt = insert(ExchangeRateDB).values(rows[i:i + chunk_rows])
+            stmt = stmt.on_conflict_do_update(
+                **conflict_target,
+                set_={"rate": stmt.excluded.rate, "created_at": func.now()}
+            )
+            await db.execute(stmt)
+        return len(rows)
     
     async def fetch_and_store_daily_rates(self, db: AsyncSession, base: str = None) -> bool:
         """
         Fetch latest rates from external API and store in database.
         
+        A single upstream fetch against `base` (the anchor) is rebased into
+        rates for every currency in settings.materialized_bases, and the
+        whole matrix is stored with chunked bulk upserts in one transaction.
+        
         Args:
             db: Database session
-            base: Base currency (defaults to configured base currency)
+            base: Anchor currency to fetch (defaults to configured base currency)
             
         Returns:
             True if successful, False otherwise
         """
-        base_currency = base or settings.base_currency
+        anchor = base or settings.base_currency
         today = date.today()
+        bases = ingest_bases(anchor)
         
-        logger.info(f"Starting daily rate fetch for {base_currency} on {today}")
+        logger.info(f"Starting daily rate fetch for {anchor} on {today} ({len(bases)} bases)")
         
-        # Fetch rates from external API
-        rates = await self.external_api.fetch_exchange_rates(base_currency)
+        # Fetch rates from external API once, against the anchor
+        rates = await self.external_api.fetch_exchange_rates(anchor)
         if not rates:
             logger.error("Failed to fetch rates from external APIs")
             return False
         
-        success_count = 0
+        # Register currencies the provider quotes that are not supported yet,
+        # unless their rates could not be validated and stored
+        quotable = [
+            target for target, rate in rates.items()
+            if await self.external_api.validate_rate(anchor, target, rate)
+        ]
+        try:
+            await currency_service.discover(db, quotable)
+        except Exception as e:
+            logger.error(f"Currency discovery failed: {e}")
+            await db.rollback()
+        
+        matrix = rebase_rates(rates, anchor, bases)
+        
+        rows = []
         error_count = 0
+        for base_currency, targets in matrix.items():
+            for target_currency, rate in targets.items():
+                if not await self.external_api.validate_rate(base_currency, target_currency, rate):
+                    logger.warning(f"Invalid rate skipped: {base_currency}/{target_currency} = {rate}")
+                    error_count += 1
+                    continue
+                rows.append({
+                    "base_currency": base_currency,
+                    "target_currency": target_currency,
+                    "rate": rate,
+                    "date": today,
+                })
         
-        # Store each rate in database
-        for target_currency, rate in rates.items():
-            if target_currency == base_currency:
-                continue  # Skip self-conversion
-            
-            # Validate rate
-            if not await self.external_api.validate_rate(base_currency, target_currency, rate):
-                logger.warning(f"Invalid rate skipped: {base_currency}/{target_currency} = {rate}")
-                error_count += 1
-                continue
-            
+        try:
+            success_count = await self.bulk_upsert_rates(db, rows)
+            await db.commit()
+            record_job_metrics(rows_written=success_count)
+        except Exception as e:
+            logger.error(f"Failed to store daily rates: {e}")
+            await db.rollback()
+            return False
+        await self.invalidate_period_stats(rows)
+        
+        # Warm every cache tier for the new snapshot; fall back to dropping stale snapshots
+        cross_rates = rebase_rates(rates, anchor, [anchor] + list(rates))
+        if not await self.warm_cache(db, today, list(matrix), cross_rates):
+            await cache_service.delete_latest_rates(list(matrix))
+        
+        # Write the on-disk snapshot new workers map at startup
+        snapshot_version = None
+        if settings.snapshot_enabled:
             try:
-                rate_data = ExchangeRateCreate(
-                    base_currency=base_currency,
-                    target_currency=target_currency,
-                    rate=rate,
-                    date=today
-                )
-                
-                await self.create_rate(db, rate_data)
-                success_count += 1
-                
+                snapshot_version = await snapshot_service.publish(db, today, list(matrix))
             except Exception as e:
-                logger.error(f"Failed to store rate {base_currency}/{target_currency}: {e}")
-                error_count += 1
+                logger.error(f"Failed to publish rate snapshot: {e}")
         
-        logger.info(f"Daily rate fetch completed: {success_count} success, {error_count} errors")
+        # Evict the old rates from every worker's local cache
+        await local_cache_service.publish(list(matrix), [today], snapshot_version)
+        
+        # Tell streaming clients on every worker to pull the new rates
+        try:
+            await rate_stream_service.publish(today, list(matrix), snapshot_version)
+        except Exception as e:
+            logger.error(f"Failed to announce rate snapshot: {e}")
+        
+        logger.info(
+            f"Daily rate fetch completed: {success_count} rates for {len(matrix)} bases, {error_count} errors"
+        )
         return success_count > 0
     
+    async def warm_cache(
+        self,
+        db: AsyncSession,
+        rate_date: date,
+        bases: List[str],
+        cross_rates: Dict[str, Dict[str, Decimal]] = None
+    ) -> bool:
+        """
+        Populate every cache tier for a stored snapshot and swap it in atomically.
+        
+        Loads the stored rows for all bases in one query, builds per-pair
+        entries, per-base latest snapshots and rendered response bodies, and
+        writes them together with the cross-rate matrix in a single Redis
+        transaction, so the first request after ingest is a cache hit.
+        
+        Args:
+            db: Database session
+            rate_date: Snapshot date
+            bases: Base currencies stored for the date
+            cross_rates: Derived rates between any two currencies of the snapshot
+            
+        Returns:
+            True if the new snapshot was swapped in
+        """
+        result = await db.execute(
+            select(ExchangeRateDB).where(
+                and_(
+                    ExchangeRateDB.date == rate_date,
+                    ExchangeRateDB.base_currency.in_(bases)
+                )
+            )
+        )
+        
+        responses: Dict[str, Dict[str, RateRecord]] = {}
+        for record in result.scalars().all():
+            responses.setdefault(record.base_currency, {})[record.target_currency] = RateRecord.from_db(record)
+        if not responses:
+            logger.warning(f"No stored rates to warm for {rate_date}")
+            return False
+        
+        pairs = [
+            (base, target, rate_date, response.rate)
+            for base, targets in responses.items()
+            for target, response in targets.items()
+        ]
+        snapshots = {
+            base: {target: response.to_dict() for target, response in targets.items()}
+            for base, targets in responses.items()
+        }
+        bodies = {
+            base: render_rates(targets)
+            for base, targets in responses.items()
+        }
+        
+        swapped = await cache_service.swap_in_snapshot(rate_date, pairs, snapshots, bodies, cross_rates or {})
+        if swapped:
+            record_job_metrics(cache_keys_warmed=len(pairs) + len(snapshots) + len(bodies) + (1 if cross_rates else 0))
+            logger.info(f"Cache warmed for {rate_date}: {len(pairs)} pairs, {len(snapshots)} bases")
+        return swapped
+    
+    async def _query_period_stats(
+        self,
+        db: AsyncSession,
+        base: str,
+        target: str,
+        period: str,
+        start: date,
+        end: date,
+        inverse: bool = False
+    ) -> List[RatePeriodStats]:
+        """
+        Aggregate rates per period in a single SQL pass.
+        
+        Daily log returns are computed with a LAG window partitioned by period
+        (so each period's volatility only uses its own days) and then reduced
+        per period together with mean/min/max/stddev of the rate.
+        With `inverse`, the stored target/base series is inverted.
+        """
+        if settings.embedded:
+            return await self._compute_period_stats(db, base, target, period, start, end, inverse)
+        
+        stored_base, stored_target = (target, base) if inverse else (base, target)
+        rate_expr = literal(Decimal("1")) / ExchangeRateDB.rate if inverse else ExchangeRateDB.rate
+        
+        daily = (
+            select(
+                ExchangeRateDB.date.label("rate_date"),
+                rate_expr.label("rate"),
+                func.lag(rate_expr).over(
+                    partition_by=func.date_trunc(period, ExchangeRateDB.date),
+                    order_by=ExchangeRateDB.date
+                ).label("prev_rate"),
+            )
+            .where(
+                and_(
+                    ExchangeRateDB.base_currency == stored_base,
+                    ExchangeRateDB.target_currency == stored_target,
+                    ExchangeRateDB.date >= start,
+                    ExchangeRateDB.date <= end
+                )
+            )
+            .subquery()
+        )
+        
+        bucket = func.date_trunc(period, daily.c.rate_date)
+        result = await db.execute(
+            select(
+                bucket.label("period_start"),
+                func.min(daily.c.rate_date).label("first_rate_date"),
+                func.max(daily.c.rate_date).label("last_rate_date"),
+                func.count().label("observations"),
+                func.avg(daily.c.rate).label("average"),
+                func.min(daily.c.rate).label("min"),
+                func.max(daily.c.rate).label("max"),
+                func.stddev_samp(daily.c.rate).label("stddev"),
+                func.stddev_samp(func.ln(daily.c.rate / daily.c.prev_rate)).label("volatility"),
+            )
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        
+        stats = []
+        for row in result.all():
+            start_of_period = row.period_start.date() if isinstance(row.period_start, datetime) else row.period_start
+            stats.append(RatePeriodStats(
+                period_start=start_of_period,
+                period_end=next_period_start(period, start_of_period) - timedelta(days=1),
+                first_rate_date=row.first_rate_date,
+                last_rate_date=row.last_rate_date,
+                observations=row.observations,
+                average=_quantize(row.average),
+                min=_quantize(row.min),
+                max=_quantize(row.max),
+                stddev=_quantize(row.stddev),
+                volatility=_quantize(row.volatility, places=8),
+            ))
+        return stats
+    
+    async def _compute_period_stats(
+        self,
+        db: AsyncSession,
+        base: str,
+        target: str,
+        period: str,
+        start: date,
+        end: date,
+        inverse: bool = False
+    ) -> List[RatePeriodStats]:
+        """
+        Aggregate rates per period in Python for the embedded SQLite backend.
+        
+        SQLite has no date_trunc, stddev_samp or ln, so the daily series is
+        loaded and reduced here with the same semantics as the SQL pass.
+        """
+        stored_base, stored_target = (target, base) if inverse else (base, target)
+        result = await db.execute(
+            select(ExchangeRateDB.date, ExchangeRateDB.rate)
+            .where(
+                and_(
+                    ExchangeRateDB.base_currency == stored_base,
+                    ExchangeRateDB.target_currency == stored_target,
+                    ExchangeRateDB.date >= start,
+                    ExchangeRateDB.date <= end
+                )
+            )
+            .order_by(ExchangeRateDB.date)
+        )
+        
+        buckets: Dict[date, List[Tuple[date, Decimal]]] = {}
+        for rate_date, rate in result.all():
+            value = Decimal("1") / Decimal(rate) if inverse else Decimal(rate)
+            buckets.setdefault(period_start(period, rate_date), []).append((rate_date, value))
+        
+        stats = []
+        for start_of_period, days in buckets.items():
+            rates = [rate for _, rate in days]
+            returns = [(current / previous).ln() for previous, current in zip(rates, rates[1:])]
+            stats.append(RatePeriodStats(
+                period_start=start_of_period,
+                period_end=next_period_start(period, start_of_period) - timedelta(days=1),
+                first_rate_date=days[0][0],
+                last_rate_date=days[-1][0],
+                observations=len(days),
+                average=_quantize(sum(rates) / len(rates)),
+                min=_quantize(min(rates)),
+                max=_quantize(max(rates)),
+                stddev=_quantize(statistics.stdev(rates)) if len(rates) > 1 else None,
+                volatility=_quantize(statistics.stdev(returns), places=8) if len(returns) > 1 else None,
+            ))
+        return stats
+    
+    async def get_rate_statistics(
+        self,
+        db: AsyncSession,
+        base: str,
+        target: str,
+        period: str,
+        start: date,
+        end: date
+    ) -> Optional[RateStatsResponse]:
+        """
+        Get average, min, max and volatility per period for a currency pair.
+        
+        Periods that are closed (ended before today) and fully inside the
+        requested range are cached without expiry until their rates are
+        rewritten (see invalidate_period_stats), and only the remaining
+        tail of the range is aggregated in the database.
+        
+        Args:
+            db: Database session
+            base: Base currency code
+            target: Target currency code
+            period: One of "month", "quarter" or "year"
+            start: Range start (inclusive)
+            end: Range end (inclusive)
+            
+        Returns:
+            Statistics per period, or None if no rates exist in the range
+        """
+        if period not in STATS_PERIODS:
+            raise ValueError(f"Unsupported period: {period}")
+        
+        today = date.today()
+        cacheable = []
+        current = period_start(period, start)
+        while current <= end:
+            following = next_period_start(period, current)
+            if current >= start and following - timedelta(days=1) <= end and following <= today:
+                cacheable.append(current)
+            current = following
+        
+        cached = await cache_service.get_period_stats(base, target, period, cacheable)
+        cached_stats = [RatePeriodStats(**data) for data in cached.values()]
+        
+        # Only aggregate from the first period that is not cached yet
+        query_start = start
+        while query_start in cached:
+            query_start = next_period_start(period, query_start)
+        
+        computed = []
+        if query_start <= end:
+            computed = await self._query_period_stats(db, base, target, period, query_start, end)
+            # Pairs stored only in the other direction, also for the tail behind cached periods
+            if not computed:
+                computed = await self._query_period_stats(db, base, target, period, query_start, end, inverse=True)
+        
+        computed_starts = {stats.period_start for stats in computed}
+        periods = sorted(
+            [stats for stats in cached_stats if stats.period_start not in computed_starts] + computed,
+            key=lambda stats: stats.period_start
+        )
+        if not periods:
+            return None
+        
+        to_cache = {
+            stats.period_start: stats.model_dump()
+            for stats in computed
+            if stats.period_start in cacheable and stats.period_start not in cached
+        }
+        await cache_service.set_period_stats(base, target, period, to_cache)
+        
+        return RateStatsResponse(
+            base_currency=base,
+            target_currency=target,
+            period=period,
+            start=start,
+            end=end,
+            periods=periods
+        )
+    
+    async def _load_rate_range(
+        self,
+        db: AsyncSession,
+        currencies: set,
+        start: date,
+        end: date
+    ) -> Dict[date, Dict[Tuple[str, str], Decimal]]:
+        """Load every stored rate between the given currencies in a date range with one query."""
+        result = await db.execute(
+            select(
+                ExchangeRateDB.date,
+                ExchangeRateDB.base_currency,
+                ExchangeRateDB.target_currency,
+                ExchangeRateDB.rate
+            ).where(
+                and_(
+                    ExchangeRateDB.base_currency.in_(currencies),
+                    ExchangeRateDB.target_currency.in_(currencies),
+                    ExchangeRateDB.date >= start,
+                    ExchangeRateDB.date <= end
+                )
+            )
+        )
+        
+        rates_by_date: Dict[date, Dict[Tuple[str, str], Decimal]] = {}
+        for rate_date, base, target, rate in result.all():
+            rates_by_date.setdefault(rate_date, {})[(base, target)] = rate
+        return rates_by_date
+    
+    @staticmethod
+    def _resolve_rate(
+        rates: Dict[Tuple[str, str], Decimal],
+        from_currency: str,
+        to_currency: str
+    ) -> Optional[Decimal]:
+        """Resolve a rate from one day's rates: direct, inverse, or crossed via a shared base."""
+        direct = rates.get((from_currency, to_currency))
+        if direct:
+            return direct
+        
+        reverse = rates.get((to_currency, from_currency))
+        if reverse:
+            return Decimal("1") / reverse
+        
+        anchors = [settings.base_currency] + sorted({base for base, _ in rates} - {settings.base_currency})
+        for anchor in anchors:
+            anchor_from = rates.get((anchor, from_currency))
+            anchor_to = rates.get((anchor, to_currency))
+            if anchor_from and anchor_to:
+                return anchor_to / anchor_from
+        
+        return None
+    
+    async def convert_historical(
+        self,
+        db: AsyncSession,
+        items: List[HistoricalConversionItem],
+        to_currency: str
+    ) -> HistoricalConversionResponse:
+        """
+        Convert many dated amounts to one currency.
+        
+        All rates needed by the batch are loaded with a single range query.
+        Each distinct (currency, date) pair is then resolved once, falling
+        back to the most recent earlier rate within the lookback window
+        (weekends and holidays have no rates), and applied to every item.
+        
+        Args:
+            db: Database session
+            items: Dated amounts to convert
+            to_currency: Target currency
+            
+        Returns:
+            Per-item results in request order, including failures
+        """
+        lookback = timedelta(days=settings.historical_rate_lookback_days)
+        currencies = {item.currency for item in items} | {to_currency, settings.base_currency}
+        needed = {(item.currency, item.date) for item in items if item.currency != to_currency}
+        
+        rates_by_date = {}
+        if needed:
+            dates = [rate_date for _, rate_date in needed]
+            rates_by_date = await self._load_rate_range(db, currencies, min(dates) - lookback, max(dates))
+        
+        resolved: Dict[Tuple[str, date], Tuple[Decimal, date]] = {}
+        for currency, requested_date in needed:
+            candidate = requested_date
+            while candidate >= requested_date - lookback:
+                day_rates = rates_by_date.get(candidate)
+                rate = self._resolve_rate(day_rates, currency, to_currency) if day_rates else None
+                if rate:
+                    resolved[(currency, requested_date)] = (rate, candidate)
+                    break
+                candidate -= timedelta(days=1)
+        
+        results = []
+        for index, item in enumerate(items):
+            if item.currency == to_currency:
+                rate, rate_date = Decimal("1.0"), item.date
+            else:
+                rate, rate_date = resolved.get((item.currency, item.date), (None, None))
+            
+            results.append(HistoricalConversionResult(
+                index=index,
+                original_amount=item.amount,
+                original_currency=item.currency,
+                date=item.date,
+                converted_amount=item.amount * rate if rate else None,
+                exchange_rate=rate,
+                rate_date=rate_date,
+                error=None if rate else f"No rate available for {item.currency} to {to_currency} on or before {item.date}"
+            ))
+        
+        converted = sum(1 for result in results if result.error is None)
+        return HistoricalConversionResponse(
+            target_currency=to_currency,
+            converted=converted,
+            failed=len(results) - converted,
+            results=results
+        )
+    
     async def convert_currency(
         self,
         db: AsyncSession,
@@ -300,8 +919,12 @@ class ExchangeRateService:
                 exchange_rate = Decimal("1") / reverse_rate.rate
                 actual_rate_date = reverse_rate.date
             else:
-                logger.warning(f"No rate available for {from_currency} to {to_currency}")
-                return None
+                # Fall back to the cross-rate matrix warmed at ingest
+                actual_rate_date = rate_date or date.today()
+                exchange_rate = await cache_service.get_cross_rate(from_currency, to_currency, actual_rate_date)
+                if not exchange_rate:
+                    logger.warning(f"No rate available for {from_currency} to {to_currency}")
+                    return None
         else:
             exchange_rate = rate_record.rate
             actual_rate_date = rate_record.date
@@ -318,5 +941,46 @@ class ExchangeRateService:
         )
 
 
+def ingest_bases(anchor: str) -> List[str]:
+    """The anchor followed by settings.materialized_bases, without duplicates."""
+    return list(dict.fromkeys([anchor] + [b.upper() for b in settings.materialized_bases]))
+
+
+def rebase_rates(
+    anchor_rates: Dict[str, Decimal],
+    anchor: str,
+    bases: List[str]
+) -> Dict[str, Dict[str, Decimal]]:
+    """
+    Derive rates for several bases from one anchor snapshot.
+    
+    rate[b][t] = anchor[t] / anchor[b]; bases missing from the snapshot are
+    skipped. Self-pairs are omitted.
+    """
+    rates = dict(anchor_rates)
+    rates[anchor] = Decimal("1")
+    
+    matrix = {}
+    for base in bases:
+        base_rate = rates.get(base)
+        if not base_rate:
+            logger.warning(f"Cannot materialize {base}: missing from {anchor} snapshot")
+            continue
+        inverse = Decimal("1") / base_rate
+        matrix[base] = {
+            target: _quantize(rate * inverse)
+            for target, rate in rates.items()
+            if target != base
+        }
+    return matrix
+
+
+def _quantize(value: Optional[Decimal], places: int = 6) -> Optional[Decimal]:
+    """Round an aggregate to a fixed number of decimal places."""
+    if value is None:
+        return None
+    return Decimal(value).quantize(Decimal(1).scaleb(-places))
+
+
 # Global service instance
 exchange_rate_service = ExchangeRateService()
\ No newline at end of file
@@ -3,45 +3,75 @@ External API service for fetching exchange rates from providers.
 """
 import httpx
 import asyncio
-from typing import Dict, List, Optional
+import time
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from statistics import median
 from datetime import date, datetime
 from decimal import Decimal
 from app.core.config import settings
+from app.core.currencies import ISO_4217_CODES, currency_registry
+from app.models.exchange_rate import MAX_STORABLE_RATE, RATE_QUANTUM
+from app.services.http_client_service import HTTPClientService, http_client_service
+from app.services.quota_service import quota_service
+from app.services.provider_health_service import ProviderHealthService, provider_health_service
+from app.services.replay_service import ERROR, TIMEOUT, FaultInjector, ReplayStore
+from app.services.job_run_service import record_job_metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _accepts(currency: str) -> bool:
+    """Whether a provider-quoted code is supported or can be discovered."""
+    return currency in currency_registry or (
+        settings.currency_discovery_enabled and currency in ISO_4217_CODES
+    )
+
+
 class ExternalAPIService:
     """Service for fetching exchange rates from external APIs."""
     
-    def __init__(self):
-        self.client_timeout = httpx.Timeout(30.0)
+    # Providers that can serve historical snapshots
+    HISTORICAL_PROVIDERS = {"exchangerate_api", "fixer_io", "replay"}
+    
+    def __init__(self, http_client: HTTPClientService = None, provider_health: ProviderHealthService = None):
+        self.http_client = http_client or http_client_service
+        self.provider_health = provider_health or provider_health_service
+        self.replay_store = ReplayStore()
+        self.replay_faults = FaultInjector()
     
-    async def _fetch_from_exchangerate_api(self, base: str) -> Optional[Dict[str, Decimal]]:
-        """Fetch rates from ExchangeRate-API."""
+    async def _fetch_from_exchangerate_api(self, base: str, rate_date: date = None) -> Optional[Dict[str, Decimal]]:
+        """Fetch rates from ExchangeRate-API (latest, or historical when a date is given)."""
         if not settings.exchange_api_key:
             logger.warning("ExchangeRate-API key not configured")
             return None
         
-        url = f"https://v6.exchangerate-api.com/v6/{settings.exchange_api_key}/latest/{base}"
+        if rate_date:
+            url = (
+                f"{settings.exchange_api_base_url}/{settings.exchange_api_key}/history/{base}/"
+                f"{rate_date.year}/{rate_date.month}/{rate_date.day}"
+            )
+        else:
+            url = f"{settings.exchange_api_base_url}/{settings.exchange_api_key}/latest/{base}"
         
         try:
-            async with httpx.AsyncClient(timeout=self.client_timeout) as client:
-                response = await client.get(url)
-                response.raise_for_status()
+            client = self.http_client.get_client("exchangerate_api")
+            await quota_service.record_call("exchangerate_api")
+            response = await client.get(url)
+            response.raise_for_status()
+            
+            data = response.json()
+            if data.get("result") == "success":
+                rates = {}
+                for currency, rate in data.get("conversion_rates", {}).items():
+                    if _accepts(currency):
+                        rates[currency_registry.intern(currency)] = Decimal(str(rate))
+                logger.info(f"Fetched {len(rates)} rates from ExchangeRate-API for {base}")
+                return rates
+            else:
+                logger.error(f"ExchangeRate-API error: {data.get('error-type', 'Unknown')}")
                 
-                data = response.json()
-                if data.get("result") == "success":
-                    rates = {}
-                    for currency, rate in data.get("conversion_rates", {}).items():
-                        if currency in settings.supported_currencies:
-                            rates[currency] = Decimal(str(rate))
-                    logger.info(f"Fetched {len(rates)} rates from ExchangeRate-API for {base}")
-                    return rates
-                else:
-                    logger.error(f"ExchangeRate-API error: {data.get('error-type', 'Unknown')}")
-                    
         except httpx.RequestError as e:
             logger.error(f"ExchangeRate-API request failed: {e}")
         except httpx.HTTPStatusError as e:
@@ -51,40 +81,42 @@ class ExternalAPIService:
         
         return None
     
-    async def _fetch_from_fixer_io(self, base: str) -> Optional[Dict[str, Decimal]]:
-        """Fetch rates from Fixer.io."""
+    async def _fetch_from_fixer_io(self, base: str, rate_date: date = None) -> Optional[Dict[str, Decimal]]:
+        """Fetch rates from Fixer.io (latest, or historical when a date is given)."""
         if not settings.fixer_api_key:
             logger.warning("Fixer.io API key not configured")
             return None
         
-        # Join supported currencies for the API call
-        symbols = ",".join([c for c in settings.supported_currencies if c != base])
-        url = f"http://data.fixer.io/api/latest"
+        endpoint = rate_date.isoformat() if rate_date else "latest"
+        url = f"{settings.fixer_api_base_url}/{endpoint}"
         params = {
             "access_key": settings.fixer_api_key,
             "base": base,
-            "symbols": symbols
         }
+        if not settings.currency_discovery_enabled:
+            # Join supported currencies for the API call
+            params["symbols"] = ",".join([c for c in currency_registry if c != base])
         
         try:
-            async with httpx.AsyncClient(timeout=self.client_timeout) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
+            client = self.http_client.get_client("fixer_io")
+            await quota_service.record_call("fixer_io")
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            
+            data = response.json()
+            if data.get("success"):
+                rates = {}
+                for currency, rate in data.get("rates", {}).items():
+                    if _accepts(currency):
+                        rates[currency_registry.intern(currency)] = Decimal(str(rate))
+                # Add base currency with rate 1.0
+                rates[base] = Decimal("1.0")
+                logger.info(f"Fetched {len(rates)} rates from Fixer.io for {base}")
+                return rates
+            else:
+                error_info = data.get("error", {})
+                logger.error(f"Fixer.io error: {error_info.get('info', 'Unknown')}")
                 
-                data = response.json()
-                if data.get("success"):
-                    rates = {}
-                    for currency, rate in data.get("rates", {}).items():
-                        if currency in settings.supported_currencies:
-                            rates[currency] = Decimal(str(rate))
-                    # Add base currency with rate 1.0
-                    rates[base] = Decimal("1.0")
-                    logger.info(f"Fetched {len(rates)} rates from Fixer.io for {base}")
-                    return rates
-                else:
-                    error_info = data.get("error", {})
-                    logger.error(f"Fixer.io error: {error_info.get('info', 'Unknown')}")
-                    
         except httpx.RequestError as e:
             logger.error(f"Fixer.io request failed: {e}")
         except httpx.HTTPStatusError as e:
@@ -94,56 +126,291 @@ class ExternalAPIService:
         
         return None
     
-    async def _fetch_from_free_api(self, base: str) -> Optional[Dict[str, Decimal]]:
-        """Fetch rates from a free API (backup option)."""
-        url = f"https://api.exchangerate-api.com/v4/latest/{base}"
+    async def _fetch_from_free_api(self, base: str, rate_date: date = None) -> Optional[Dict[str, Decimal]]:
+        """Fetch rates from a free API (backup option, latest rates only)."""
+        if rate_date:
+            logger.debug("Free API does not serve historical rates")
+            return None
+        
+        url = f"{settings.free_api_base_url}/latest/{base}"
         
         try:
-            async with httpx.AsyncClient(timeout=self.client_timeout) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                
-                data = response.json()
-                rates = {}
-                for currency, rate in data.get("rates", {}).items():
-                    if currency in settings.supported_currencies:
-                        rates[currency] = Decimal(str(rate))
-                
-                logger.info(f"Fetched {len(rates)} rates from free API for {base}")
-                return rates
-                
+            client = self.http_client.get_client("free_api")
+            await quota_service.record_call("free_api")
+            response = await client.get(url)
+            response.raise_for_status()
+            
+            data = response.json()
+            rates = {}
+            for currency, rate in data.get("rates", {}).items():
+                if _accepts(currency):
+                    rates[currency_registry.intern(currency)] = Decimal(str(rate))
+            
+            logger.info(f"Fetched {len(rates)} rates from free API for {base}")
+            return rates
+            
         except Exception as e:
             logger.error(f"Free API error: {e}")
         
         return None
     
-    async def fetch_exchange_rates(self, base: str = None) -> Optional[Dict[str, Decimal]]:
+    async def _fetch_from_replay(self, base: str, rate_date: date = None) -> Optional[Dict[str, Decimal]]:
+        """Serve recorded rates from disk with injected latency and faults (offline testing)."""
+        await quota_service.record_call("replay")
+        
+        outcome = await self.replay_faults.apply()
+        if outcome == ERROR:
+            logger.error(f"Replay provider injected error for {base}")
+            return None
+        if outcome == TIMEOUT:
+            await asyncio.sleep(settings.http_read_timeout_seconds)
+            logger.error(f"Replay provider injected timeout for {base}")
+            return None
+        
+        recorded = self.replay_store.load(base, rate_date)
+        if recorded is None:
+            logger.warning(f"No replay recording for {base} in {self.replay_store.data_dir}")
+            return None
+        
+        rates = {
+            currency_registry.intern(currency): rate for currency, rate in recorded.items()
+            if _accepts(currency)
+        }
+        logger.info(f"Fetched {len(rates)} rates from replay provider for {base}")
+        return rates
+    
+    def _provider_methods(self) -> Dict[str, Callable[..., Awaitable[Optional[Dict[str, Decimal]]]]]:
+        """Get raw fetch methods of the enabled providers, in configured fallback order."""
+        available = {
+            "exchangerate_api": self._fetch_from_exchangerate_api,
+            "fixer_io": self._fetch_from_fixer_io,
+            "free_api": self._fetch_from_free_api,
+            "replay": self._fetch_from_replay,
+        }
+        return {provider: available[provider] for provider in settings.providers if provider in available}
+    
+    async def _call_provider(
+        self,
+        provider: str,
+        base: str,
+        rate_date: date = None,
+        before_call: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> Optional[Dict[str, Decimal]]:
+        """
+        Call one provider, reusing its recent payload and respecting its quota
+        and circuit breaker.
+        
+        A payload cached within the freshness window is returned without an
+        upstream call; providers close to their daily or monthly limit or with
+        an open breaker are skipped so the fallback moves on to the next one.
+        before_call is only awaited when the provider is actually called.
         """
-        Fetch exchange rates with fallback mechanism.
+        if rate_date and provider not in self.HISTORICAL_PROVIDERS:
+            return None
+        
+        cached = await quota_service.get_cached_response([provider], base, rate_date)
+        if cached:
+            logger.info(f"Reusing cached {provider} response for {base}")
+            return cached[1]
+        
+        if not await quota_service.has_budget(provider):
+            logger.warning(f"Skipping {provider}: quota nearly exhausted")
+            return None
+        
+        if not self.provider_health.allow_request(provider):
+            logger.info(f"Skipping {provider}: circuit open")
+            return None
+        
+        started = time.monotonic()
+        try:
+            if before_call is not None:
+                await before_call()
+                started = time.monotonic()
+            rates = await self._provider_methods()[provider](base, rate_date)
+        except asyncio.CancelledError:
+            self.provider_health.release(provider)
+            raise
+        except Exception:
+            self.provider_health.record(provider, False, time.monotonic() - started)
+            raise
+        self.provider_health.record(provider, bool(rates), time.monotonic() - started)
+        
+        if rates:
+            await quota_service.cache_response(provider, base, rate_date, rates)
+        return rates
+    
+    def get_providers(self) -> Dict[str, Callable[..., Awaitable[Optional[Dict[str, Decimal]]]]]:
+        """
+        Get quota- and breaker-aware provider fetch callables keyed by provider
+        name, ordered by current provider health.
+        """
+        return {
+            provider: partial(self._call_provider, provider)
+            for provider in self.provider_health.rank(self._provider_methods())
+        }
+    
+    async def fetch_from_provider(
+        self,
+        provider: str,
+        base: str,
+        rate_date: date = None,
+        before_call: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> Optional[Dict[str, Decimal]]:
+        """
+        Fetch exchange rates from a single named provider.
+        
+        Args:
+            provider: Provider name as returned by get_providers()
+            base: Base currency code
+            rate_date: Historical date to fetch (defaults to latest)
+            before_call: Awaited right before an upstream request is sent,
+                e.g. to take a rate limit token (skipped for cached or
+                skipped providers)
+            
+        Returns:
+            Dictionary of currency codes to exchange rates, or None on failure.
+        """
+        api_method = self.get_providers().get(provider)
+        if api_method is None:
+            raise ValueError(f"Unknown exchange rate provider: {provider}")
+        return await api_method(base, rate_date, before_call=before_call)
+    
+    async def _fetch_concurrently(
+        self,
+        base: str,
+        rate_date: Optional[date],
+        wanted: int,
+        hedge_delay: Optional[float] = None
+    ) -> List[Tuple[str, Dict[str, Decimal]]]:
+        """
+        Fetch from several providers at once and stop once enough succeed.
+        
+        Without a hedge delay every provider is started immediately. With a
+        hedge delay providers are started one at a time, and the next one is
+        launched when the previous fails or has not answered within the delay.
+        Requests still in flight when `wanted` valid responses arrived are
+        cancelled.
+        
+        Returns:
+            (provider name, rates) for each valid response, in arrival order
+        """
+        providers = list(self.get_providers().items())
+        in_flight: Dict[asyncio.Task, str] = {}
+        results: List[Tuple[str, Dict[str, Decimal]]] = []
+        next_index = 0
+        
+        def launch():
+            nonlocal next_index
+            name, api_method = providers[next_index]
+            next_index += 1
+            in_flight[asyncio.create_task(api_method(base, rate_date))] = name
+        
+        while next_index < len(providers) and (hedge_delay is None or not in_flight):
+            launch()
+        
+        try:
+            while in_flight and len(results) < wanted:
+                can_hedge = hedge_delay is not None and next_index < len(providers)
+                done, _ = await asyncio.wait(
+                    in_flight,
+                    timeout=hedge_delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    logger.info(f"Hedging: launching {providers[next_index][0]} after {hedge_delay}s")
+                    launch()
+                    continue
+                
+                for task in done:
+                    name = in_flight.pop(task)
+                    try:
+                        rates = task.result()
+                    except Exception as e:
+                        logger.error(f"Failed to fetch from {name}: {e}")
+                        rates = None
+                    
+                    if rates:
+                        results.append((name, rates))
+                    elif hedge_delay is not None and next_index < len(providers):
+                        launch()
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+        
+        return results
+    
+    @staticmethod
+    def _consensus(responses: List[Tuple[str, Dict[str, Decimal]]]) -> Dict[str, Decimal]:
+        """Combine provider responses by taking the per-currency median."""
+        values: Dict[str, List[Decimal]] = {}
+        for _, rates in responses:
+            for currency, rate in rates.items():
+                values.setdefault(currency, []).append(rate)
+        return {currency: median(rates) for currency, rates in values.items()}
+    
+    async def fetch_exchange_rates(self, base: str = None, rate_date: date = None) -> Optional[Dict[str, Decimal]]:
+        """
+        Fetch exchange rates using the configured fetch strategy.
+        
+        Strategies (settings.fetch_strategy):
+            sequential: try providers one after another (default)
+            race: query all providers at once, first valid response wins
+            hedged: start the next provider after fetch_hedge_delay_seconds
+                    or on failure, first valid response wins
+            quorum: query all providers at once, wait for fetch_quorum valid
+                    responses and take the per-currency median
         
         Args:
             base: Base currency code. Defaults to configured base currency.
+            rate_date: Historical date to fetch. Defaults to the latest rates.
             
         Returns:
             Dictionary of currency codes to exchange rates, or None if all APIs fail.
         """
         base_currency = base or settings.base_currency
+        strategy = settings.fetch_strategy
+        
+        # Reuse any provider's payload from within the freshness window
+        cached = await quota_service.get_cached_response(list(self.get_providers()), base_currency, rate_date)
+        if cached:
+            logger.info(f"Reusing cached {cached[0]} response for {base_currency}")
+            record_job_metrics(provider=f"{cached[0]} (cached)")
+            return cached[1]
         
-        # List of API methods to try in order
-        api_methods = [
-            self._fetch_from_exchangerate_api,
-            self._fetch_from_fixer_io,
-            self._fetch_from_free_api,
-        ]
+        if strategy in ("race", "hedged", "quorum"):
+            wanted = max(settings.fetch_quorum, 1) if strategy == "quorum" else 1
+            hedge_delay = settings.fetch_hedge_delay_seconds if strategy == "hedged" else None
+            responses = await self._fetch_concurrently(base_currency, rate_date, wanted, hedge_delay)
+            
+            if not responses:
+                logger.error("All external APIs failed to provide exchange rates")
+                return None
+            
+            providers = [name for name, _ in responses]
+            if strategy != "quorum":
+                logger.info(f"Successfully fetched rates using {providers[0]} ({strategy})")
+                record_job_metrics(provider=providers[0])
+                return responses[0][1]
+            
+            if len(responses) < wanted:
+                logger.warning(f"Quorum of {wanted} not reached, using {len(responses)} response(s) from {providers}")
+            else:
+                logger.info(f"Quorum reached with {providers}")
+            record_job_metrics(provider=",".join(providers))
+            return self._consensus(responses)
         
-        for api_method in api_methods:
+        for provider, api_method in self.get_providers().items():
             try:
-                rates = await api_method(base_currency)
+                rates = await api_method(base_currency, rate_date)
                 if rates:
-                    logger.info(f"Successfully fetched rates using {api_method.__name__}")
+                    logger.info(f"Successfully fetched rates using {provider}")
+                    record_job_metrics(provider=provider)
                     return rates
             except Exception as e:
-                logger.error(f"Failed to fetch from {api_method.__name__}: {e}")
+                logger.error(f"Failed to fetch from {provider}: {e}")
                 continue
         
         logger.error("All external APIs failed to provide exchange rates")
@@ -165,14 +432,18 @@ class ExternalAPIService:
         if rate <= 0:
             return False
         
-        # Most exchange rates should be between 0.001 and 10000
-        # This catches obvious errors while allowing for currencies like JPY
-        if rate < Decimal("0.001") or rate > Decimal("10000"):
+        # Most exchange rates should be at least 0.001 and must fit the rate
+        # column once rounded to its scale (below 10000 for Numeric(10, 6))
+        if rate < Decimal("0.001") or rate.quantize(RATE_QUANTUM) > MAX_STORABLE_RATE:
             logger.warning(f"Suspicious exchange rate: {base}/{target} = {rate}")
             return False
         
         return True
     
-    async def get_supported_currencies(self) -> List[str]:
-        """Get list of supported currencies."""
-        return settings.supported_currencies.copy()
\ No newline at end of file
+    async def get_supported_currencies(self) -> Sequence[str]:
+        """Get supported currencies in canonical order (shared, do not mutate)."""
+        return currency_registry.codes
+
+
+# Global external API service instance
+external_api_service = ExternalAPIService()
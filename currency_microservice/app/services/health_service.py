@@ -0,0 +1,141 @@
+"""
+Background health prober publishing cached liveness and readiness state.
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import select, func
+
+from app.core.config import settings
+from app.database.connection import engine
+from app.models.exchange_rate import ExchangeRateDB, HealthStatus
+from app.services.cache_service import cache_service
+from app.services.scheduler_service import scheduler_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HealthService:
+    """Periodically probes dependencies so health endpoints only read memory."""
+
+    def __init__(self):
+        self.status: Optional[HealthStatus] = None
+        self._task: Optional[asyncio.Task] = None
+        self.started_at = datetime.now()
+        self.warming = False
+
+    async def start(self):
+        """Run a first probe and start the background probe loop."""
+        if self._task and not self._task.done():
+            logger.warning("Health prober is already running")
+            return
+
+        await self.probe()
+        self._task = asyncio.create_task(self._probe_loop())
+        logger.info(f"Health prober started (interval {settings.health_check_interval_seconds}s)")
+
+    async def stop(self):
+        """Stop the background probe loop."""
+        if not self._task:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Health prober stopped")
+
+    async def _probe_loop(self):
+        """Probe dependencies forever at the configured interval."""
+        while True:
+            await asyncio.sleep(settings.health_check_interval_seconds)
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"Health probe failed: {e}")
+
+    async def _probe_database(self) -> Tuple[bool, Optional[date]]:
+        """Check Postgres and read the latest stored rate date in one round trip."""
+        try:
+            async with engine.connect() as conn:
+                result = await conn.execute(
+                    select(func.max(ExchangeRateDB.date)).where(
+                        ExchangeRateDB.base_currency == settings.base_currency
+                    )
+                )
+                return True, result.scalar()
+        except Exception as e:
+            logger.error(f"Database health probe failed: {e}")
+            return False, None
+
+    async def _with_timeout(self, coro, default):
+        """Bound a probe so a hung dependency cannot stall the loop."""
+        try:
+            return await asyncio.wait_for(coro, timeout=settings.health_check_timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning("Health probe timed out")
+            return default
+
+    async def probe(self) -> HealthStatus:
+        """Probe every dependency concurrently and publish the result."""
+        (database_ok, latest_rate_date), redis_ok = await asyncio.gather(
+            self._with_timeout(self._probe_database(), (False, None)),
+            self._with_timeout(cache_service.is_connected(), False),
+        )
+
+        rates_fresh = (
+            latest_rate_date is not None
+            and latest_rate_date >= date.today() - timedelta(days=settings.health_max_rate_age_days)
+        )
+
+        if database_ok and redis_ok and rates_fresh:
+            status = "healthy"
+        elif database_ok:
+            status = "degraded"
+        else:
+            status = "unhealthy"
+
+        self.status = HealthStatus(
+            status=status,
+            timestamp=datetime.now(),
+            version=settings.version,
+            database=database_ok,
+            redis=redis_ok,
+            scheduler=scheduler_service.is_running,
+            latest_rate_date=latest_rate_date,
+            rates_fresh=rates_fresh,
+            checked_at=datetime.now(),
+        )
+        return self.status
+
+    def is_alive(self) -> bool:
+        """Liveness: the probe loop is still running (or has not been started)."""
+        return self._task is None or not self._task.done()
+
+    def set_warming(self, warming: bool):
+        """Hold readiness down while startup warm-up is still in progress."""
+        self.warming = warming
+
+    def is_ready(self) -> bool:
+        """Readiness: warm-up has finished and the last probe reached the database."""
+        return not self.warming and self.status is not None and self.status.database
+
+    def get_status(self) -> HealthStatus:
+        """Get the last published status, stamped with the current time."""
+        if self.status is None:
+            return HealthStatus(
+                status="starting",
+                timestamp=datetime.now(),
+                version=settings.version,
+                database=False,
+                redis=False,
+            )
+        return self.status.model_copy(update={"timestamp": datetime.now()})
+
+
+# Global health service instance
+health_service = HealthService()
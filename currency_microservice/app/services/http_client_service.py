@@ -0,0 +1,66 @@
+"""
+Shared, lifecycle-managed HTTP client pool for upstream providers.
+"""
+import importlib.util
+from typing import Dict
+
+import httpx
+
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPClientService:
+    """Owns one keep-alive connection pool per upstream provider."""
+
+    def __init__(self):
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.http2 = settings.http2_enabled and importlib.util.find_spec("h2") is not None
+
+    def _create_client(self, provider: str) -> httpx.AsyncClient:
+        """Create a pooled client with per-provider limits and split timeouts."""
+        return httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections_per_provider,
+                max_keepalive_connections=settings.http_max_keepalive_per_provider,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.http_connect_timeout_seconds,
+                read=settings.http_read_timeout_seconds,
+                write=settings.http_connect_timeout_seconds,
+                pool=settings.http_pool_timeout_seconds,
+            ),
+            headers={"User-Agent": f"{settings.app_name}/{settings.version}"},
+        )
+
+    def get_client(self, provider: str) -> httpx.AsyncClient:
+        """Get the shared client for a provider, creating its pool on first use."""
+        client = self.clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._create_client(provider)
+            self.clients[provider] = client
+        return client
+
+    async def start(self, providers=()):
+        """Open pools for the given providers up front."""
+        for provider in providers:
+            self.get_client(provider)
+        logger.info(f"HTTP client pools ready for {len(self.clients)} providers (http2={self.http2})")
+
+    async def close(self):
+        """Close every pool and its keep-alive connections."""
+        for provider, client in list(self.clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client for {provider}: {e}")
+        self.clients.clear()
+        logger.info("HTTP client pools closed")
+
+
+# Global HTTP client service instance
+http_client_service = HTTPClientService()
@@ -0,0 +1,158 @@
+"""
+Scheduled job run history and duration statistics.
+"""
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import select, delete, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.connection import async_session_factory
+from app.models.job_run import JobRunDB, JobRunResponse, JobDurationStats
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Metrics of the job run executing in the current task, if any
+_current_run: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_job_run", default=None)
+
+
+def record_job_metrics(**metrics):
+    """
+    Attach metrics (rows_written, provider, cache_keys_warmed, error) to the
+    job run executing in the current task. A no-op outside a tracked run,
+    so services can call it unconditionally.
+    """
+    run = _current_run.get()
+    if run is not None:
+        run.update(metrics)
+
+
+class JobRunService:
+    """Records job runs in a bounded table and summarizes their durations."""
+
+    @asynccontextmanager
+    async def track(self, job_id: str, instance_id: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Record one run of a job.
+
+        A run fails if the body raises or records an error through
+        record_job_metrics; otherwise it succeeds.
+        """
+        run: Dict[str, Any] = {}
+        token = _current_run.set(run)
+        started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
+        try:
+            yield run
+        except Exception as e:
+            run["error"] = str(e)
+            raise
+        finally:
+            _current_run.reset(token)
+            await self._save(JobRunDB(
+                job_id=job_id,
+                instance_id=instance_id,
+                status="failed" if run.get("error") else "succeeded",
+                started_at=started_at,
+                finished_at=datetime.now(timezone.utc),
+                duration_ms=int((time.monotonic() - started) * 1000),
+                rows_written=run.get("rows_written"),
+                provider=run.get("provider"),
+                cache_keys_warmed=run.get("cache_keys_warmed"),
+                error=run.get("error"),
+            ))
+
+    async def _save(self, record: JobRunDB):
+        """Store a run and trim the job's history to the configured limit."""
+        try:
+            async with async_session_factory() as db:
+                db.add(record)
+                await db.flush()
+                await self._prune(db, record.job_id)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to record {record.job_id} run: {e}")
+
+    async def _prune(self, db: AsyncSession, job_id: str):
+        """Delete a job's runs beyond the newest settings.job_run_history_limit."""
+        keep = (
+            select(JobRunDB.id)
+            .where(JobRunDB.job_id == job_id)
+            .order_by(JobRunDB.started_at.desc())
+            .limit(settings.job_run_history_limit)
+        )
+        await db.execute(
+            delete(JobRunDB).where(JobRunDB.job_id == job_id, JobRunDB.id.not_in(keep))
+        )
+
+    async def list_recent(self, db: AsyncSession, job_id: str = None, limit: int = 50) -> List[JobRunResponse]:
+        """List the most recent runs, optionally for one job."""
+        query = select(JobRunDB).order_by(JobRunDB.started_at.desc()).limit(limit)
+        if job_id:
+            query = query.where(JobRunDB.job_id == job_id)
+        result = await db.execute(query)
+        return [JobRunResponse.model_validate(run) for run in result.scalars().all()]
+
+    async def get_duration_stats(self, db: AsyncSession) -> List[JobDurationStats]:
+        """Compute duration percentiles per job over the recorded history."""
+        if settings.embedded:
+            return await self._compute_duration_stats(db)
+        
+        duration = JobRunDB.duration_ms
+        result = await db.execute(
+            select(
+                JobRunDB.job_id,
+                func.count().label("runs"),
+                func.sum(case((JobRunDB.status == "failed", 1), else_=0)).label("failures"),
+                func.percentile_cont(0.5).within_group(duration).label("p50_ms"),
+                func.percentile_cont(0.9).within_group(duration).label("p90_ms"),
+                func.percentile_cont(0.99).within_group(duration).label("p99_ms"),
+                func.max(JobRunDB.started_at).label("last_started_at"),
+            )
+            .group_by(JobRunDB.job_id)
+            .order_by(JobRunDB.job_id)
+        )
+        return [JobDurationStats(**row._mapping) for row in result]
+
+    async def _compute_duration_stats(self, db: AsyncSession) -> List[JobDurationStats]:
+        """Compute the same statistics in Python for SQLite, which lacks percentile_cont."""
+        result = await db.execute(
+            select(JobRunDB.job_id, JobRunDB.status, JobRunDB.duration_ms, JobRunDB.started_at)
+            .order_by(JobRunDB.job_id)
+        )
+        runs: Dict[str, List[Any]] = {}
+        for row in result:
+            runs.setdefault(row.job_id, []).append(row)
+
+        stats = []
+        for job_id, job_runs in runs.items():
+            durations = sorted(run.duration_ms for run in job_runs if run.duration_ms is not None)
+            stats.append(JobDurationStats(
+                job_id=job_id,
+                runs=len(job_runs),
+                failures=sum(1 for run in job_runs if run.status == "failed"),
+                p50_ms=_percentile(durations, 0.5),
+                p90_ms=_percentile(durations, 0.9),
+                p99_ms=_percentile(durations, 0.99),
+                last_started_at=max(run.started_at for run in job_runs),
+            ))
+        return stats
+
+
+def _percentile(values: List[int], fraction: float) -> Optional[float]:
+    """Linearly interpolated percentile of sorted values, as percentile_cont computes it."""
+    if not values:
+        return None
+    position = fraction * (len(values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+# Global job run service instance
+job_run_service = JobRunService()
@@ -0,0 +1,222 @@
+"""
+Leader election across workers and replicas via a Redis lease with fencing tokens.
+"""
+import asyncio
+import hashlib
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.database.connection import engine
+from app.services.cache_service import cache_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Extend the lease only if this instance still holds it
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Delete the lease only if this instance still holds it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Claim a job run: the caller must hold the lease and its fencing token must
+# not be older than the last token that ran this job
+CLAIM_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+local last = tonumber(redis.call('GET', KEYS[2]) or '0')
+if tonumber(ARGV[2]) < last then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2])
+return 1
+"""
+
+
+class LeaderService:
+    """
+    Elects one leader per cluster for scheduled jobs.
+
+    Every process competes for a Redis lease (SET NX PX) and renews it while
+    it holds it; if the leader dies its lease expires and another process
+    takes over. Each acquisition draws a monotonically increasing fencing
+    token, and a job run is only claimed when the token is not older than
+    the last one that ran the job, so a stalled former leader cannot run a
+    job after its successor.
+    """
+
+    def __init__(self, name: str = "scheduler"):
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_key = f"leader:{name}"
+        self.token_key = f"leader:{name}:token"
+        self.fence_prefix = f"leader:{name}:fence"
+        self.is_leader = False
+        self.token: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Election needs a shared Redis; an embedded node is always its own leader."""
+        return settings.leader_election_enabled and not settings.embedded
+
+    async def start(self):
+        """Try to acquire the lease now and keep competing in the background."""
+        if not self.enabled or self._task is not None:
+            return
+        await self.refresh()
+        self._task = asyncio.create_task(self._lease_loop())
+        logger.info(f"Leader election started for {self.instance_id} (leader={self.is_leader})")
+
+    async def stop(self):
+        """Stop competing and hand the lease over immediately."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.release()
+
+    async def _lease_loop(self):
+        """Acquire or renew the lease every renew interval."""
+        while True:
+            await asyncio.sleep(settings.leader_renew_interval_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Leader lease refresh failed: {e}")
+                self._step_down()
+
+    def _step_down(self):
+        """Forget leadership locally."""
+        if self.is_leader:
+            logger.warning(f"{self.instance_id} lost scheduler leadership")
+        self.is_leader = False
+        self.token = None
+
+    async def refresh(self):
+        """Renew the lease if held, otherwise try to acquire it."""
+        if not await cache_service.is_connected():
+            self._step_down()
+            return
+
+        ttl_ms = int(settings.leader_lease_ttl_seconds * 1000)
+        redis = cache_service.redis_client
+
+        if self.is_leader:
+            if not await redis.eval(RENEW_SCRIPT, 1, self.lease_key, self.instance_id, ttl_ms):
+                self._step_down()
+            return
+
+        if await redis.set(self.lease_key, self.instance_id, nx=True, px=ttl_ms):
+            self.token = await redis.incr(self.token_key)
+            self.is_leader = True
+            logger.info(f"{self.instance_id} became scheduler leader (fencing token {self.token})")
+
+    async def release(self):
+        """Release the lease if this instance holds it."""
+        was_leader = self.is_leader
+        self._step_down()
+        if not was_leader or not await cache_service.is_connected():
+            return
+        try:
+            await cache_service.redis_client.eval(RELEASE_SCRIPT, 1, self.lease_key, self.instance_id)
+        except Exception as e:
+            logger.error(f"Leader lease release failed: {e}")
+
+    def _advisory_lock_key(self, job_id: str) -> int:
+        """Stable signed 64-bit Postgres advisory lock key for a job."""
+        digest = hashlib.sha256(f"{self.fence_prefix}:{job_id}".encode()).digest()
+        return int.from_bytes(digest[:8], "big", signed=True)
+
+    async def _run_with_advisory_lock(self, job_id: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a job while Redis is down only if its Postgres advisory lock is free.
+
+        Workers fire scheduled jobs at the same time, so the first to take the
+        lock runs the job and the others skip it. The lock is held on one
+        pooled connection for the duration of the run.
+        """
+        key = self._advisory_lock_key(job_id)
+        try:
+            conn = await engine.connect()
+        except Exception as e:
+            logger.error(f"Skipping {job_id}: Redis unavailable and database lock failed: {e}")
+            return None
+
+        try:
+            try:
+                locked = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})
+            except Exception as e:
+                logger.error(f"Skipping {job_id}: Redis unavailable and database lock failed: {e}")
+                return None
+            if not locked:
+                logger.info(f"Skipping {job_id}: Redis unavailable and another worker holds its database lock")
+                return None
+
+            logger.warning(f"Redis unavailable, running {job_id} under a database advisory lock")
+            try:
+                return await func()
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+        finally:
+            await conn.close()
+
+    async def run_exclusive(self, job_id: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a scheduled job only on the leader.
+
+        With leader election disabled (or in embedded mode) the job runs
+        locally. While Redis is unavailable no leader can be established, so
+        the job falls back to a Postgres advisory lock and runs on at most
+        one worker at a time instead of on every worker.
+        """
+        if not self.enabled:
+            return await func()
+
+        if not await cache_service.is_connected():
+            return await self._run_with_advisory_lock(job_id, func)
+
+        if not self.is_leader:
+            logger.debug(f"Skipping {job_id}: {self.instance_id} is not the leader")
+            return None
+
+        claimed = await cache_service.redis_client.eval(
+            CLAIM_SCRIPT, 2, self.lease_key, f"{self.fence_prefix}:{job_id}", self.instance_id, self.token
+        )
+        if not claimed:
+            logger.warning(f"Skipping {job_id}: lease or fencing token {self.token} is stale")
+            self._step_down()
+            return None
+
+        logger.info(f"Running {job_id} as leader (fencing token {self.token})")
+        return await func()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get this instance's view of the election."""
+        return {
+            "enabled": self.enabled,
+            "instance_id": self.instance_id,
+            "is_leader": self.is_leader,
+            "fencing_token": self.token,
+        }
+
+
+# Global leader service instance
+leader_service = LeaderService()
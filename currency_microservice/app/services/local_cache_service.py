@@ -0,0 +1,226 @@
+"""
+In-process (L1) cache of rate reads, kept coherent across workers.
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.services.cache_service import cache_service
+from app.services.snapshot_service import snapshot_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCacheService:
+    """
+    Per-worker cache in front of Redis, invalidated through an event bus.
+
+    Writers publish an event naming the base currencies and dates they
+    changed on a Redis channel, numbered by a Redis counter. Every worker
+    evicts the matching entries and retires its mapped snapshot if the
+    snapshot covers a changed date. A skipped number means a lost event,
+    so the whole cache is dropped. While the subscription is down the
+    worker polls the counter instead and drops everything when it moves.
+
+    Reads pass the generation they started at when filling the cache, so
+    a value read before an eviction is never stored after it.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.generation = 0
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    def _rate_key(self, base: str, target: str, rate_date: date) -> Tuple:
+        return ("rate", base, rate_date, target)
+
+    def _latest_rates_key(self, base: str) -> Tuple:
+        return ("latest", base, None)
+
+    def _rendered_rates_key(self, base: str) -> Tuple:
+        return ("rendered", base, None)
+
+    def _get(self, key: Tuple) -> Any:
+        """Look up a live entry, refreshing its recency."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: Tuple, value: Any, generation: int):
+        """Store an entry unless an eviction happened since the value was read."""
+        if not settings.local_cache_enabled or generation != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + settings.local_cache_ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > settings.local_cache_max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_rate(self, base: str, target: str, rate_date: date) -> Optional[Decimal]:
+        return self._get(self._rate_key(base, target, rate_date))
+
+    def set_rate(self, base: str, target: str, rate_date: date, rate: Decimal, generation: int):
+        self._put(self._rate_key(base, target, rate_date), rate, generation)
+
+    def get_latest_rates(self, base: str) -> Optional[Dict[str, Any]]:
+        return self._get(self._latest_rates_key(base))
+
+    def set_latest_rates(self, base: str, rates: Dict[str, Any], generation: int):
+        self._put(self._latest_rates_key(base), rates, generation)
+
+    def get_rendered_rates(self, base: str) -> Optional[str]:
+        return self._get(self._rendered_rates_key(base))
+
+    def set_rendered_rates(self, base: str, body: str, generation: int):
+        self._put(self._rendered_rates_key(base), body, generation)
+
+    def invalidate(
+        self,
+        bases: Optional[Iterable[str]] = None,
+        dates: Optional[Iterable[date]] = None,
+        snapshot_version: Optional[int] = None
+    ):
+        """
+        Evict entries for the given bases and dates (everything when None).
+
+        Latest-rates entries of a base are evicted for any of its dates,
+        since a new date can become the latest one.
+        """
+        self.generation += 1
+        if bases is None and dates is None:
+            self._entries.clear()
+        else:
+            bases = None if bases is None else set(bases)
+            dates = None if dates is None else set(dates)
+            stale = [
+                key for key in self._entries
+                if (bases is None or key[1] in bases)
+                and (dates is None or key[2] is None or key[2] in dates)
+            ]
+            for key in stale:
+                del self._entries[key]
+        snapshot_service.retire(dates, snapshot_version)
+
+    async def publish(
+        self,
+        bases: Optional[Iterable[str]] = None,
+        dates: Optional[Iterable[date]] = None,
+        snapshot_version: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Evict changed rates here and announce the change to every worker.
+
+        Args:
+            bases: Base currencies written (all when None)
+            dates: Dates written (all when None)
+            snapshot_version: Snapshot version that already includes the change
+
+        Returns:
+            The event number, or None if it could not be broadcast
+        """
+        bases = None if bases is None else sorted(set(bases))
+        dates = None if dates is None else sorted(set(dates))
+        self.invalidate(bases, dates, snapshot_version)
+
+        version = await cache_service.publish_invalidation({
+            "bases": bases,
+            "dates": None if dates is None else [day.isoformat() for day in dates],
+            "snapshot": snapshot_version,
+        })
+        if version is None:
+            logger.warning("Rate invalidation not broadcast; other workers rely on entry expiry")
+        return version
+
+    def _apply(self, event: Dict[str, Any]):
+        """Evict what an event names, or everything if events were missed."""
+        version = event["version"]
+        dates = event["dates"]
+        if event["bases"] is None and dates is None:
+            # A full clear may follow a flush that restarted the counter
+            self.version = version
+            self.invalidate()
+            return
+        if version > self.version + 1:
+            logger.info(f"Missed rate invalidations {self.version + 1}..{version - 1}; dropping the local cache")
+            self.invalidate()
+        else:
+            self.invalidate(
+                event["bases"],
+                None if dates is None else [date.fromisoformat(day) for day in dates],
+                event["snapshot"]
+            )
+        self.version = max(self.version, version)
+
+    async def poll(self) -> bool:
+        """
+        Drop the local cache if the invalidation counter moved without us.
+
+        Returns:
+            True if the cache was dropped
+        """
+        live_version = await cache_service.get_invalidation_version()
+        if live_version is None or live_version == self.version:
+            return False
+        logger.info(f"Rate invalidation counter moved to {live_version}; dropping the local cache")
+        self.version = live_version
+        self.invalidate()
+        return True
+
+    async def start(self):
+        """Start following invalidation events."""
+        if not settings.local_cache_enabled:
+            return
+        if self._task and not self._task.done():
+            logger.warning("Local cache invalidation listener is already running")
+            return
+
+        self.version = await cache_service.get_invalidation_version() or 0
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        """Stop the listener and drop the cache."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.invalidate()
+
+    async def _sync_loop(self):
+        """Hold the invalidation subscription, polling the counter while it is down."""
+        while True:
+            pubsub = await cache_service.subscribe_invalidations()
+            if pubsub is not None:
+                try:
+                    # Catch up on events published while unsubscribed
+                    await self.poll()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._apply(json.loads(message["data"]))
+                except Exception as e:
+                    logger.warning(f"Rate invalidation subscription dropped; polling: {e}")
+                finally:
+                    await pubsub.aclose()
+            await asyncio.sleep(settings.local_cache_poll_interval_seconds)
+            await self.poll()
+
+
+# Global local cache service instance
+local_cache_service = LocalCacheService()
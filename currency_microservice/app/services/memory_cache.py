@@ -0,0 +1,234 @@
+"""
+Bounded in-process stand-in for the Redis client used in embedded mode.
+"""
+import asyncio
+import fnmatch
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+
+class MemoryPipeline:
+    """Queues commands and runs them back to back, like a Redis MULTI/EXEC."""
+
+    def __init__(self, cache: "MemoryCache"):
+        self._cache = cache
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self) -> "MemoryPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> bool:
+        self._commands.clear()
+        return False
+
+    def __getattr__(self, name: str):
+        if not hasattr(self._cache, name):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs) -> "MemoryPipeline":
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        """Run the queued commands; no other task can interleave between them."""
+        commands, self._commands = self._commands, []
+        return [await getattr(self._cache, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+
+class MemoryPubSub:
+    """A channel subscription shaped like redis.asyncio's PubSub, delivered in-process."""
+
+    def __init__(self, cache: "MemoryCache"):
+        self._cache = cache
+        self._messages: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self.channels: Set[str] = set()
+
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            self.channels.add(channel)
+            self._cache._subscribers.setdefault(channel, set()).add(self)
+            self._messages.put_nowait({"type": "subscribe", "channel": channel, "data": len(self.channels)})
+
+    async def unsubscribe(self, *channels: str):
+        for channel in channels or list(self.channels):
+            self.channels.discard(channel)
+            self._cache._subscribers.get(channel, set()).discard(self)
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0) -> Optional[Dict[str, Any]]:
+        try:
+            message = await asyncio.wait_for(self._messages.get(), timeout) if timeout else self._messages.get_nowait()
+        except (asyncio.TimeoutError, asyncio.QueueEmpty):
+            return None
+        if ignore_subscribe_messages and message["type"] != "message":
+            return None
+        return message
+
+    async def listen(self) -> AsyncIterator[Dict[str, Any]]:
+        while self.channels:
+            yield await self._messages.get()
+
+    async def aclose(self):
+        await self.unsubscribe()
+
+    close = aclose
+
+
+class MemoryCache:
+    """
+    The subset of the redis.asyncio API the services use, kept in one process.
+
+    Values are stored as strings like a client with decode_responses=True.
+    Keys expire lazily on access. Once max_entries is reached the least
+    recently used key is evicted, so memory stays bounded on small nodes.
+    Commands never await, so each command (and each pipeline) is atomic
+    within the event loop. Pub/sub messages go to subscribers in this
+    process only.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._expires: Dict[str, float] = {}
+        self._subscribers: Dict[str, Set[MemoryPubSub]] = {}
+        self._started = time.time()
+
+    def _live(self, key: str) -> bool:
+        """Drop the key if it has expired; report whether it still exists."""
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self._remove(key)
+        return key in self._data
+
+    def _remove(self, key: str) -> bool:
+        self._expires.pop(key, None)
+        return self._data.pop(key, None) is not None
+
+    def _read(self, key: str) -> Any:
+        if not self._live(key):
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def _write(self, key: str, value: Any, ttl: Optional[float] = None, keep_ttl: bool = False):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if ttl is not None:
+            self._expires[key] = time.time() + ttl
+        elif not keep_ttl:
+            self._expires.pop(key, None)
+        while len(self._data) > self.max_entries:
+            oldest, _ = self._data.popitem(last=False)
+            self._expires.pop(oldest, None)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def close(self):
+        pass
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._read(key)
+
+    async def set(self, key: str, value: Any, ex: int = None, px: int = None, nx: bool = False) -> Optional[bool]:
+        if nx and self._live(key):
+            return None
+        ttl = ex if ex is not None else (px / 1000 if px is not None else None)
+        self._write(key, str(value), ttl)
+        return True
+
+    async def setex(self, key: str, seconds: int, value: Any) -> bool:
+        self._write(key, str(value), seconds)
+        return True
+
+    async def mget(self, keys, *args) -> List[Optional[str]]:
+        keys = ([keys] if isinstance(keys, str) else list(keys)) + list(args)
+        return [self._read(key) for key in keys]
+
+    async def mset(self, mapping: Dict[str, Any]) -> bool:
+        for key, value in mapping.items():
+            self._write(key, str(value))
+        return True
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = int(self._read(key) or 0) + amount
+        self._write(key, str(value), keep_ttl=True)
+        return value
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._remove(key) for key in keys)
+
+    async def unlink(self, *keys: str) -> int:
+        return await self.delete(*keys)
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if not self._live(key):
+            return False
+        self._expires[key] = time.time() + seconds
+        return True
+
+    async def expireat(self, key: str, when: int) -> bool:
+        if not self._live(key):
+            return False
+        self._expires[key] = float(when)
+        return True
+
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        return (self._read(key) or {}).get(field)
+
+    async def hset(self, key: str, field: str = None, value: Any = None, mapping: Dict[str, Any] = None) -> int:
+        current = self._read(key)
+        fields = dict(current) if isinstance(current, dict) else {}
+        updates = dict(mapping or {})
+        if field is not None:
+            updates[field] = value
+        added = sum(1 for name in updates if name not in fields)
+        fields.update({name: str(item) for name, item in updates.items()})
+        self._write(key, fields, keep_ttl=True)
+        return added
+
+    async def hdel(self, key: str, *fields: str) -> int:
+        current = self._read(key)
+        if not isinstance(current, dict):
+            return 0
+        removed = sum(current.pop(name, None) is not None for name in fields)
+        if not current:
+            self._remove(key)
+        return removed
+
+    async def keys(self, pattern: str = "*") -> List[str]:
+        return [key for key in list(self._data) if self._live(key) and fnmatch.fnmatchcase(key, pattern)]
+
+    async def scan(self, cursor: int = 0, match: str = None, count: int = 10) -> Tuple[int, List[str]]:
+        keys = list(self._data)
+        batch = keys[cursor:cursor + count]
+        next_cursor = cursor + count if cursor + count < len(keys) else 0
+        return next_cursor, [
+            key for key in batch
+            if self._live(key) and (match is None or fnmatch.fnmatchcase(key, match))
+        ]
+
+    async def flushdb(self) -> bool:
+        self._data.clear()
+        self._expires.clear()
+        return True
+
+    async def info(self) -> Dict[str, Any]:
+        return {
+            "db0": {"keys": len(self._data)},
+            "used_memory_human": "N/A",
+            "uptime_in_seconds": int(time.time() - self._started),
+        }
+
+    async def publish(self, channel: str, message: Any) -> int:
+        subscribers = list(self._subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber._messages.put_nowait({"type": "message", "channel": channel, "data": str(message)})
+        return len(subscribers)
+
+    def pubsub(self) -> MemoryPubSub:
+        return MemoryPubSub(self)
+
+    def pipeline(self, transaction: bool = True) -> MemoryPipeline:
+        return MemoryPipeline(self)
@@ -0,0 +1,138 @@
+"""
+Per-provider circuit breakers and adaptive fallback ordering.
+"""
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderHealth:
+    """Circuit breaker with a rolling success rate and EWMA latency for one provider."""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.state = CLOSED
+        self.outcomes: Deque[bool] = deque(maxlen=settings.provider_health_window)
+        self.ewma_latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def success_rate(self) -> float:
+        """Share of successful calls in the rolling window (1.0 before any call)."""
+        if not self.outcomes:
+            return 1.0
+        return sum(self.outcomes) / len(self.outcomes)
+
+    def allow_request(self, now: float) -> bool:
+        """Check whether a call may go out, moving an expired open breaker to half-open."""
+        if self.state == OPEN:
+            if now - self.opened_at < settings.circuit_breaker_reset_seconds:
+                return False
+            self.state = HALF_OPEN
+            logger.info(f"Circuit for {self.provider} half-open, sending trial request")
+
+        if self.state == HALF_OPEN:
+            if self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+
+        return True
+
+    def record(self, success: bool, latency: float, now: float):
+        """Record a call outcome and update the breaker state."""
+        self.trial_in_flight = False
+        self.outcomes.append(success)
+
+        alpha = settings.provider_latency_ewma_alpha
+        self.ewma_latency = latency if self.ewma_latency is None else (
+            alpha * latency + (1 - alpha) * self.ewma_latency
+        )
+
+        if success:
+            if self.state != CLOSED:
+                logger.info(f"Circuit for {self.provider} closed")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            return
+
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= settings.circuit_breaker_failure_threshold:
+            if self.state != OPEN:
+                logger.warning(
+                    f"Circuit for {self.provider} opened after {self.consecutive_failures} consecutive failures"
+                )
+            self.state = OPEN
+            self.opened_at = now
+
+    def sort_key(self):
+        """Ordering key: closed before open, higher success rate, then lower latency."""
+        latency = self.ewma_latency if self.ewma_latency is not None else float("inf")
+        return (self.state == OPEN, -self.success_rate, latency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize current health for the admin endpoint."""
+        return {
+            "provider": self.provider,
+            "state": self.state,
+            "success_rate": round(self.success_rate, 4),
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+            "calls": len(self.outcomes),
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class ProviderHealthService:
+    """Tracks provider health in-process and ranks providers for fallback."""
+
+    def __init__(self):
+        self.providers: Dict[str, ProviderHealth] = {}
+
+    def get(self, provider: str) -> ProviderHealth:
+        """Get the health record for a provider, creating it on first use."""
+        health = self.providers.get(provider)
+        if health is None:
+            health = ProviderHealth(provider)
+            self.providers[provider] = health
+        return health
+
+    def allow_request(self, provider: str) -> bool:
+        """Check whether the provider's breaker lets a call through."""
+        return self.get(provider).allow_request(time.monotonic())
+
+    def record(self, provider: str, success: bool, latency: float):
+        """Record the outcome and latency of one upstream call."""
+        self.get(provider).record(success, latency, time.monotonic())
+
+    def release(self, provider: str):
+        """Release a half-open trial slot without recording an outcome (e.g. on cancellation)."""
+        self.get(provider).trial_in_flight = False
+
+    def rank(self, providers: Iterable[str]) -> List[str]:
+        """
+        Order providers for fallback: healthy before open, then by success
+        rate and EWMA latency. Ties keep the configured order.
+        """
+        return sorted(providers, key=lambda provider: self.get(provider).sort_key())
+
+    def get_status(self, providers: Iterable[str]) -> List[Dict[str, Any]]:
+        """Get health of the given providers in current fallback order."""
+        return [self.get(provider).to_dict() for provider in self.rank(providers)]
+
+    def reset(self):
+        """Forget all recorded provider health."""
+        self.providers.clear()
+
+
+# Global provider health service instance
+provider_health_service = ProviderHealthService()
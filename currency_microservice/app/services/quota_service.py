@@ -0,0 +1,148 @@
+"""
+Upstream quota accounting and provider response reuse, backed by Redis.
+"""
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.cache_service import cache_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+DAY_COUNTER_TTL_SECONDS = 2 * 86400
+MONTH_COUNTER_TTL_SECONDS = 32 * 86400
+
+
+class QuotaService:
+    """
+    Tracks provider call counts across workers and caches provider payloads.
+
+    Sits on the upstream call path, so Redis is not pinged first: commands
+    go straight out and any Redis error is logged and treated as unavailable.
+    """
+
+    def _day_key(self, provider: str, day: date) -> str:
+        """Generate counter key for a provider's calls on one day."""
+        return f"quota:{provider}:day:{day.isoformat()}"
+
+    def _month_key(self, provider: str, day: date) -> str:
+        """Generate counter key for a provider's calls in one month."""
+        return f"quota:{provider}:month:{day.strftime('%Y-%m')}"
+
+    def _response_key(self, provider: str, base: str, rate_date: Optional[date]) -> str:
+        """Generate cache key for a provider payload; latest payloads are keyed by UTC day."""
+        if rate_date:
+            return f"provider_response:{provider}:{base}:{rate_date.isoformat()}"
+        return f"provider_response:{provider}:{base}:latest:{datetime.now(timezone.utc).date().isoformat()}"
+
+    async def record_call(self, provider: str) -> bool:
+        """Count one upstream request against the provider's daily and monthly budgets."""
+        if not cache_service.connected:
+            return False
+
+        today = date.today()
+        try:
+            async with cache_service.redis_client.pipeline(transaction=False) as pipe:
+                pipe.incr(self._day_key(provider, today))
+                pipe.expire(self._day_key(provider, today), DAY_COUNTER_TTL_SECONDS)
+                pipe.incr(self._month_key(provider, today))
+                pipe.expire(self._month_key(provider, today), MONTH_COUNTER_TTL_SECONDS)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Quota record_call error for {provider}: {e}")
+            return False
+
+    async def get_usage(self, provider: str) -> Dict[str, Any]:
+        """Get current daily and monthly usage and limits for a provider."""
+        daily_limit = settings.provider_daily_limits.get(provider)
+        monthly_limit = settings.provider_monthly_limits.get(provider)
+        usage = {
+            "provider": provider,
+            "daily_calls": None,
+            "daily_limit": daily_limit,
+            "monthly_calls": None,
+            "monthly_limit": monthly_limit,
+        }
+
+        if not cache_service.connected:
+            return usage
+
+        today = date.today()
+        try:
+            daily, monthly = await cache_service.redis_client.mget(
+                [self._day_key(provider, today), self._month_key(provider, today)]
+            )
+            usage["daily_calls"] = int(daily or 0)
+            usage["monthly_calls"] = int(monthly or 0)
+        except Exception as e:
+            logger.error(f"Quota get_usage error for {provider}: {e}")
+
+        return usage
+
+    async def has_budget(self, provider: str) -> bool:
+        """
+        Check whether a provider is still below the reserve threshold of its limits.
+
+        Providers without configured limits, or any provider while Redis is
+        unavailable, are always allowed.
+        """
+        usage = await self.get_usage(provider)
+        for calls, limit in ((usage["daily_calls"], usage["daily_limit"]),
+                             (usage["monthly_calls"], usage["monthly_limit"])):
+            if limit and calls is not None and calls >= limit * settings.provider_quota_reserve:
+                logger.warning(f"Provider {provider} near quota: {calls}/{limit} calls")
+                return False
+        return True
+
+    async def get_cached_response(
+        self,
+        providers: List[str],
+        base: str,
+        rate_date: Optional[date] = None
+    ) -> Optional[Tuple[str, Dict[str, Decimal]]]:
+        """Get the first cached payload for (base, date) from any of the providers."""
+        if not providers or not cache_service.connected:
+            return None
+
+        try:
+            values = await cache_service.redis_client.mget(
+                [self._response_key(provider, base, rate_date) for provider in providers]
+            )
+            for provider, value in zip(providers, values):
+                if value:
+                    rates = {currency: Decimal(rate) for currency, rate in json.loads(value).items()}
+                    return provider, rates
+        except Exception as e:
+            logger.error(f"Quota get_cached_response error: {e}")
+
+        return None
+
+    async def cache_response(
+        self,
+        provider: str,
+        base: str,
+        rate_date: Optional[date],
+        rates: Dict[str, Decimal]
+    ) -> bool:
+        """Cache a provider payload for the freshness window."""
+        if not cache_service.connected:
+            return False
+
+        try:
+            await cache_service.redis_client.setex(
+                self._response_key(provider, base, rate_date),
+                settings.provider_response_ttl_seconds,
+                json.dumps({currency: str(rate) for currency, rate in rates.items()})
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Quota cache_response error: {e}")
+            return False
+
+
+# Global quota service instance
+quota_service = QuotaService()
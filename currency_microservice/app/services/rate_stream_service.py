@@ -0,0 +1,156 @@
+"""
+Push notification of new rate snapshots to streaming clients.
+"""
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.services.cache_service import cache_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_MAX_SECONDS = 30.0
+
+
+class RateStreamService:
+    """
+    Fans snapshot events out to the SSE and WebSocket clients of a worker.
+
+    Ingest publishes a compact event on a Redis channel; each worker holds
+    one subscription and wakes its clients. Clients wait on one shared
+    asyncio.Event that is replaced on every delivery, so an idle connection
+    is a single suspended coroutine with no queue of its own. The newest
+    event is also stored in Redis, so clients connecting (or a worker
+    resubscribing) later start from it.
+    """
+
+    def __init__(self):
+        self.latest: Optional[Dict[str, Any]] = None
+        self.connections = 0
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Load the newest event and subscribe to the event channel."""
+        if not settings.rate_stream_enabled:
+            return
+        if self._task and not self._task.done():
+            logger.warning("Rate stream subscriber is already running")
+            return
+
+        self._changed = asyncio.Event()
+        self._deliver(await cache_service.get_last_rate_event())
+        self._task = asyncio.create_task(self._subscribe_loop())
+
+    async def stop(self):
+        """Stop the subscriber."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _subscribe_loop(self):
+        """Hold the channel subscription, resubscribing with backoff when it drops."""
+        delay = 1.0
+        while True:
+            pubsub = await cache_service.subscribe_rate_events()
+            if pubsub is not None:
+                delay = 1.0
+                try:
+                    # Catch up on anything published while unsubscribed
+                    self._deliver(await cache_service.get_last_rate_event())
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._deliver(json.loads(message["data"]))
+                except Exception as e:
+                    logger.warning(f"Rate event subscription dropped: {e}")
+                finally:
+                    await pubsub.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    def _deliver(self, event: Optional[Dict[str, Any]]):
+        """Make a newer event current and wake every waiting client."""
+        if event is None or (self.latest and event["version"] <= self.latest["version"]):
+            return
+        self.latest = event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def publish(self, rate_date: date, bases: List[str], version: int = None) -> Dict[str, Any]:
+        """
+        Announce a new rate snapshot to clients of every worker.
+
+        Args:
+            rate_date: Date of the ingested rates
+            bases: Base currencies written
+            version: Snapshot version (defaults to the current time in ms)
+
+        Returns:
+            The published event
+        """
+        event = {
+            "version": version or time.time_ns() // 1_000_000,
+            "date": rate_date.isoformat(),
+            "bases": bases,
+        }
+        if not await cache_service.publish_rate_event(event):
+            logger.warning("Rate event not broadcast; notifying this worker's clients only")
+        # Local clients are woken right away; the echo from Redis is ignored as not newer
+        self._deliver(event)
+        return event
+
+    def accepting(self) -> bool:
+        """Whether this worker can take another streaming client."""
+        return settings.rate_stream_enabled and self.connections < settings.rate_stream_max_connections
+
+    @contextmanager
+    def connection(self) -> Iterator[None]:
+        """Count a streaming client against the worker's limit while it is connected."""
+        self.connections += 1
+        try:
+            yield
+        finally:
+            self.connections -= 1
+
+    async def events(self, last_version: Optional[int] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield events newer than last_version as they arrive.
+
+        The current event is yielded first unless the client already has it.
+        None is yielded after each heartbeat interval without an event.
+        Callers count the client with connection().
+        """
+        while True:
+            latest = self.latest
+            if latest and (last_version is None or latest["version"] > last_version):
+                last_version = latest["version"]
+                yield latest
+                continue
+            try:
+                async with asyncio.timeout(settings.rate_stream_heartbeat_seconds):
+                    await self._changed.wait()
+            except TimeoutError:
+                yield None
+
+    async def sse(self, last_version: Optional[int] = None) -> AsyncIterator[str]:
+        """Render events as a text/event-stream body with comment heartbeats."""
+        with self.connection():
+            yield f"retry: {settings.rate_stream_retry_ms}\n\n"
+            async for event in self.events(last_version):
+                if event is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"id: {event['version']}\nevent: snapshot\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+# Global rate stream service instance
+rate_stream_service = RateStreamService()
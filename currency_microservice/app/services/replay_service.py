@@ -0,0 +1,95 @@
+"""
+Recorded provider payloads on disk and fault injection for offline replay.
+"""
+import asyncio
+import json
+import random
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+ERROR = "error"
+TIMEOUT = "timeout"
+
+
+class ReplayStore:
+    """
+    Reads and writes recorded rate snapshots.
+
+    Layout: <data_dir>/<BASE>/<YYYY-MM-DD>.json for historical snapshots and
+    <data_dir>/<BASE>/latest.json for the latest one. Each file holds
+    {"base": ..., "date": ..., "rates": {currency: rate}}. A dated request
+    without its own recording falls back to latest.json, so a single
+    recording can drive a backfill of any length.
+    """
+
+    def __init__(self, data_dir: str = None):
+        self.data_dir = Path(data_dir or settings.replay_data_dir)
+
+    def _path(self, base: str, rate_date: Optional[date]) -> Path:
+        """Get the recording path for a base currency and date."""
+        name = rate_date.isoformat() if rate_date else "latest"
+        return self.data_dir / base.upper() / f"{name}.json"
+
+    def load(self, base: str, rate_date: date = None) -> Optional[Dict[str, Decimal]]:
+        """Load recorded rates, or None when nothing is recorded for the base."""
+        for path in (self._path(base, rate_date), self._path(base, None)):
+            if path.is_file():
+                with path.open() as f:
+                    data = json.load(f)
+                return {currency: Decimal(str(rate)) for currency, rate in data.get("rates", {}).items()}
+        return None
+
+    def save(self, base: str, rate_date: Optional[date], rates: Dict[str, Decimal]) -> Path:
+        """Record rates for a base currency and date."""
+        path = self._path(base, rate_date)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w") as f:
+            json.dump({
+                "base": base.upper(),
+                "date": (rate_date or date.today()).isoformat(),
+                "rates": {currency: str(rate) for currency, rate in sorted(rates.items())},
+            }, f, indent=2)
+        return path
+
+
+class FaultInjector:
+    """Adds latency, errors and timeouts to replayed responses, reproducibly when seeded."""
+
+    def __init__(
+        self,
+        latency_ms: float = None,
+        jitter_ms: float = None,
+        error_rate: float = None,
+        timeout_rate: float = None,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = settings.replay_latency_ms if latency_ms is None else latency_ms
+        self.jitter_ms = settings.replay_jitter_ms if jitter_ms is None else jitter_ms
+        self.error_rate = settings.replay_error_rate if error_rate is None else error_rate
+        self.timeout_rate = settings.replay_timeout_rate if timeout_rate is None else timeout_rate
+        self.random = random.Random(settings.replay_seed if seed is None else seed)
+
+    async def apply(self) -> Optional[str]:
+        """
+        Sleep for the configured latency and pick the outcome of one request.
+
+        Returns:
+            "error", "timeout" or None for a normal response
+        """
+        delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        roll = self.random.random()
+        if roll < self.error_rate:
+            return ERROR
+        if roll < self.error_rate + self.timeout_rate:
+            return TIMEOUT
+        return None
@@ -1,12 +1,20 @@
 """
 Background scheduler service for automated tasks.
 """
+import random
+from datetime import date, datetime, timedelta, timezone
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.connection import async_session_factory
-from app.services.exchange_rate_service import exchange_rate_service
-from app.services.cache_service import cache_service
+from app.services.exchange_rate_service import exchange_rate_service, ingest_bases
+from app.services.backfill_service import backfill_service
+from app.services.cache_maintenance_service import cache_maintenance_service
+from app.services.leader_service import leader_service
+from app.services.job_run_service import job_run_service, record_job_metrics
 from app.core.config import settings
 import logging
 
@@ -33,9 +41,11 @@ class SchedulerService:
             logger.error(f"Invalid daily fetch time format: {settings.daily_fetch_time}")
             hour, minute = 6, 0  # Default to 6:00 AM
         
+        # Jobs fire in every process but only run (and are recorded) on the elected leader
         # Schedule daily rate fetching
         self.scheduler.add_job(
-            self._fetch_daily_rates_job,
+            self._run_job,
+            args=['daily_rate_fetch', self._fetch_daily_rates_job],
             trigger=CronTrigger(
                 hour=hour,
                 minute=minute,
@@ -47,11 +57,12 @@ class SchedulerService:
             coalesce=True
         )
         
-        # Schedule cache cleanup (runs every 4 hours)
+        # Schedule incremental cache maintenance (short, time-budgeted ticks)
         self.scheduler.add_job(
-            self._cleanup_old_cache_job,
-            trigger=CronTrigger(
-                hour='*/4',
+            self._run_job,
+            args=['cache_cleanup', self._cache_maintenance_job],
+            trigger=IntervalTrigger(
+                minutes=settings.cache_maintenance_interval_minutes,
                 timezone=settings.timezone
             ),
             id='cache_cleanup',
@@ -60,6 +71,16 @@ class SchedulerService:
             coalesce=True
         )
         
+        # Catch up on dates missed while the service was down
+        if settings.catch_up_on_startup:
+            self.scheduler.add_job(
+                self._run_job,
+                args=['startup_catch_up', self._catch_up_job],
+                trigger=DateTrigger(),
+                id='startup_catch_up',
+                replace_existing=True
+            )
+        
         self.scheduler.start()
         self.is_running = True
         logger.info(f"Scheduler started. Daily rate fetch scheduled at {settings.daily_fetch_time} {settings.timezone}")
@@ -73,9 +94,60 @@ class SchedulerService:
         self.is_running = False
         logger.info("Scheduler stopped")
     
-    async def _fetch_daily_rates_job(self):
-        """Background job to fetch daily exchange rates."""
-        logger.info("Starting scheduled daily rate fetch")
+    async def _run_job(self, job_id: str, func, *args):
+        """Run a job on the leader only and record the run in the job history."""
+        async def tracked():
+            async with job_run_service.track(job_id, leader_service.instance_id):
+                await func(*args)
+        
+        await leader_service.run_exclusive(job_id, tracked)
+    
+    def _retry_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter: a random delay in the upper half of the capped step."""
+        step = min(
+            settings.daily_fetch_retry_max_seconds,
+            settings.daily_fetch_retry_base_seconds * 2 ** attempt
+        )
+        return random.uniform(step / 2, step)
+    
+    def _schedule_retry(self, attempt: int, window_end: datetime = None) -> bool:
+        """
+        Schedule another daily fetch attempt unless the retry window has closed.
+        
+        Args:
+            attempt: Number of the failed attempt (0 for the scheduled run)
+            window_end: End of the retry window (defaults to now + retry window)
+            
+        Returns:
+            True if a retry was scheduled
+        """
+        now = datetime.now(timezone.utc)
+        window_end = window_end or now + timedelta(minutes=settings.daily_fetch_retry_window_minutes)
+        run_at = now + timedelta(seconds=self._retry_delay(attempt))
+        
+        if run_at > window_end:
+            logger.error(f"Daily rate fetch retry window closed after {attempt + 1} attempts")
+            return False
+        
+        self.scheduler.add_job(
+            self._run_job,
+            args=['daily_rate_fetch_retry', self._fetch_daily_rates_job, attempt + 1, window_end],
+            trigger=DateTrigger(run_date=run_at),
+            id='daily_rate_fetch_retry',
+            replace_existing=True
+        )
+        logger.warning(f"Daily rate fetch attempt {attempt + 1} failed, retrying at {run_at.isoformat()}")
+        return True
+    
+    async def _fetch_daily_rates_job(self, attempt: int = 0, window_end: datetime = None):
+        """
+        Background job to fetch daily exchange rates.
+        
+        A failed run schedules a retry with exponential backoff until the
+        retry window closes.
+        """
+        logger.info(f"Starting scheduled daily rate fetch (attempt {attempt + 1})")
+        success = False
         
         try:
             async with async_session_factory() as db:
@@ -88,39 +160,69 @@ class SchedulerService:
                     await self._warm_daily_cache(db)
                 else:
                     logger.error("Scheduled daily rate fetch failed")
+                    record_job_metrics(error="No rates fetched or stored")
                     
         except Exception as e:
             logger.error(f"Error in scheduled daily rate fetch: {e}")
+            record_job_metrics(error=str(e))
+        
+        if not success:
+            self._schedule_retry(attempt, window_end)
+        else:
+            # A pending retry from an earlier failure is no longer needed
+            try:
+                self.scheduler.remove_job('daily_rate_fetch_retry')
+            except JobLookupError:
+                pass
     
-    async def _cleanup_old_cache_job(self):
-        """Background job to clean up old cached data."""
-        logger.info("Starting cache cleanup job")
+    async def _catch_up_job(self):
+        """
+        Background job filling dates missed since the last stored snapshot.
+        
+        Past dates are loaded in one bulk backfill pass (bounded by
+        settings.catch_up_max_days); today's rates come from a regular daily
+        fetch so the hot path has a current snapshot.
+        """
+        base = settings.base_currency
+        today = date.today()
+        
+        async with async_session_factory() as db:
+            latest = await exchange_rate_service.get_latest_rate_date(db, base)
+        
+        if latest is not None and latest >= today:
+            logger.info(f"No missed dates for {base}: latest snapshot is {latest}")
+            return
         
+        if latest is not None and latest < today - timedelta(days=1):
+            start = max(latest + timedelta(days=1), today - timedelta(days=settings.catch_up_max_days))
+            end = today - timedelta(days=1)
+            logger.info(f"Catching up {base} for missed dates {start}..{end}")
+            # Materialize the same bases the daily ingest writes
+            status = await backfill_service.run_backfill_job(base, start, end, bases=ingest_bases(base))
+            if status is None or status.status != "completed":
+                record_job_metrics(error=f"Catch-up backfill for {start}..{end} did not complete")
+        
+        logger.info(f"Fetching today's rates for {base} (latest snapshot: {latest})")
+        await self._fetch_daily_rates_job()
+    
+    async def _cache_maintenance_job(self):
+        """Background job advancing the incremental cache maintenance walk."""
         try:
-            # Clean up expired cache entries and optimize memory
-            if await cache_service.is_connected():
-                # Get cache info before cleanup
-                stats_before = await cache_service.get_cache_stats()
-                
-                # Redis automatically handles TTL expiration, but we can optimize memory
-                await cache_service.redis_client.memory_purge()
-                
-                # Get stats after cleanup
-                stats_after = await cache_service.get_cache_stats()
-                
-                logger.info(f"Cache cleanup completed. Keys: {stats_before.get('total_keys', 0)} -> {stats_after.get('total_keys', 0)}")
-            else:
-                logger.warning("Cache cleanup skipped - Redis not connected")
-            
-            logger.info("Cache cleanup job completed")
-            
+            stats = await cache_maintenance_service.run_tick()
+            if stats["expired"] or stats["compacted"] or stats["passes"]:
+                logger.info(
+                    f"Cache maintenance: scanned {stats['scanned']}, expired {stats['expired']}, "
+                    f"compacted {stats['compacted']}, passes completed {stats['passes']}"
+                )
         except Exception as e:
-            logger.error(f"Error in cache cleanup job: {e}")
+            logger.error(f"Error in cache maintenance job: {e}")
+            record_job_metrics(error=str(e))
     
     async def _warm_daily_cache(self, db: AsyncSession):
         """
-        Warm the cache after daily rate fetch for optimal Flutter daily pattern.
-        Pre-loads all currency rates into cache for 24-hour access.
+        Check the cache after daily rate fetch for optimal Flutter daily pattern.
+        Ingest swaps in every cache tier itself; this reloads the base
+        snapshot if that swap did not happen (e.g. Redis was briefly down).
         """
         logger.info("Starting daily cache warming for Flutter optimization")
         
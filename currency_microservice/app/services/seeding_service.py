@@ -11,6 +11,7 @@ from sqlalchemy import select, delete
 from app.models.exchange_rate import ExchangeRateDB, ExchangeRateCreate
 from app.services.exchange_rate_service import exchange_rate_service
 from app.services.cache_service import cache_service
+from app.services.local_cache_service import local_cache_service
 from app.core.config import settings
 import logging
 
@@ -80,6 +81,7 @@ class SeedingService:
             
             # Clear cache to force fresh data loading
             await cache_service.clear_cache()
+            await local_cache_service.publish()
             
             # Warm cache with new data
             await self._warm_cache_with_test_data(db, base_currency)
@@ -0,0 +1,116 @@
+"""
+Double-buffered rate snapshot in shared memory for all workers on a host.
+"""
+import fcntl
+import struct
+import tempfile
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import List, NamedTuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# seq, version, slot, size
+CONTROL = struct.Struct("<QQIQ")
+SEQ = struct.Struct("<Q")
+
+
+class Control(NamedTuple):
+    """A consistent read of the control block."""
+    seq: int
+    version: int
+    slot: int
+    size: int
+
+
+def _attach(name: str, size: int) -> shared_memory.SharedMemory:
+    """Create a segment, or attach to it if another worker already did."""
+    try:
+        segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        segment = shared_memory.SharedMemory(name=name)
+        if segment.size < size:
+            segment.close()
+            raise ValueError(f"Shared memory segment {name} is smaller than {size} bytes")
+    # Segments outlive any one worker; stop the resource tracker unlinking them at exit
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+class SharedRateTable:
+    """
+    Two data slots and a control block, published under a seqlock.
+
+    The writer copies a new snapshot into the slot readers are not using,
+    then rewrites the control block (sequence, version, slot, size),
+    bumping the sequence to odd before the write and to even after it.
+    Readers never lock. They retry a control read that saw an odd or
+    changed sequence, and re-check the sequence after reading rates, so a
+    read that raced a publish is repeated against the new slot. Every
+    worker switches as soon as the control block flips. Writers on the
+    host serialize on a lock file.
+    """
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = capacity
+        self._control = _attach(f"{name}_ctl", CONTROL.size)
+        self._slots = [_attach(f"{name}_{slot}", capacity) for slot in (0, 1)]
+        self._lock_path = Path(tempfile.gettempdir()) / f"{name}.lock"
+
+    def seq(self) -> int:
+        """Current sequence number of the control block."""
+        return SEQ.unpack_from(self._control.buf, 0)[0]
+
+    def read_control(self) -> Control:
+        """Read the control block, retrying while a publish is rewriting it."""
+        while True:
+            control = Control(*CONTROL.unpack_from(self._control.buf, 0))
+            if control.seq % 2 == 0 and self.seq() == control.seq:
+                return control
+
+    def slot_view(self, control: Control) -> memoryview:
+        """Zero-copy view of the snapshot bytes a control read points at."""
+        return self._slots[control.slot].buf[:control.size]
+
+    def publish(self, version: int, data: bytes) -> bool:
+        """
+        Publish a snapshot if it is newer than the current one.
+
+        Returns:
+            True if the snapshot was published
+        """
+        if len(data) > self.capacity:
+            raise ValueError(f"Snapshot of {len(data)} bytes exceeds shared capacity {self.capacity}")
+
+        with open(self._lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            current = self.read_control()
+            if version <= current.version:
+                return False
+
+            slot = 1 - current.slot if current.version else 0
+            self._slots[slot].buf[:len(data)] = data
+
+            buf = self._control.buf
+            SEQ.pack_into(buf, 0, current.seq + 1)
+            CONTROL.pack_into(buf, 0, current.seq + 1, version, slot, len(data))
+            SEQ.pack_into(buf, 0, current.seq + 2)
+
+        logger.info(f"Published rate snapshot v{version} to shared memory slot {slot}")
+        return True
+
+    def close(self):
+        """Detach from the segments (they stay available to other workers)."""
+        for segment in [self._control] + self._slots:
+            try:
+                segment.close()
+            except BufferError:
+                # A mapped snapshot still holds a view; the OS unmaps at exit
+                pass
+
+    def unlink(self):
+        """Remove the segments from the host."""
+        for segment in [self._control] + self._slots:
+            shared_memory.SharedMemory(name=segment.name).unlink()
@@ -0,0 +1,420 @@
+"""
+Immutable, memory-mapped rate snapshot files for instant warm starts.
+"""
+import asyncio
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.currencies import currency_registry
+from app.models.exchange_rate import ExchangeRateDB
+from app.services.cache_service import cache_service
+from app.services.shared_rates import SharedRateTable
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FXSNAP"
+FORMAT_VERSION = 1
+# magic, format version, snapshot version, bases, currencies, dates
+HEADER = struct.Struct("<6sHQIII")
+RATE_PLACES = Decimal("0.000001")
+SEQLOCK_RETRIES = 3
+
+
+def _align(offset: int, size: int = 8) -> int:
+    """Round an offset up to the next multiple of size."""
+    return (offset + size - 1) // size * size
+
+
+class RateSnapshot:
+    """
+    A read-only view over one snapshot file.
+
+    Layout (little-endian): header, base indices (u32 each), currency codes
+    (3 ASCII bytes each), date ordinals (u32 each, ascending), then one
+    float64 matrix per base of shape dates x currencies, 8-byte aligned.
+    Missing rates are NaN. The matrices are read straight from the
+    underlying buffer (a mapped file or a shared memory view), so every
+    process on a host shares one copy.
+    """
+
+    def __init__(self, buffer, close: Callable[[], None] = None):
+        self._buf = buffer
+        self._close = close or (lambda: None)
+
+        magic, fmt, self.version, n_bases, n_currencies, n_dates = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            self.close()
+            raise ValueError("Unsupported snapshot format")
+
+        offset = HEADER.size
+        base_indices = struct.unpack_from(f"<{n_bases}I", buffer, offset)
+        offset += 4 * n_bases
+        codes = bytes(buffer[offset:offset + 3 * n_currencies]).decode("ascii")
+        offset += 3 * n_currencies
+        ordinals = struct.unpack_from(f"<{n_dates}I", buffer, offset)
+        offset += 4 * n_dates
+
+        self.currencies = [currency_registry.intern(codes[i:i + 3]) for i in range(0, len(codes), 3)]
+        self.dates = [date.fromordinal(ordinal) for ordinal in ordinals]
+        self._currency_index = {code: i for i, code in enumerate(self.currencies)}
+        self._base_index = {self.currencies[i]: n for n, i in enumerate(base_indices)}
+        self._date_index = {day: i for i, day in enumerate(self.dates)}
+        self._data_offset = _align(offset)
+        self._row = struct.Struct(f"<{n_currencies}d")
+
+    @classmethod
+    def open(cls, path: Path) -> "RateSnapshot":
+        """Memory-map a snapshot file."""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(mapped, mapped.close)
+        except ValueError:
+            raise ValueError(f"Unsupported snapshot file {path}")
+
+    def to_bytes(self) -> bytes:
+        """Copy of the encoded snapshot."""
+        return bytes(self._buf)
+
+    @property
+    def latest_date(self) -> Optional[date]:
+        """Newest date held in the snapshot."""
+        return self.dates[-1] if self.dates else None
+
+    def _row_offset(self, base: str, rate_date: date) -> Optional[int]:
+        """Byte offset of the rate row for a base and date, if present."""
+        base_index = self._base_index.get(base)
+        date_index = self._date_index.get(rate_date)
+        if base_index is None or date_index is None:
+            return None
+        return self._data_offset + (base_index * len(self.dates) + date_index) * self._row.size
+
+    def get_rate(self, base: str, target: str, rate_date: date) -> Optional[Decimal]:
+        """Read one stored rate."""
+        row = self._row_offset(base, rate_date)
+        target_index = self._currency_index.get(target)
+        if row is None or target_index is None:
+            return None
+        (value,) = struct.unpack_from("<d", self._buf, row + 8 * target_index)
+        return None if math.isnan(value) else Decimal(repr(value)).quantize(RATE_PLACES)
+
+    def get_rates(self, base: str, rate_date: date) -> Dict[str, Decimal]:
+        """Read every stored rate of a base currency on a date."""
+        row = self._row_offset(base, rate_date)
+        if row is None:
+            return {}
+        return {
+            currency: Decimal(repr(value)).quantize(RATE_PLACES)
+            for currency, value in zip(self.currencies, self._row.unpack_from(self._buf, row))
+            if not math.isnan(value)
+        }
+
+    def close(self):
+        """Release the underlying buffer."""
+        if isinstance(self._buf, memoryview):
+            self._buf.release()
+        self._close()
+
+    @staticmethod
+    def encode(version: int, rates: Dict[str, Dict[date, Dict[str, Decimal]]]) -> bytes:
+        """
+        Encode rates into the snapshot format.
+
+        Args:
+            version: Snapshot version, increasing with every write
+            rates: {base: {date: {target: rate}}}
+        """
+        bases = sorted(rates)
+        currencies = sorted(
+            set(bases)
+            | {target for by_date in rates.values() for targets in by_date.values() for target in targets},
+            key=currency_registry.sort_key
+        )
+        dates = sorted({day for by_date in rates.values() for day in by_date})
+        currency_index = {code: i for i, code in enumerate(currencies)}
+
+        matrix = array("d", [math.nan]) * (len(bases) * len(dates) * len(currencies))
+        for base_index, base in enumerate(bases):
+            for date_index, day in enumerate(dates):
+                row = (base_index * len(dates) + date_index) * len(currencies)
+                for target, rate in rates[base].get(day, {}).items():
+                    matrix[row + currency_index[target]] = float(rate)
+        if sys.byteorder == "big":
+            matrix.byteswap()
+
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, version, len(bases), len(currencies), len(dates))
+        index = (
+            struct.pack(f"<{len(bases)}I", *(currency_index[base] for base in bases))
+            + "".join(currencies).encode("ascii")
+            + struct.pack(f"<{len(dates)}I", *(day.toordinal() for day in dates))
+        )
+        padding = b"\0" * (_align(len(header) + len(index)) - len(header) - len(index))
+        return header + index + padding + matrix.tobytes()
+
+    @staticmethod
+    def write(path: Path, version: int, rates: Dict[str, Dict[date, Dict[str, Decimal]]]) -> Path:
+        """
+        Write a snapshot file atomically.
+
+        The file is written under a temporary name and renamed into place,
+        so processes that already mapped the previous file keep reading
+        its unchanged pages.
+        """
+        data = RateSnapshot.encode(version, rates)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return path
+
+
+class SnapshotService:
+    """
+    Serves rates from the mapped snapshot until the live tiers move past it.
+
+    Ingest writes a new file and publishes its version in Redis. A
+    background loop compares that version with the mapped one, remaps the
+    file when a newer one is on disk and otherwise stops serving from the
+    stale snapshot. A file found at startup only serves once Redis is
+    reachable and confirms no newer version was published, so a restart
+    with Redis down reads from the live tiers instead of an old file.
+
+    With a shared rate table, a newer file is copied into shared memory
+    once per host and every worker reads from there, switching to a new
+    snapshot as soon as it is published.
+    """
+
+    def __init__(self, path: str = None, shared: SharedRateTable = None):
+        self.path = Path(path or settings.snapshot_path)
+        self.shared = shared
+        self.snapshot: Optional[RateSnapshot] = None
+        self.superseded = False
+        self.verified = True
+        self._seq: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self) -> bool:
+        """Map the snapshot file (through shared memory when enabled) if it is newer."""
+        try:
+            snapshot = RateSnapshot.open(self.path)
+        except FileNotFoundError:
+            return self._follow_shared() if self.shared else False
+        except Exception as e:
+            logger.error(f"Failed to map rate snapshot {self.path}: {e}")
+            return False
+
+        if self.shared:
+            try:
+                self.shared.publish(snapshot.version, snapshot.to_bytes())
+            except Exception as e:
+                logger.error(f"Failed to publish rate snapshot to shared memory: {e}")
+            finally:
+                snapshot.close()
+            return self._follow_shared()
+
+        return self._swap(snapshot)
+
+    def _follow_shared(self) -> bool:
+        """Switch to the snapshot published in shared memory if it changed."""
+        control = self.shared.read_control()
+        self._seq = control.seq
+        if control.version == 0 or (self.snapshot and control.version == self.snapshot.version):
+            return False
+        return self._swap(RateSnapshot(self.shared.slot_view(control)))
+
+    def _swap(self, snapshot: RateSnapshot) -> bool:
+        """Serve from snapshot if it is newer than the current one."""
+        if self.snapshot and snapshot.version <= self.snapshot.version:
+            snapshot.close()
+            return False
+
+        previous, self.snapshot = self.snapshot, snapshot
+        self.superseded = False
+        if previous:
+            previous.close()
+        logger.info(f"Mapped rate snapshot v{snapshot.version} ({len(snapshot.dates)} dates, latest {snapshot.latest_date})")
+        return True
+
+    async def start(self):
+        """Map the snapshot on disk and start following the live version."""
+        if not settings.snapshot_enabled:
+            return
+        if self._task and not self._task.done():
+            logger.warning("Snapshot sync is already running")
+            return
+
+        if settings.shared_rates_enabled and self.shared is None:
+            try:
+                self.shared = SharedRateTable(settings.shared_rates_name, settings.shared_rates_capacity_bytes)
+            except Exception as e:
+                logger.error(f"Shared rate table unavailable, mapping the snapshot per worker: {e}")
+
+        # The file on disk may predate the published version; check before serving it
+        self.load()
+        self.verified = False
+        await self.sync()
+        if self.snapshot and not self.verified:
+            logger.warning("Redis unreachable; rate snapshot unconfirmed, serving from live tiers")
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        """Stop the sync loop and release the snapshot."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.close()
+
+    def close(self):
+        """Release the current snapshot and detach from shared memory."""
+        if self.snapshot:
+            self.snapshot.close()
+            self.snapshot = None
+        if self.shared:
+            self.shared.close()
+            self.shared = None
+
+    async def _sync_loop(self):
+        """Check the live snapshot version forever at the configured interval."""
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Snapshot sync failed: {e}")
+            await asyncio.sleep(settings.snapshot_sync_interval_seconds)
+
+    async def sync(self):
+        """Follow the version published by ingest, remapping or retiring the snapshot."""
+        live_version = await cache_service.get_snapshot_version()
+        if live_version is None:
+            # Nothing published yet confirms the file, an unreachable Redis does not
+            if not self.verified and await cache_service.is_connected():
+                self.verified = True
+            return
+        self.verified = True
+        if self.snapshot and live_version <= self.snapshot.version:
+            return
+
+        self.load()
+        if self.snapshot is None or self.snapshot.version < live_version:
+            if not self.superseded:
+                logger.info(f"Rate snapshot superseded by v{live_version}; serving from live tiers")
+            self.superseded = True
+
+    def retire(self, dates: Optional[Iterable[date]] = None, version: Optional[int] = None):
+        """
+        Stop serving the mapped snapshot after rates it covers were changed.
+
+        Args:
+            dates: Changed dates (all dates when None); dates older than the
+                snapshot leave it in service
+            version: Snapshot version that already includes the change
+        """
+        snapshot = self.snapshot
+        if snapshot is None or self.superseded:
+            return
+        if version is not None and snapshot.version >= version:
+            return
+        if dates is not None and (not snapshot.dates or all(day < snapshot.dates[0] for day in dates)):
+            return
+
+        self.superseded = True
+        logger.info(f"Rate snapshot v{snapshot.version} retired after a rate change; serving from live tiers")
+
+    def _active(self) -> Optional[RateSnapshot]:
+        """The current snapshot, unless disabled, unconfirmed or superseded."""
+        if not settings.snapshot_enabled:
+            return None
+        if self.shared:
+            self._follow_shared()
+        return None if self.superseded or not self.verified else self.snapshot
+
+    def _read(self, read: Callable[[RateSnapshot], Any]) -> Any:
+        """Read from the current snapshot, retrying if a shared publish raced the read."""
+        for _ in range(SEQLOCK_RETRIES):
+            snapshot = self._active()
+            if snapshot is None:
+                return None
+            value = read(snapshot)
+            if not self.shared or self.shared.seq() == self._seq:
+                return value
+        return None
+
+    def get_rate(self, base: str, target: str, rate_date: date) -> Optional[Decimal]:
+        """Read a stored rate from the snapshot."""
+        return self._read(lambda snapshot: snapshot.get_rate(base, target, rate_date))
+
+    def get_rates(self, base: str, rate_date: date) -> Optional[Dict[str, Decimal]]:
+        """Read every stored rate of a base currency on a date from the snapshot."""
+        return self._read(lambda snapshot: snapshot.get_rates(base, rate_date))
+
+    def get_latest_rates(self, base: str) -> Optional[Tuple[date, Dict[str, Decimal]]]:
+        """Read the newest rates of a base currency as (date, {target: rate})."""
+        def read(snapshot: RateSnapshot):
+            if snapshot.latest_date is None:
+                return None
+            rates = snapshot.get_rates(base, snapshot.latest_date)
+            return (snapshot.latest_date, rates) if rates else None
+        return self._read(read)
+
+    async def publish(self, db: AsyncSession, rate_date: date, bases: List[str]) -> Optional[int]:
+        """
+        Write a snapshot of the stored rates ending at rate_date and announce it.
+
+        Covers settings.snapshot_days dates for the given bases, maps the new
+        file in this process and publishes its version for other workers.
+
+        Returns:
+            The new version, or None if nothing was written
+        """
+        start = rate_date - timedelta(days=settings.snapshot_days - 1)
+        result = await db.execute(
+            select(
+                ExchangeRateDB.base_currency,
+                ExchangeRateDB.target_currency,
+                ExchangeRateDB.date,
+                ExchangeRateDB.rate,
+            ).where(
+                and_(
+                    ExchangeRateDB.base_currency.in_(bases),
+                    ExchangeRateDB.date.between(start, rate_date)
+                )
+            )
+        )
+
+        rates: Dict[str, Dict[date, Dict[str, Decimal]]] = {}
+        for base, target, day, rate in result:
+            rates.setdefault(base, {}).setdefault(day, {})[currency_registry.intern(target)] = rate
+        if not rates:
+            return None
+
+        version = time.time_ns() // 1_000_000
+        RateSnapshot.write(self.path, version, rates)
+        self.load()
+        await cache_service.set_snapshot_version(version)
+        logger.info(f"Published rate snapshot v{version} for {start}..{rate_date}")
+        return version
+
+
+# Global snapshot service instance
+snapshot_service = SnapshotService()
@@ -0,0 +1,120 @@
+"""
+Local stand-in for upstream rate providers, serving recorded payloads.
+
+Speaks the ExchangeRate-API v6, Fixer and free API wire formats so the real
+provider clients can be exercised offline. Point the service at it with:
+
+    EXCHANGE_API_BASE_URL=http://localhost:9000/v6
+    FIXER_API_BASE_URL=http://localhost:9000/fixer
+    FREE_API_BASE_URL=http://localhost:9000/free
+
+and start it with `python -m app.cli stub-upstream --port 9000`.
+"""
+import asyncio
+import time
+from datetime import date
+from typing import Optional
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.services.replay_service import TIMEOUT, FaultInjector, ReplayStore
+
+
+def create_stub_app(
+    store: ReplayStore = None,
+    faults: FaultInjector = None,
+    timeout_seconds: float = None
+) -> FastAPI:
+    """
+    Build the stub ASGI app.
+
+    Args:
+        store: Recorded payloads to serve
+        faults: Latency, error and timeout injection applied to every request
+        timeout_seconds: How long an injected timeout stalls before answering
+    """
+    store = store or ReplayStore()
+    faults = faults or FaultInjector()
+    stall = timeout_seconds if timeout_seconds is not None else settings.http_read_timeout_seconds * 2
+
+    app = FastAPI(title="Upstream provider stub")
+
+    async def inject_fault() -> Optional[JSONResponse]:
+        """Apply injected latency; return an error response or stall when a fault is drawn."""
+        outcome = await faults.apply()
+        if outcome == TIMEOUT:
+            await asyncio.sleep(stall)
+        if outcome is not None:
+            return JSONResponse(status_code=503, content={"error": f"injected {outcome}"})
+        return None
+
+    def exchangerate_payload(base: str, rate_date: Optional[date]):
+        """Build an ExchangeRate-API v6 response body."""
+        rates = store.load(base, rate_date)
+        if rates is None:
+            return {"result": "error", "error-type": "unsupported-code"}
+        payload = {
+            "result": "success",
+            "base_code": base.upper(),
+            "conversion_rates": {currency: float(rate) for currency, rate in rates.items()},
+        }
+        if rate_date:
+            payload.update(year=rate_date.year, month=rate_date.month, day=rate_date.day)
+        else:
+            payload["time_last_update_unix"] = int(time.time())
+        return payload
+
+    @app.get("/v6/{api_key}/latest/{base}")
+    async def exchangerate_latest(api_key: str, base: str):
+        return await inject_fault() or exchangerate_payload(base, None)
+
+    @app.get("/v6/{api_key}/history/{base}/{year}/{month}/{day}")
+    async def exchangerate_history(api_key: str, base: str, year: int, month: int, day: int):
+        return await inject_fault() or exchangerate_payload(base, date(year, month, day))
+
+    async def fixer_payload(base: str, symbols: Optional[str], rate_date: Optional[date]):
+        """Build a Fixer response body, filtered to the requested symbols."""
+        fault = await inject_fault()
+        if fault:
+            return fault
+        rates = store.load(base, rate_date)
+        if rates is None:
+            return {"success": False, "error": {"code": 201, "info": f"Invalid base currency {base}"}}
+        wanted = set(symbols.split(",")) if symbols else None
+        return {
+            "success": True,
+            "historical": rate_date is not None,
+            "timestamp": int(time.time()),
+            "base": base.upper(),
+            "date": (rate_date or date.today()).isoformat(),
+            "rates": {
+                currency: float(rate) for currency, rate in rates.items()
+                if wanted is None or currency in wanted
+            },
+        }
+
+    @app.get("/fixer/latest")
+    async def fixer_latest(base: str = Query("EUR"), symbols: Optional[str] = None, access_key: str = None):
+        return await fixer_payload(base, symbols, None)
+
+    @app.get("/fixer/{rate_date}")
+    async def fixer_historical(rate_date: date, base: str = Query("EUR"), symbols: Optional[str] = None, access_key: str = None):
+        return await fixer_payload(base, symbols, rate_date)
+
+    @app.get("/free/latest/{base}")
+    async def free_latest(base: str):
+        fault = await inject_fault()
+        if fault:
+            return fault
+        rates = store.load(base, None)
+        if rates is None:
+            return JSONResponse(status_code=404, content={"error": f"Unknown base {base}"})
+        return {
+            "base": base.upper(),
+            "date": date.today().isoformat(),
+            "rates": {currency: float(rate) for currency, rate in rates.items()},
+        }
+
+    return app
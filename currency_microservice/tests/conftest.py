@@ -19,6 +19,24 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def reset_provider_health():
+    """Start every test with closed circuit breakers and no latency history."""
+    from app.services.provider_health_service import provider_health_service
+    provider_health_service.reset()
+    yield
+    provider_health_service.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_local_cache():
+    """Start every test with an empty in-process rate cache."""
+    from app.services.local_cache_service import local_cache_service
+    local_cache_service.invalidate()
+    yield
+    local_cache_service.invalidate()
+
+
 @pytest.fixture
 def mock_settings():
     """Mock settings for testing."""
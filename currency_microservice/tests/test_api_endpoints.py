@@ -4,12 +4,15 @@ Tests for API endpoints.
 import pytest
 import asyncio
 from decimal import Decimal
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
 from fastapi import status
+from starlette.websockets import WebSocketDisconnect
 
+from app.core.config import settings
 from app.main import app
+from app.services.health_service import health_service
 from app.models.exchange_rate import ExchangeRateResponse, CurrencyConversion, HealthStatus
 
 
@@ -62,45 +65,74 @@ def sample_latest_rates():
 
 
 class TestHealthEndpoint:
-    """Test health check endpoint."""
+    """Test health check endpoints served from the background prober."""
     
-    def test_health_check_success(self, client):
+    @pytest.fixture
+    def probe(self):
+        """Publish a prober result for the given dependency state."""
+        def run(database=True, redis=True, latest_rate_date=None):
+            latest_rate_date = latest_rate_date or date.today()
+            with patch.object(health_service, '_probe_database', AsyncMock(
+                return_value=(database, latest_rate_date if database else None)
+            )):
+                with patch('app.services.health_service.cache_service') as mock_cache:
+                    mock_cache.is_connected = AsyncMock(return_value=redis)
+                    asyncio.run(health_service.probe())
+        yield run
+        health_service.status = None
+    
+    def test_health_check_success(self, client, probe):
         """Test successful health check."""
-        with patch('app.api.endpoints.check_database_connection') as mock_db:
-            with patch('app.api.endpoints.cache_service') as mock_cache:
-                mock_db.return_value = True
-                mock_cache.is_connected.return_value = True
-                
-                response = client.get("/api/v1/health")
-                
-                assert response.status_code == status.HTTP_200_OK
-                data = response.json()
-                assert data["status"] == "healthy"
-                assert data["database"] is True
-                assert data["redis"] is True
-                assert data["version"] == "1.0.0"
+        probe()
+        
+        response = client.get("/api/v1/health")
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["status"] == "healthy"
+        assert data["database"] is True
+        assert data["redis"] is True
+        assert data["rates_fresh"] is True
+        assert data["version"] == settings.version
     
-    def test_health_check_database_failure(self, client):
+    def test_health_check_database_failure(self, client, probe):
         """Test health check with database failure."""
-        with patch('app.api.endpoints.check_database_connection') as mock_db:
-            with patch('app.api.endpoints.cache_service') as mock_cache:
-                mock_db.return_value = False
-                mock_cache.is_connected.return_value = True
-                
-                response = client.get("/api/v1/health")
-                
-                assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        probe(database=False)
+        
+        response = client.get("/api/v1/health")
+        
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["status"] == "unhealthy"
+        assert client.get("/api/v1/readyz").status_code == status.HTTP_503_SERVICE_UNAVAILABLE
     
-    def test_health_check_redis_failure(self, client):
+    def test_health_check_redis_failure(self, client, probe):
         """Test health check with Redis failure."""
-        with patch('app.api.endpoints.check_database_connection') as mock_db:
-            with patch('app.api.endpoints.cache_service') as mock_cache:
-                mock_db.return_value = True
-                mock_cache.is_connected.return_value = False
-                
-                response = client.get("/api/v1/health")
-                
-                assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        probe(redis=False)
+        
+        response = client.get("/api/v1/health")
+        
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["status"] == "degraded"
+    
+    def test_health_check_stale_rates(self, client, probe):
+        """Test stale rates make /health answer 503 degraded while /readyz stays ready."""
+        probe(latest_rate_date=date.today() - timedelta(days=settings.health_max_rate_age_days + 1))
+        
+        response = client.get("/api/v1/health")
+        
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        data = response.json()
+        assert data["status"] == "degraded"
+        assert data["rates_fresh"] is False
+        assert client.get("/api/v1/readyz").status_code == status.HTTP_200_OK
+    
+    def test_health_check_before_first_probe(self, client):
+        """Test the health endpoints report starting until the prober has run."""
+        response = client.get("/api/v1/health")
+        
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["status"] == "starting"
+        assert client.get("/api/v1/livez").status_code == status.HTTP_200_OK
 
 
 class TestCurrencyEndpoints:
@@ -359,6 +391,23 @@ class TestAuthenticationAndRateLimit:
             
             # Should not be 401 (may be other errors due to mocking)
             assert response.status_code != status.HTTP_401_UNAUTHORIZED
+    
+    def test_websocket_stream_is_rate_limited(self, client):
+        """Test WebSocket handshakes count against the hourly limit like other requests."""
+        auth_headers = {"Authorization": f"Bearer {settings.api_key}"}
+        with patch.dict('app.api.auth.rate_limiter_storage', clear=True):
+            with patch('app.api.auth.settings.rate_limit_per_hour', 1):
+                with patch('app.api.endpoints.rate_stream_service') as mock_stream:
+                    mock_stream.accepting.return_value = True
+                    with client.websocket_connect("/api/v1/rates/stream/ws", headers=auth_headers):
+                        pass
+                    
+                    with pytest.raises(WebSocketDisconnect) as closed:
+                        with client.websocket_connect("/api/v1/rates/stream/ws", headers=auth_headers):
+                            pass
+        
+        assert closed.value.code == 1008
+        mock_stream.connection.assert_called_once_with()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,227 @@
+"""
+Tests for the historical backfill service.
+"""
+import pytest
+import asyncio
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.services.backfill_service import BackfillService, ProviderBudget
+from app.services.cache_service import CacheService
+from app.services.exchange_rate_service import exchange_rate_service
+from app.services.memory_cache import MemoryCache
+from app.models.backfill import BackfillCheckpointDB
+from app.models.exchange_rate import ExchangeRateDB
+
+
+class StubExternalAPI:
+    """Local stand-in for ExternalAPIService serving deterministic history."""
+
+    def __init__(self, failing_providers=(), missing_dates=()):
+        self.failing_providers = set(failing_providers)
+        self.missing_dates = set(missing_dates)
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get_providers(self):
+        return {"exchangerate_api": None, "fixer_io": None, "free_api": None}
+
+    async def fetch_from_provider(self, provider, base, rate_date=None, before_call=None):
+        if before_call is not None:
+            await before_call()
+        self.calls.append((provider, rate_date))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        if provider in self.failing_providers or rate_date in self.missing_dates:
+            return None
+        return {base: Decimal("1.0"), "EUR": Decimal("0.85"), "GBP": Decimal("0.75")}
+
+    async def validate_rate(self, base, target, rate):
+        return rate > 0
+
+
+@pytest.fixture
+def mock_db():
+    """Create mock database session with no existing checkpoint."""
+    db = AsyncMock()
+    db.add = MagicMock()
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = None
+    db.execute.return_value = result
+    return db
+
+
+@pytest.mark.asyncio
+async def test_backfill_loads_every_day_in_batches(mock_db):
+    """Test backfill fetches each day once and stores one upsert per batch."""
+    stub = StubExternalAPI()
+    service = BackfillService(external_api=stub)
+    start = date(2024, 1, 1)
+    end = date(2024, 1, 10)
+
+    status = await service.run_backfill(mock_db, "USD", start, end, concurrency=4, batch_days=4)
+
+    assert status.status == "completed"
+    assert status.completed_through == end
+    assert status.days_loaded == 10
+    assert status.days_failed == 0
+    assert status.rates_written == 20  # EUR + GBP per day, base skipped
+    assert len(stub.calls) == 10
+    assert stub.max_in_flight <= 4
+    # 1 checkpoint lookup + 3 batch upserts (4 + 4 + 2 days)
+    assert mock_db.execute.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_backfill_materializes_extra_bases(mock_db):
+    """Test each fetched anchor snapshot is rebased into rows for every requested base."""
+    service = BackfillService(external_api=StubExternalAPI())
+
+    status = await service.run_backfill(mock_db, "USD", date(2024, 1, 1), date(2024, 1, 1), bases=["USD", "EUR"])
+
+    assert status.rates_written == 4
+    params = mock_db.execute.call_args_list[1].args[0].compile().params
+    pairs = sorted(
+        (params[key], params[key.replace("base_currency", "target_currency")])
+        for key in params if key.startswith("base_currency")
+    )
+    assert pairs == [("EUR", "GBP"), ("EUR", "USD"), ("USD", "EUR"), ("USD", "GBP")]
+
+
+@pytest.mark.asyncio
+async def test_backfill_falls_back_to_next_provider(mock_db):
+    """Test a failing provider is skipped for the next one."""
+    stub = StubExternalAPI(failing_providers={"exchangerate_api"})
+    service = BackfillService(external_api=stub)
+
+    status = await service.run_backfill(mock_db, "USD", date(2024, 1, 1), date(2024, 1, 2))
+
+    assert status.days_loaded == 2
+    assert [p for p, _ in stub.calls].count("fixer_io") == 2
+
+
+@pytest.mark.asyncio
+async def test_backfill_counts_days_without_data(mock_db):
+    """Test days no provider can serve are counted as failed and not skipped by the checkpoint."""
+    missing = date(2024, 1, 2)
+    stub = StubExternalAPI(missing_dates={missing})
+    service = BackfillService(external_api=stub)
+
+    status = await service.run_backfill(mock_db, "USD", date(2024, 1, 1), date(2024, 1, 3))
+
+    assert status.status == "incomplete"
+    assert status.days_loaded == 2
+    assert status.days_failed == 1
+    assert status.completed_through == date(2024, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_backfill_rerun_retries_failed_days(mock_db):
+    """Test rerunning an incomplete range fetches again from the first failed day."""
+    stub = StubExternalAPI(missing_dates={date(2024, 1, 2)})
+    service = BackfillService(external_api=stub)
+    first = await service.run_backfill(mock_db, "USD", date(2024, 1, 1), date(2024, 1, 4), batch_days=2)
+    assert first.completed_through == date(2024, 1, 1)
+
+    checkpoint = mock_db.add.call_args[0][0]
+    mock_db.execute.return_value.scalar_one_or_none.return_value = checkpoint
+    stub.missing_dates.clear()
+    stub.calls.clear()
+
+    status = await service.run_backfill(mock_db, "USD", date(2024, 1, 1), date(2024, 1, 4), batch_days=2)
+
+    assert sorted(d for _, d in stub.calls) == [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)]
+    assert status.status == "completed"
+    assert status.completed_through == date(2024, 1, 4)
+    assert (status.days_loaded, status.days_failed) == (4, 0)
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_after_checkpoint(mock_db):
+    """Test an interrupted backfill resumes after the last stored batch."""
+    checkpoint = BackfillCheckpointDB(
+        base_currency="USD",
+        start_date=date(2024, 1, 1),
+        end_date=date(2024, 1, 10),
+        completed_through=date(2024, 1, 7),
+        status="failed",
+        days_loaded=7,
+        days_failed=0,
+        rates_written=14,
+    )
+    mock_db.execute.return_value.scalar_one_or_none.return_value = checkpoint
+    stub = StubExternalAPI()
+    service = BackfillService(external_api=stub)
+
+    status = await service.run_backfill(mock_db, "USD", date(2024, 1, 1), date(2024, 1, 10))
+
+    fetched = sorted(d for _, d in stub.calls)
+    assert fetched == [date(2024, 1, 8), date(2024, 1, 9), date(2024, 1, 10)]
+    assert status.days_loaded == 10
+    assert status.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_backfill_rejects_inverted_range(mock_db):
+    """Test start after end is rejected."""
+    service = BackfillService(external_api=StubExternalAPI())
+
+    with pytest.raises(ValueError):
+        await service.run_backfill(mock_db, "USD", date(2024, 2, 1), date(2024, 1, 1))
+
+
+@pytest.mark.asyncio
+async def test_provider_budget_limits_request_rate():
+    """Test the token bucket spaces requests to the configured rate."""
+    budget = ProviderBudget(rate_per_second=50)
+
+    started = time.monotonic()
+    for _ in range(6):
+        await budget.acquire()
+    elapsed = time.monotonic() - started
+
+    # First token is immediate, the remaining five need ~0.1s at 50/s
+    assert elapsed >= 0.08
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+
+@pytest.mark.asyncio
+async def test_backfill_drops_cached_stats_of_rewritten_periods():
+    """Test closed-period statistics served before a backfill reflect the rewritten rates."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(ExchangeRateDB.__table__.create)
+    cache = CacheService()
+    cache.redis_client = MemoryCache(max_entries=100)
+    days = [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)]
+
+    def rows(rate):
+        return [
+            {"base_currency": "USD", "target_currency": "EUR", "rate": Decimal(rate), "date": day}
+            for day in days
+        ]
+
+    with patch('app.services.exchange_rate_service.settings.storage_backend', "embedded"), \
+            patch('app.services.exchange_rate_service.cache_service', cache), \
+            patch('app.services.backfill_service.currency_service.discover', AsyncMock(return_value=[])):
+        async with async_sessionmaker(engine)() as db:
+            await exchange_rate_service.bulk_upsert_rates(db, rows("0.90"))
+            await db.commit()
+            stats = await exchange_rate_service.get_rate_statistics(db, "USD", "EUR", "month", date(2024, 1, 1), date(2024, 1, 31))
+            assert stats.periods[0].average == Decimal("0.900000")
+
+            await BackfillService()._store_batch(db, rows("1.00"), MagicMock(rates_written=0))
+            stats = await exchange_rate_service.get_rate_statistics(db, "USD", "EUR", "month", date(2024, 1, 1), date(2024, 1, 31))
+
+    await engine.dispose()
+    assert stats.periods[0].average == Decimal("1.000000")
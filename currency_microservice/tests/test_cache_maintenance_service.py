@@ -0,0 +1,78 @@
+"""
+Tests for incremental cache maintenance.
+"""
+import pytest
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.cache_maintenance_service import CacheMaintenanceService, CURSOR_KEY
+
+
+TODAY = date(2024, 6, 30)
+
+
+@pytest.fixture
+def maintenance():
+    """Create cache maintenance service instance."""
+    return CacheMaintenanceService()
+
+
+@pytest.fixture
+def mock_cache():
+    """Mock cache service with a connected Redis client."""
+    with patch('app.services.cache_maintenance_service.cache_service') as mock_cache:
+        mock_cache.is_connected = AsyncMock(return_value=True)
+        mock_cache.compact_rates = AsyncMock(side_effect=lambda pairs, expire_at: len(pairs))
+        mock_cache.redis_client = MagicMock()
+        mock_cache.redis_client.get = AsyncMock(return_value=None)
+        mock_cache.redis_client.set = AsyncMock()
+        mock_cache.redis_client.unlink = AsyncMock()
+        yield mock_cache
+
+
+@pytest.mark.asyncio
+async def test_tick_expires_and_compacts(maintenance, mock_cache):
+    """Test old dates are dropped and older per-pair keys are compacted."""
+    old = (TODAY - timedelta(days=60)).isoformat()
+    recent = (TODAY - timedelta(days=3)).isoformat()
+    mock_cache.redis_client.scan = AsyncMock(return_value=(0, [
+        f"rate:USD:EUR:{old}",
+        f"cross_rates:{old}",
+        f"rate:USD:GBP:{recent}",
+        f"rate:USD:JPY:{TODAY.isoformat()}",
+        "latest_rates:USD",
+    ]))
+
+    stats = await maintenance.run_tick(TODAY)
+
+    mock_cache.redis_client.unlink.assert_awaited_once_with(f"rate:USD:EUR:{old}", f"cross_rates:{old}")
+    pairs = mock_cache.compact_rates.call_args.args[0]
+    assert pairs == [("USD", "GBP", TODAY - timedelta(days=3))]
+    assert stats == {"scanned": 5, "expired": 2, "compacted": 1, "passes": 1}
+    mock_cache.redis_client.set.assert_awaited_once_with(CURSOR_KEY, 0)
+
+
+@pytest.mark.asyncio
+async def test_tick_resumes_cursor_and_respects_budget(maintenance, mock_cache):
+    """Test a tick resumes from the stored cursor and stops when its budget is spent."""
+    mock_cache.redis_client.get.return_value = "42"
+    mock_cache.redis_client.scan = AsyncMock(return_value=(77, ["latest_rates:USD"]))
+
+    with patch('app.services.cache_maintenance_service.settings.cache_maintenance_budget_ms', 0):
+        stats = await maintenance.run_tick(TODAY)
+
+    mock_cache.redis_client.scan.assert_awaited_once()
+    assert mock_cache.redis_client.scan.call_args.kwargs["cursor"] == 42
+    assert stats["passes"] == 0
+    mock_cache.redis_client.set.assert_awaited_once_with(CURSOR_KEY, 77)
+
+
+@pytest.mark.asyncio
+async def test_tick_skipped_without_redis(maintenance):
+    """Test maintenance is a no-op while Redis is unavailable."""
+    with patch('app.services.cache_maintenance_service.cache_service') as mock_cache:
+        mock_cache.is_connected = AsyncMock(return_value=False)
+
+        stats = await maintenance.run_tick(TODAY)
+
+    assert stats["scanned"] == 0
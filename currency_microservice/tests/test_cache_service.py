@@ -8,6 +8,7 @@ from datetime import date, datetime
 from decimal import Decimal
 
 from app.services.cache_service import CacheService
+from app.services.memory_cache import MemoryCache
 from app.core.config import settings
 
 
@@ -179,5 +180,45 @@ async def test_cache_operations_when_disconnected(cache_service):
     assert await cache_service.clear_cache() is False
 
 
+@pytest.mark.asyncio
+async def test_get_rate_reads_compacted_hash_for_old_dates(cache_service):
+    """Test lookups for older dates fall back to the per-date hash."""
+    cache_service.redis_client.ping.return_value = True
+    cache_service.redis_client.get.return_value = None
+    cache_service.redis_client.hget.return_value = "0.85"
+
+    rate = await cache_service.get_rate("USD", "EUR", date(2023, 12, 1))
+
+    assert rate == Decimal("0.85")
+    cache_service.redis_client.hget.assert_awaited_once_with("rates:2023-12-01", "USD:EUR")
+
+
+@pytest.mark.asyncio
+async def test_clear_cache_keeps_coordination_state():
+    """Test a cache clear drops cached data but not quotas, leases, fencing tokens or cursors."""
+    service = CacheService()
+    service.redis_client = MemoryCache(max_entries=100)
+    kept = {
+        "quota:exchangerate:day:2024-06-28": "12",
+        "leader:ingest": "worker-1",
+        "leader:ingest:token": "7",
+        "maintenance:cache:cursor": "40",
+        "snapshot:version": "3",
+    }
+    await service.redis_client.mset({
+        **kept,
+        "rate:USD:EUR:2024-06-28": "0.93",
+        "latest_rates:USD": "{}",
+        "response:rates:USD": "{}",
+        "stats:USD:EUR:month:2024-05-01": "{}",
+        "provider_response:fixer:USD:2024-06-28": "{}",
+    })
+    await service.redis_client.hset("rates:2024-06-01", "USD:EUR", "0.92")
+    
+    assert await service.clear_cache() is True
+    
+    assert sorted(await service.redis_client.keys()) == sorted(kept)
+
+
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
@@ -0,0 +1,54 @@
+"""
+Tests for the interned currency registry.
+"""
+from app.core.currencies import CurrencyRegistry
+
+
+def test_codes_get_dense_ids_in_configured_order():
+    """Test ids follow the configured order and duplicates keep their first slot."""
+    registry = CurrencyRegistry(["USD", "eur", "GBP", "EUR"])
+
+    assert registry.codes == ("USD", "EUR", "GBP")
+    assert [registry.id_of(code) for code in registry] == [0, 1, 2]
+    assert registry.code_of(2) == "GBP"
+    assert registry.display == "USD, EUR, GBP"
+
+
+def test_any_casing_resolves_to_the_interned_code():
+    """Test lookups are case-insensitive and return the shared string object."""
+    registry = CurrencyRegistry(["USD", "EUR"])
+    canonical = registry.codes[1]
+
+    for spelling in ("EUR", "eur", "Eur", "eUr"):
+        assert spelling in registry
+        assert registry.normalize(spelling) is canonical
+    assert registry.id_of("usd") == 0
+    assert registry.intern("".join(["E", "U", "R"])) is canonical
+
+
+def test_unsupported_codes():
+    """Test unknown codes are rejected but still pass through intern."""
+    registry = CurrencyRegistry(["USD"])
+
+    assert "XYZ" not in registry
+    assert registry.normalize("XYZ") is None
+    assert registry.id_of("XYZ") is None
+    assert registry.intern("XYZ") == "XYZ"
+    assert registry.json("XYZ") == '"XYZ"'
+
+
+def test_sort_key_orders_canonically_with_unknown_codes_last():
+    """Test matrices can order currencies by registry id."""
+    registry = CurrencyRegistry(["USD", "EUR", "GBP"])
+
+    assert sorted(["ZAR", "GBP", "ABC", "USD"], key=registry.sort_key) == ["USD", "GBP", "ABC", "ZAR"]
+
+
+def test_load_replaces_the_registered_codes():
+    """Test reloading swaps codes, ids and JSON fragments together."""
+    registry = CurrencyRegistry(["USD"])
+    registry.load(["JPY", "USD"])
+
+    assert registry.codes == ("JPY", "USD")
+    assert registry.id_of("USD") == 1
+    assert registry.json("JPY") == '"JPY"'
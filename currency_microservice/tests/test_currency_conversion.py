@@ -8,7 +8,7 @@ from datetime import date, datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from app.services.exchange_rate_service import ExchangeRateService
-from app.models.exchange_rate import ExchangeRateCreate, ExchangeRateResponse, CurrencyConversion
+from app.models.exchange_rate import ExchangeRateCreate, ExchangeRateResponse, CurrencyConversion, HistoricalConversionItem
 
 
 @pytest.fixture
@@ -424,5 +424,93 @@ class TestConversionValidation:
             assert result.converted_amount == Decimal("-85.00")
 
 
+class TestHistoricalBatchConversion:
+    """Test batch conversion of dated amounts."""
+    
+    @staticmethod
+    def _rows(*rows):
+        result = MagicMock()
+        result.all.return_value = list(rows)
+        return result
+    
+    @pytest.mark.asyncio
+    async def test_batch_uses_single_range_query(self, exchange_service, mock_db):
+        """Test every item is resolved from one database query."""
+        day1 = date(2023, 3, 1)
+        day2 = date(2023, 3, 2)
+        mock_db.execute.return_value = self._rows(
+            (day1, "USD", "EUR", Decimal("0.90")),
+            (day2, "USD", "EUR", Decimal("0.80")),
+        )
+        items = [
+            HistoricalConversionItem(amount=Decimal("100"), currency="USD", date=day1),
+            HistoricalConversionItem(amount=Decimal("100"), currency="USD", date=day2),
+            HistoricalConversionItem(amount=Decimal("50"), currency="USD", date=day1),
+        ]
+        
+        result = await exchange_service.convert_historical(mock_db, items, "EUR")
+        
+        assert mock_db.execute.call_count == 1
+        assert result.converted == 3
+        assert [r.converted_amount for r in result.results] == [Decimal("90.00"), Decimal("80.00"), Decimal("45.00")]
+        assert [r.rate_date for r in result.results] == [day1, day2, day1]
+    
+    @pytest.mark.asyncio
+    async def test_batch_inverse_and_cross_rates(self, exchange_service, mock_db):
+        """Test inverse rates and crosses through the base currency."""
+        day = date(2023, 3, 1)
+        mock_db.execute.return_value = self._rows(
+            (day, "USD", "EUR", Decimal("0.80")),
+            (day, "USD", "GBP", Decimal("0.50")),
+        )
+        items = [
+            HistoricalConversionItem(amount=Decimal("80"), currency="EUR", date=day),
+            HistoricalConversionItem(amount=Decimal("10"), currency="GBP", date=day),
+        ]
+        
+        with patch('app.services.exchange_rate_service.settings') as mock_settings:
+            mock_settings.base_currency = "USD"
+            mock_settings.historical_rate_lookback_days = 7
+            
+            to_usd = await exchange_service.convert_historical(mock_db, items[:1], "USD")
+            to_eur = await exchange_service.convert_historical(mock_db, items[1:], "EUR")
+        
+        assert to_usd.results[0].converted_amount == Decimal("100")
+        assert to_eur.results[0].exchange_rate == Decimal("1.6")
+        assert to_eur.results[0].converted_amount == Decimal("16.0")
+    
+    @pytest.mark.asyncio
+    async def test_batch_falls_back_to_previous_rate_date(self, exchange_service, mock_db):
+        """Test weekend dates use the most recent earlier rate within the lookback window."""
+        friday = date(2023, 3, 3)
+        sunday = date(2023, 3, 5)
+        mock_db.execute.return_value = self._rows((friday, "USD", "EUR", Decimal("0.90")))
+        items = [HistoricalConversionItem(amount=Decimal("10"), currency="USD", date=sunday)]
+        
+        result = await exchange_service.convert_historical(mock_db, items, "EUR")
+        
+        assert result.results[0].rate_date == friday
+        assert result.results[0].converted_amount == Decimal("9.00")
+    
+    @pytest.mark.asyncio
+    async def test_batch_reports_failures_per_item(self, exchange_service, mock_db):
+        """Test items without a rate are reported without failing the batch."""
+        day = date(2023, 3, 1)
+        mock_db.execute.return_value = self._rows((day, "USD", "EUR", Decimal("0.90")))
+        items = [
+            HistoricalConversionItem(amount=Decimal("10"), currency="USD", date=day),
+            HistoricalConversionItem(amount=Decimal("10"), currency="JPY", date=day),
+            HistoricalConversionItem(amount=Decimal("10"), currency="EUR", date=day),
+        ]
+        
+        result = await exchange_service.convert_historical(mock_db, items, "EUR")
+        
+        assert result.converted == 2
+        assert result.failed == 1
+        assert result.results[1].converted_amount is None
+        assert "JPY" in result.results[1].error
+        assert result.results[2].exchange_rate == Decimal("1.0")
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
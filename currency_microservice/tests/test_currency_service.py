@@ -0,0 +1,84 @@
+"""
+Tests for provider-driven currency discovery.
+"""
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.currencies import currency_registry
+from app.models.currency import CurrencyDB
+from app.services.currency_service import CurrencyService
+
+CONFIGURED = ["USD", "EUR", "GBP"]
+
+
+@pytest_asyncio.fixture
+async def db():
+    """In-memory SQLite session holding the currencies table."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(CurrencyDB.__table__.create)
+    async with async_sessionmaker(engine)() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    """Run against a small configured set and restore the global registry afterwards."""
+    original = currency_registry.codes
+    with patch('app.services.currency_service.settings.supported_currencies', CONFIGURED):
+        with patch('app.services.currency_service.settings.storage_backend', "embedded"):
+            with patch('app.services.currency_service.settings.currency_discovery_enabled', True):
+                currency_registry.load(CONFIGURED)
+                yield currency_registry
+    currency_registry.load(original)
+
+
+@pytest.mark.asyncio
+async def test_discover_stores_new_iso_codes(db, registry):
+    """Test quoted ISO codes are stored and registered after the configured ones."""
+    service = CurrencyService()
+    with patch('app.services.currency_service.cache_service') as mock_cache:
+        mock_cache.set_currencies_version = AsyncMock(return_value=True)
+
+        new_codes = await service.discover(db, ["EUR", "ZAR", "XYZ", "aed"])
+
+    assert new_codes == ["AED", "ZAR"]
+    assert registry.codes == ("USD", "EUR", "GBP", "AED", "ZAR")
+    assert (await db.execute(select(CurrencyDB.code))).scalars().all() == ["AED", "ZAR"]
+    mock_cache.set_currencies_version.assert_awaited_once_with(service.version)
+
+
+@pytest.mark.asyncio
+async def test_discover_is_a_no_op_for_supported_codes(db, registry):
+    """Test nothing is written when every quoted code is already supported."""
+    service = CurrencyService()
+    with patch('app.services.currency_service.cache_service') as mock_cache:
+        mock_cache.set_currencies_version = AsyncMock()
+
+        assert await service.discover(db, ["USD", "EUR"]) == []
+
+    mock_cache.set_currencies_version.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_discovery_can_be_disabled(db, registry):
+    """Test the configured list stays authoritative when discovery is off."""
+    with patch('app.services.currency_service.settings.currency_discovery_enabled', False):
+        assert await CurrencyService().discover(db, ["ZAR"]) == []
+
+    assert "ZAR" not in registry
+
+
+@pytest.mark.asyncio
+async def test_load_orders_configured_codes_first(db, registry):
+    """Test ids stay stable across workers: configured codes, then stored ones sorted."""
+    db.add_all([CurrencyDB(code="ZAR"), CurrencyDB(code="AED"), CurrencyDB(code="EUR")])
+    await db.commit()
+
+    assert await CurrencyService().load(db) == 5
+    assert registry.codes == ("USD", "EUR", "GBP", "AED", "ZAR")
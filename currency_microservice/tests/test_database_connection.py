@@ -0,0 +1,62 @@
+"""
+Tests for database initialization and connection pre-warming.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.database import connection
+from app.database.connection import init_database, prewarm_pool, schema_fingerprint
+
+
+def _mock_engine():
+    """Mock async engine whose begin/connect contexts yield one connection."""
+    conn = MagicMock()
+    conn.execute = AsyncMock()
+    conn.run_sync = AsyncMock()
+    engine = MagicMock()
+    for method in (engine.begin, engine.connect):
+        method.return_value.__aenter__ = AsyncMock(return_value=conn)
+        method.return_value.__aexit__ = AsyncMock(return_value=False)
+    return engine, conn
+
+
+def test_schema_fingerprint_is_stable():
+    """Test the fingerprint only depends on the registered models."""
+    fingerprint = schema_fingerprint()
+
+    assert fingerprint == schema_fingerprint()
+    assert len(fingerprint) == 64
+
+
+@pytest.mark.asyncio
+async def test_init_database_skips_ddl_when_schema_matches():
+    """Test fast startup skips create_all when the stored fingerprint matches."""
+    engine, conn = _mock_engine()
+    with patch.object(connection, 'engine', engine):
+        with patch.object(connection, '_stored_schema_fingerprint', AsyncMock(return_value=schema_fingerprint())):
+            with patch('app.database.connection.settings.fast_startup', True):
+                await init_database()
+
+    engine.begin.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_init_database_applies_ddl_on_mismatch():
+    """Test a changed schema runs create_all and stores the new fingerprint."""
+    engine, conn = _mock_engine()
+    with patch.object(connection, 'engine', engine):
+        with patch.object(connection, '_stored_schema_fingerprint', AsyncMock(return_value="stale")):
+            with patch('app.database.connection.settings.fast_startup', True):
+                await init_database()
+
+    conn.run_sync.assert_awaited_once()
+    assert conn.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_prewarm_pool_counts_opened_connections():
+    """Test pre-warming opens the requested connections and tolerates failures."""
+    engine, conn = _mock_engine()
+    conn.execute.side_effect = [None, Exception("refused"), None]
+    with patch.object(connection, 'engine', engine):
+        assert await prewarm_pool(3) == 2
@@ -4,11 +4,11 @@ Tests for exchange rate service.
 import pytest
 import asyncio
 from decimal import Decimal
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.services.exchange_rate_service import ExchangeRateService
-from app.models.exchange_rate import ExchangeRateCreate, ExchangeRateResponse
+from app.services.exchange_rate_service import ExchangeRateService, period_start, next_period_start, rebase_rates
+from app.models.exchange_rate import ExchangeRateCreate, ExchangeRateResponse, RatePeriodStats
 
 
 @pytest.fixture
@@ -129,14 +129,61 @@ async def test_fetch_and_store_daily_rates_success(exchange_service, mock_db):
         with patch.object(exchange_service.external_api, 'validate_rate') as mock_validate:
             mock_validate.return_value = True
             
-            # Mock create_rate
-            with patch.object(exchange_service, 'create_rate') as mock_create:
-                mock_create.return_value = MagicMock()
-                
-                result = await exchange_service.fetch_and_store_daily_rates(mock_db, "USD")
+            # Mock cache warming and the on-disk snapshot
+            with patch.object(exchange_service, 'warm_cache', AsyncMock(return_value=True)) as mock_warm:
+                with patch('app.services.exchange_rate_service.snapshot_service') as mock_snapshot:
+                    mock_snapshot.publish = AsyncMock(return_value=1)
+                    result = await exchange_service.fetch_and_store_daily_rates(mock_db, "USD")
                 
                 assert result is True
-                assert mock_create.call_count == 3  # Called for each currency
+                # All rates are stored with one bulk upsert
+                assert mock_db.execute.call_count == 1
+                # Every cache tier is warmed for the new snapshot, including cross rates
+                _, rate_date, bases, cross_rates = mock_warm.call_args[0]
+                assert rate_date == date.today()
+                assert bases == ["USD"]
+                assert cross_rates["EUR"]["GBP"] == Decimal("0.882353")
+                # The snapshot file is rewritten for new workers
+                mock_snapshot.publish.assert_awaited_once_with(mock_db, date.today(), ["USD"])
+
+
+@pytest.mark.asyncio
+async def test_warm_cache_swaps_in_all_tiers(exchange_service, mock_db):
+    """Test warming builds pairs, snapshots, rendered bodies and cross rates in one swap."""
+    today = date.today()
+    records = [
+        MagicMock(id=1, base_currency="USD", target_currency="EUR", rate=Decimal("0.85"), date=today, created_at=datetime.now()),
+        MagicMock(id=2, base_currency="USD", target_currency="GBP", rate=Decimal("0.75"), date=today, created_at=datetime.now()),
+    ]
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = records
+    mock_db.execute.return_value = result
+    cross = {"EUR": {"GBP": Decimal("0.882353")}}
+
+    with patch('app.services.exchange_rate_service.cache_service') as mock_cache:
+        mock_cache.swap_in_snapshot = AsyncMock(return_value=True)
+
+        assert await exchange_service.warm_cache(mock_db, today, ["USD"], cross) is True
+
+    rate_date, pairs, snapshots, bodies, cross_rates = mock_cache.swap_in_snapshot.call_args[0]
+    assert rate_date == today
+    assert ("USD", "EUR", today, Decimal("0.85")) in pairs
+    assert set(snapshots["USD"]) == {"EUR", "GBP"}
+    assert '"target_currency":"GBP"' in bodies["USD"]
+    assert cross_rates == cross
+
+
+@pytest.mark.asyncio
+async def test_convert_currency_uses_cross_rate(exchange_service, mock_db):
+    """Test conversion falls back to the warmed cross-rate matrix."""
+    with patch.object(exchange_service, 'get_rate', AsyncMock(return_value=None)):
+        with patch('app.services.exchange_rate_service.cache_service') as mock_cache:
+            mock_cache.get_cross_rate = AsyncMock(return_value=Decimal("0.9"))
+
+            conversion = await exchange_service.convert_currency(mock_db, Decimal("100"), "EUR", "GBP")
+
+    assert conversion.converted_amount == Decimal("90.0")
+    assert conversion.exchange_rate == Decimal("0.9")
 
 
 @pytest.mark.asyncio
@@ -151,5 +198,261 @@ async def test_fetch_and_store_daily_rates_api_failure(exchange_service, mock_db
         assert result is False
 
 
+def test_period_boundaries():
+    """Test month, quarter and year period arithmetic."""
+    day = date(2024, 5, 17)
+    assert period_start("month", day) == date(2024, 5, 1)
+    assert period_start("quarter", day) == date(2024, 4, 1)
+    assert period_start("year", day) == date(2024, 1, 1)
+    assert next_period_start("month", date(2024, 12, 1)) == date(2025, 1, 1)
+    assert next_period_start("quarter", date(2024, 10, 1)) == date(2025, 1, 1)
+    assert next_period_start("year", date(2024, 1, 1)) == date(2025, 1, 1)
+
+
+def _period_stats(start, end):
+    return RatePeriodStats(
+        period_start=start,
+        period_end=end,
+        first_rate_date=start,
+        last_rate_date=end,
+        observations=20,
+        average=Decimal("0.85"),
+        min=Decimal("0.80"),
+        max=Decimal("0.90"),
+        stddev=Decimal("0.02"),
+        volatility=Decimal("0.004"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_rate_statistics_caches_closed_periods(exchange_service, mock_db):
+    """Test closed periods are computed once and cached without expiry."""
+    computed = [
+        _period_stats(date(2023, 1, 1), date(2023, 1, 31)),
+        _period_stats(date(2023, 2, 1), date(2023, 2, 28)),
+    ]
+    with patch('app.services.exchange_rate_service.cache_service') as mock_cache:
+        mock_cache.get_period_stats = AsyncMock(return_value={})
+        mock_cache.set_period_stats = AsyncMock(return_value=True)
+        with patch.object(exchange_service, '_query_period_stats', AsyncMock(return_value=computed)) as mock_query:
+            result = await exchange_service.get_rate_statistics(
+                mock_db, "USD", "EUR", "month", date(2023, 1, 1), date(2023, 2, 28)
+            )
+    
+    assert [p.period_start for p in result.periods] == [date(2023, 1, 1), date(2023, 2, 1)]
+    mock_query.assert_called_once_with(mock_db, "USD", "EUR", "month", date(2023, 1, 1), date(2023, 2, 28))
+    cached = mock_cache.set_period_stats.call_args[0][3]
+    assert set(cached) == {date(2023, 1, 1), date(2023, 2, 1)}
+
+
+@pytest.mark.asyncio
+async def test_rate_statistics_only_queries_uncached_tail(exchange_service, mock_db):
+    """Test cached leading periods are served from cache and skipped in SQL."""
+    january = _period_stats(date(2023, 1, 1), date(2023, 1, 31))
+    february = _period_stats(date(2023, 2, 1), date(2023, 2, 28))
+    with patch('app.services.exchange_rate_service.cache_service') as mock_cache:
+        mock_cache.get_period_stats = AsyncMock(return_value={date(2023, 1, 1): january.model_dump()})
+        mock_cache.set_period_stats = AsyncMock(return_value=True)
+        with patch.object(exchange_service, '_query_period_stats', AsyncMock(return_value=[february])) as mock_query:
+            result = await exchange_service.get_rate_statistics(
+                mock_db, "USD", "EUR", "month", date(2023, 1, 1), date(2023, 2, 28)
+            )
+    
+    assert [p.period_start for p in result.periods] == [date(2023, 1, 1), date(2023, 2, 1)]
+    assert mock_query.call_args[0][4] == date(2023, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_rate_statistics_partial_period_not_cached(exchange_service, mock_db):
+    """Test a period only partly inside the range is neither cached nor skipped."""
+    with patch('app.services.exchange_rate_service.cache_service') as mock_cache:
+        mock_cache.get_period_stats = AsyncMock(return_value={})
+        mock_cache.set_period_stats = AsyncMock(return_value=True)
+        partial = _period_stats(date(2023, 1, 1), date(2023, 1, 31))
+        with patch.object(exchange_service, '_query_period_stats', AsyncMock(return_value=[partial])):
+            await exchange_service.get_rate_statistics(
+                mock_db, "USD", "EUR", "month", date(2023, 1, 15), date(2023, 1, 31)
+            )
+    
+    assert mock_cache.get_period_stats.call_args[0][3] == []
+    assert mock_cache.set_period_stats.call_args[0][3] == {}
+
+
+@pytest.mark.asyncio
+async def test_rate_statistics_inverse_pair_keeps_open_period(exchange_service, mock_db):
+    """Test a pair stored only inversely still returns its open period once closed ones are cached."""
+    this_month = period_start("month", date.today())
+    last_month = period_start("month", this_month - timedelta(days=1))
+    closed = _period_stats(last_month, this_month - timedelta(days=1))
+    open_period = _period_stats(this_month, next_period_start("month", this_month) - timedelta(days=1))
+    
+    async def query(db, base, target, period, start, end, inverse=False):
+        return [stats for stats in (closed, open_period) if stats.period_start >= start] if inverse else []
+    
+    store = {}
+    with patch('app.services.exchange_rate_service.cache_service') as mock_cache:
+        mock_cache.get_period_stats = AsyncMock(
+            side_effect=lambda base, target, period, starts: {s: store[s] for s in starts if s in store}
+        )
+        mock_cache.set_period_stats = AsyncMock(side_effect=lambda base, target, period, data: store.update(data))
+        with patch.object(exchange_service, '_query_period_stats', AsyncMock(side_effect=query)):
+            for _ in range(2):
+                result = await exchange_service.get_rate_statistics(
+                    mock_db, "EUR", "USD", "month", last_month, date.today()
+                )
+                assert [p.period_start for p in result.periods] == [last_month, this_month]
+    
+    assert set(store) == {last_month}
+
+
+def test_rebase_rates_builds_cross_matrix():
+    """Test one anchor snapshot is rebased to several bases."""
+    anchor = {"EUR": Decimal("0.8"), "GBP": Decimal("0.5"), "JPY": Decimal("100")}
+    
+    matrix = rebase_rates(anchor, "USD", ["USD", "EUR", "GBP"])
+    
+    assert matrix["USD"]["EUR"] == Decimal("0.800000")
+    assert matrix["EUR"]["USD"] == Decimal("1.250000")
+    assert matrix["EUR"]["GBP"] == Decimal("0.625000")
+    assert matrix["GBP"]["JPY"] == Decimal("200.000000")
+    assert "GBP" not in matrix["GBP"]
+
+
+def test_rebase_rates_skips_missing_base():
+    """Test bases absent from the anchor snapshot are skipped."""
+    matrix = rebase_rates({"EUR": Decimal("0.8")}, "USD", ["USD", "CHF"])
+    
+    assert list(matrix) == ["USD"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_store_materializes_bases_from_one_fetch(exchange_service, mock_db):
+    """Test configured bases cost one provider call and one bulk write."""
+    with patch.object(exchange_service.external_api, 'fetch_exchange_rates', AsyncMock(return_value={
+        "EUR": Decimal("0.8"), "GBP": Decimal("0.5")
+    })) as mock_fetch:
+        with patch('app.services.exchange_rate_service.settings.materialized_bases', ["EUR", "GBP"]):
+            with patch.object(exchange_service, 'warm_cache', AsyncMock(return_value=True)) as mock_warm:
+                with patch('app.services.exchange_rate_service.snapshot_service.publish', AsyncMock()):
+                    result = await exchange_service.fetch_and_store_daily_rates(mock_db, "USD")
+    
+    assert result is True
+    mock_fetch.assert_called_once_with("USD")
+    assert mock_db.execute.call_count == 1
+    assert mock_warm.call_args[0][2] == ["USD", "EUR", "GBP"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_store_discovers_only_storable_codes(exchange_service, mock_db):
+    """Test codes whose rates cannot be validated and stored are not registered."""
+    with patch.object(exchange_service.external_api, 'fetch_exchange_rates', AsyncMock(return_value={
+        "EUR": Decimal("0.92"), "KRW": Decimal("1380.5"), "VND": Decimal("25400"), "LBP": Decimal("89500")
+    })):
+        with patch('app.services.exchange_rate_service.currency_service') as mock_currencies:
+            mock_currencies.discover = AsyncMock(return_value=[])
+            with patch.object(exchange_service, 'warm_cache', AsyncMock(return_value=True)):
+                with patch('app.services.exchange_rate_service.snapshot_service.publish', AsyncMock()):
+                    await exchange_service.fetch_and_store_daily_rates(mock_db, "USD")
+    
+    mock_currencies.discover.assert_awaited_once_with(mock_db, ["EUR", "KRW"])
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_targets_columns_on_sqlite(exchange_service, mock_db):
+    """Test embedded mode upserts with a SQLite ON CONFLICT on the unique columns."""
+    from sqlalchemy.dialects import sqlite
+
+    with patch('app.services.exchange_rate_service.settings.storage_backend', "embedded"):
+        await exchange_service.bulk_upsert_rates(mock_db, [{
+            "base_currency": "USD", "target_currency": "EUR", "rate": Decimal("0.9"), "date": date.today()
+        }])
+
+    sql = str(mock_db.execute.call_args.args[0].compile(dialect=sqlite.dialect()))
+    assert "ON CONFLICT (base_currency, target_currency, date) DO UPDATE" in sql
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_chunks_under_bind_parameter_limit(exchange_service, mock_db):
+    """Test a matrix larger than one statement can bind is split into chunks."""
+    from sqlalchemy.dialects import postgresql
+
+    rows = [
+        {"base_currency": f"B{i // 100:02d}", "target_currency": f"T{i % 100:02d}", "rate": Decimal("1.1"), "date": date.today()}
+        for i in range(9000)
+    ]
+    with patch('app.services.exchange_rate_service.settings.storage_backend', "postgres"):
+        assert await exchange_service.bulk_upsert_rates(mock_db, rows) == 9000
+
+    statements = [call.args[0].compile(dialect=postgresql.dialect()) for call in mock_db.execute.call_args_list]
+    assert len(statements) == 2
+    assert all(len(statement.params) <= 32767 for statement in statements)
+    assert sum(len(statement.params) for statement in statements) == 4 * 9000
+
+
+@pytest.mark.asyncio
+async def test_period_stats_computed_in_python_when_embedded(exchange_service, mock_db):
+    """Test embedded mode aggregates periods without Postgres-only functions."""
+    result = MagicMock()
+    result.all.return_value = [
+        (date(2024, 1, 30), Decimal("1.0")),
+        (date(2024, 1, 31), Decimal("1.1")),
+        (date(2024, 2, 1), Decimal("2.0")),
+    ]
+    mock_db.execute.return_value = result
+
+    with patch('app.services.exchange_rate_service.settings.storage_backend', "embedded"):
+        stats = await exchange_service._query_period_stats(
+            mock_db, "USD", "EUR", "month", date(2024, 1, 1), date(2024, 2, 29)
+        )
+
+    january, february = stats
+    assert january.observations == 2
+    assert january.average == Decimal("1.050000")
+    assert january.stddev == Decimal("0.070711")
+    assert january.volatility is None  # one return inside the month
+    assert february.period_end == date(2024, 2, 29)
+    assert february.stddev is None
+
+
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
+
+@pytest.mark.asyncio
+async def test_rates_for_date_read_in_one_query(exchange_service, mock_db):
+    """Test all targets of a dated request come from one query, in registry order."""
+    rows = [
+        MagicMock(
+            base_currency="USD", target_currency=target, rate=Decimal(rate),
+            date=date(2024, 6, 28), id=1, created_at=datetime(2024, 6, 28)
+        )
+        for target, rate in (("JPY", "150.5"), ("EUR", "0.85"), ("XYZ", "1.0"))
+    ]
+    mock_db.execute = AsyncMock()
+    mock_db.execute.return_value = MagicMock()
+    mock_db.execute.return_value.scalars.return_value.all.return_value = rows
+    
+    with patch('app.services.exchange_rate_service.snapshot_service') as mock_snapshot:
+        mock_snapshot.get_rates.return_value = None
+        rates = await exchange_service.get_rates_for_date(mock_db, "USD", date(2024, 6, 28))
+    
+    assert list(rates) == ["EUR", "JPY"]
+    assert rates["JPY"].rate == Decimal("150.5")
+    assert mock_db.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_rate_served_from_local_cache_until_invalidated(exchange_service, mock_db):
+    """Test a Redis hit is kept in the worker's cache and re-read after an invalidation."""
+    from app.services.local_cache_service import local_cache_service
+    
+    with patch('app.services.exchange_rate_service.cache_service') as mock_cache:
+        mock_cache.get_rate = AsyncMock(return_value=Decimal("0.85"))
+        
+        for _ in range(2):
+            result = await exchange_service.get_rate(mock_db, "USD", "EUR", date(2024, 6, 28))
+            assert result.rate == Decimal("0.85")
+        assert mock_cache.get_rate.await_count == 1
+        
+        local_cache_service.invalidate(["USD"], [date(2024, 6, 28)])
+        await exchange_service.get_rate(mock_db, "USD", "EUR", date(2024, 6, 28))
+        assert mock_cache.get_rate.await_count == 2
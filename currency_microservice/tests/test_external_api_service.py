@@ -5,6 +5,7 @@ import pytest
 from decimal import Decimal
 from unittest.mock import AsyncMock, MagicMock, patch
 import httpx
+import asyncio
 
 from app.services.external_api_service import ExternalAPIService
 
@@ -101,6 +102,14 @@ class TestRateValidation:
             is_valid = await external_api_service.validate_rate(base, target, rate)
             assert not is_valid, f"Rate {rate} for {base}/{target} should be invalid"
     
+    @pytest.mark.asyncio
+    async def test_validate_rate_must_fit_rate_column(self, external_api_service):
+        """Test rates that would overflow Numeric(10, 6) once rounded are rejected."""
+        assert await external_api_service.validate_rate("USD", "KRW", Decimal("9999.999999"))
+        assert not await external_api_service.validate_rate("USD", "KRW", Decimal("10000"))
+        assert not await external_api_service.validate_rate("USD", "KRW", Decimal("9999.9999996"))
+        assert not await external_api_service.validate_rate("USD", "VND", Decimal("25400"))
+    
     @pytest.mark.asyncio
     async def test_validate_rate_unsupported_currency(self, external_api_service):
         """Test validation for unsupported currencies."""
@@ -327,5 +336,99 @@ class TestAPIConfiguration:
             assert not external_api_service._has_fixer_api_key()
 
 
+def _provider(result, delay=0.0, calls=None, name=None):
+    """Build a fake provider coroutine with a fixed latency and result."""
+    async def fetch(base, rate_date=None):
+        if calls is not None:
+            calls.append(name)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return fetch
+
+
+class TestFetchStrategies:
+    """Test concurrent, hedged and quorum fetch strategies."""
+    
+    @pytest.mark.asyncio
+    async def test_race_returns_fastest_and_cancels_others(self, external_api_service):
+        """Test race mode takes the first valid response and cancels slow providers."""
+        slow_finished = []
+        
+        async def slow(base, rate_date=None):
+            await asyncio.sleep(5)
+            slow_finished.append(True)
+            return {"EUR": Decimal("0.80")}
+        
+        providers = {
+            "slow": slow,
+            "fast": _provider({"EUR": Decimal("0.85")}, delay=0.01),
+        }
+        with patch.object(external_api_service, 'get_providers', return_value=providers):
+            with patch('app.services.external_api_service.settings.fetch_strategy', "race"):
+                rates = await external_api_service.fetch_exchange_rates("USD")
+        
+        assert rates == {"EUR": Decimal("0.85")}
+        assert slow_finished == []
+    
+    @pytest.mark.asyncio
+    async def test_hedged_launches_backup_after_delay(self, external_api_service):
+        """Test hedged mode starts the next provider when the first is slow."""
+        calls = []
+        providers = {
+            "hung": _provider({"EUR": Decimal("0.80")}, delay=5, calls=calls, name="hung"),
+            "backup": _provider({"EUR": Decimal("0.85")}, calls=calls, name="backup"),
+            "unused": _provider({"EUR": Decimal("0.90")}, calls=calls, name="unused"),
+        }
+        with patch.object(external_api_service, 'get_providers', return_value=providers):
+            with patch('app.services.external_api_service.settings.fetch_strategy', "hedged"):
+                with patch('app.services.external_api_service.settings.fetch_hedge_delay_seconds', 0.05):
+                    rates = await external_api_service.fetch_exchange_rates("USD")
+        
+        assert rates == {"EUR": Decimal("0.85")}
+        assert calls == ["hung", "backup"]
+    
+    @pytest.mark.asyncio
+    async def test_hedged_moves_on_immediately_after_failure(self, external_api_service):
+        """Test hedged mode does not wait out the delay when a provider fails."""
+        providers = {
+            "broken": _provider(RuntimeError("boom")),
+            "empty": _provider(None),
+            "good": _provider({"EUR": Decimal("0.85")}),
+        }
+        with patch.object(external_api_service, 'get_providers', return_value=providers):
+            with patch('app.services.external_api_service.settings.fetch_strategy', "hedged"):
+                with patch('app.services.external_api_service.settings.fetch_hedge_delay_seconds', 10):
+                    rates = await asyncio.wait_for(external_api_service.fetch_exchange_rates("USD"), timeout=1)
+        
+        assert rates == {"EUR": Decimal("0.85")}
+    
+    @pytest.mark.asyncio
+    async def test_quorum_takes_per_currency_median(self, external_api_service):
+        """Test quorum mode ignores an outlier provider via the median."""
+        providers = {
+            "a": _provider({"EUR": Decimal("0.85"), "GBP": Decimal("0.75")}),
+            "b": _provider({"EUR": Decimal("0.86"), "GBP": Decimal("0.74")}),
+            "bad": _provider({"EUR": Decimal("8.50"), "GBP": Decimal("0.76")}),
+        }
+        with patch.object(external_api_service, 'get_providers', return_value=providers):
+            with patch('app.services.external_api_service.settings.fetch_strategy', "quorum"):
+                with patch('app.services.external_api_service.settings.fetch_quorum', 3):
+                    rates = await external_api_service.fetch_exchange_rates("USD")
+        
+        assert rates == {"EUR": Decimal("0.86"), "GBP": Decimal("0.75")}
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_all_fail(self, external_api_service):
+        """Test concurrent modes return None when every provider fails."""
+        providers = {"a": _provider(None), "b": _provider(RuntimeError("down"))}
+        with patch.object(external_api_service, 'get_providers', return_value=providers):
+            with patch('app.services.external_api_service.settings.fetch_strategy', "race"):
+                rates = await external_api_service.fetch_exchange_rates("USD")
+        
+        assert rates is None
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Tests for the background health prober.
+"""
+import pytest
+import asyncio
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, patch
+
+from app.services.health_service import HealthService
+
+
+@pytest.fixture
+def health_service():
+    """Create health service instance."""
+    return HealthService()
+
+
+@pytest.mark.asyncio
+async def test_probe_healthy(health_service):
+    """Test all dependencies up with fresh rates reports healthy."""
+    with patch.object(health_service, '_probe_database', AsyncMock(return_value=(True, date.today()))):
+        with patch('app.services.health_service.cache_service') as mock_cache:
+            mock_cache.is_connected = AsyncMock(return_value=True)
+
+            status = await health_service.probe()
+
+    assert status.status == "healthy"
+    assert status.database is True
+    assert status.redis is True
+    assert status.rates_fresh is True
+    assert health_service.is_ready()
+
+
+@pytest.mark.asyncio
+async def test_probe_degraded_when_redis_down_or_rates_stale(health_service):
+    """Test Redis outage or stale rates degrade but keep the service ready."""
+    stale = date.today() - timedelta(days=5)
+    with patch.object(health_service, '_probe_database', AsyncMock(return_value=(True, stale))):
+        with patch('app.services.health_service.cache_service') as mock_cache:
+            mock_cache.is_connected = AsyncMock(return_value=False)
+
+            status = await health_service.probe()
+
+    assert status.status == "degraded"
+    assert status.rates_fresh is False
+    assert health_service.is_ready()
+
+
+@pytest.mark.asyncio
+async def test_probe_unhealthy_when_database_down(health_service):
+    """Test database outage makes the service not ready."""
+    with patch.object(health_service, '_probe_database', AsyncMock(return_value=(False, None))):
+        with patch('app.services.health_service.cache_service') as mock_cache:
+            mock_cache.is_connected = AsyncMock(return_value=True)
+
+            status = await health_service.probe()
+
+    assert status.status == "unhealthy"
+    assert not health_service.is_ready()
+
+
+@pytest.mark.asyncio
+async def test_probe_times_out_hung_dependency(health_service):
+    """Test a hung dependency is reported as down instead of stalling the probe."""
+    async def hang():
+        await asyncio.sleep(10)
+
+    with patch('app.services.health_service.settings.health_check_timeout_seconds', 0.01):
+        with patch.object(health_service, '_probe_database', AsyncMock(return_value=(True, date.today()))):
+            with patch('app.services.health_service.cache_service') as mock_cache:
+                mock_cache.is_connected = hang
+
+                status = await health_service.probe()
+
+    assert status.redis is False
+    assert status.database is True
+
+
+def test_status_before_first_probe(health_service):
+    """Test status reads do not touch dependencies before the first probe."""
+    status = health_service.get_status()
+
+    assert status.status == "starting"
+    assert not health_service.is_ready()
+    assert health_service.is_alive()
+
+
+@pytest.mark.asyncio
+async def test_start_and_stop_probe_loop(health_service):
+    """Test the prober runs in the background and stops cleanly."""
+    with patch.object(health_service, 'probe', AsyncMock()) as mock_probe:
+        await health_service.start()
+        assert health_service.is_alive()
+        await health_service.stop()
+
+    mock_probe.assert_called_once()
+    assert health_service._task is None
+
+
+@pytest.mark.asyncio
+async def test_readiness_held_while_warming(health_service):
+    """Test readiness stays down until startup warm-up finishes."""
+    health_service.set_warming(True)
+    with patch.object(health_service, '_probe_database', AsyncMock(return_value=(True, date.today()))):
+        with patch('app.services.health_service.cache_service') as mock_cache:
+            mock_cache.is_connected = AsyncMock(return_value=True)
+
+            await health_service.probe()
+
+    assert not health_service.is_ready()
+    health_service.set_warming(False)
+    assert health_service.is_ready()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
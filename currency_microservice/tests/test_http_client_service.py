@@ -0,0 +1,80 @@
+"""
+Tests for the shared upstream HTTP client pools.
+"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.http_client_service import HTTPClientService
+from app.services.external_api_service import ExternalAPIService
+
+
+@pytest.fixture
+def http_client_service():
+    """Create HTTP client service instance."""
+    return HTTPClientService()
+
+
+def test_client_is_reused_per_provider(http_client_service):
+    """Test each provider gets one long-lived pool that is reused."""
+    first = http_client_service.get_client("fixer_io")
+    second = http_client_service.get_client("fixer_io")
+    other = http_client_service.get_client("exchangerate_api")
+
+    assert first is second
+    assert first is not other
+
+
+def test_client_uses_split_timeouts(http_client_service):
+    """Test connect and read timeouts are configured separately."""
+    with patch('app.services.http_client_service.settings') as mock_settings:
+        mock_settings.http_connect_timeout_seconds = 2.0
+        mock_settings.http_read_timeout_seconds = 12.0
+        mock_settings.http_pool_timeout_seconds = 1.0
+        mock_settings.http_max_connections_per_provider = 4
+        mock_settings.http_max_keepalive_per_provider = 2
+        mock_settings.http_keepalive_expiry_seconds = 30.0
+        mock_settings.app_name = "test"
+        mock_settings.version = "1.0.0"
+
+        client = http_client_service.get_client("free_api")
+
+    assert client.timeout.connect == 2.0
+    assert client.timeout.read == 12.0
+
+
+@pytest.mark.asyncio
+async def test_close_releases_all_pools(http_client_service):
+    """Test closing shuts every pool and a later call reopens one."""
+    client = http_client_service.get_client("fixer_io")
+
+    await http_client_service.close()
+
+    assert client.is_closed
+    assert http_client_service.clients == {}
+    assert http_client_service.get_client("fixer_io") is not client
+
+
+@pytest.mark.asyncio
+async def test_external_api_uses_shared_client(http_client_service):
+    """Test provider fetches go through the shared pool instead of new clients."""
+    service = ExternalAPIService(http_client=http_client_service)
+    response = MagicMock()
+    response.json.return_value = {"rates": {"EUR": 0.85}}
+
+    async def fake_get(*args, **kwargs):
+        return response
+
+    shared = MagicMock(is_closed=False)
+    shared.get = MagicMock(side_effect=fake_get)
+    http_client_service.clients["free_api"] = shared
+
+    with patch('httpx.AsyncClient') as mock_client_cls:
+        await service._fetch_from_free_api("USD")
+        await service._fetch_from_free_api("USD")
+
+    assert shared.get.call_count == 2
+    mock_client_cls.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,89 @@
+"""
+Tests for scheduled job run history.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.job_run_service import JobRunService, record_job_metrics
+
+
+@pytest.fixture
+def job_runs():
+    """Create job run service with saving mocked out."""
+    service = JobRunService()
+    service._save = AsyncMock()
+    return service
+
+
+@pytest.mark.asyncio
+async def test_track_records_metrics(job_runs):
+    """Test metrics recorded anywhere in the run end up on the stored record."""
+    async with job_runs.track("daily_rate_fetch", "worker-1"):
+        record_job_metrics(provider="fixer_io")
+        record_job_metrics(rows_written=30, cache_keys_warmed=32)
+
+    record = job_runs._save.call_args.args[0]
+    assert record.job_id == "daily_rate_fetch"
+    assert record.instance_id == "worker-1"
+    assert record.status == "succeeded"
+    assert record.provider == "fixer_io"
+    assert record.rows_written == 30
+    assert record.cache_keys_warmed == 32
+    assert record.duration_ms >= 0
+
+
+@pytest.mark.asyncio
+async def test_track_records_failures(job_runs):
+    """Test recorded errors and exceptions both mark the run failed."""
+    async with job_runs.track("daily_rate_fetch"):
+        record_job_metrics(error="No rates fetched or stored")
+    assert job_runs._save.call_args.args[0].status == "failed"
+
+    with pytest.raises(RuntimeError):
+        async with job_runs.track("cache_cleanup"):
+            raise RuntimeError("boom")
+    record = job_runs._save.call_args.args[0]
+    assert record.status == "failed"
+    assert record.error == "boom"
+
+
+def test_record_job_metrics_outside_run_is_noop():
+    """Test services can record metrics when no job is running."""
+    record_job_metrics(rows_written=1)
+
+
+@pytest.mark.asyncio
+async def test_duration_stats_query_uses_percentiles():
+    """Test duration percentiles are computed in Postgres."""
+    db = AsyncMock()
+    db.execute.return_value = []
+
+    assert await JobRunService().get_duration_stats(db) == []
+
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "percentile_cont" in sql
+    assert "WITHIN GROUP (ORDER BY job_runs.duration_ms)" in sql
+
+
+@pytest.mark.asyncio
+async def test_scheduler_run_job_tracks_leader_runs():
+    """Test scheduled jobs are recorded when they run on the leader."""
+    from app.services.scheduler_service import SchedulerService
+
+    async def run_exclusive(job_id, func):
+        return await func()
+
+    job = AsyncMock()
+    with patch('app.services.scheduler_service.leader_service') as mock_leader:
+        mock_leader.instance_id = "worker-1"
+        mock_leader.run_exclusive = run_exclusive
+        with patch('app.services.scheduler_service.job_run_service') as mock_runs:
+            mock_runs.track.return_value.__aenter__ = AsyncMock(return_value={})
+            mock_runs.track.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            await SchedulerService()._run_job("daily_rate_fetch", job)
+
+    job.assert_awaited_once()
+    mock_runs.track.assert_called_once_with("daily_rate_fetch", "worker-1")
@@ -0,0 +1,137 @@
+"""
+Tests for scheduler leader election.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.leader_service import LeaderService, RENEW_SCRIPT, CLAIM_SCRIPT
+
+
+@pytest.fixture
+def leader():
+    """Create leader service instance."""
+    return LeaderService(name="test")
+
+
+@pytest.fixture
+def mock_cache():
+    """Mock cache service with a connected Redis client."""
+    with patch('app.services.leader_service.cache_service') as mock_cache:
+        mock_cache.is_connected = AsyncMock(return_value=True)
+        mock_cache.redis_client = MagicMock()
+        mock_cache.redis_client.set = AsyncMock(return_value=True)
+        mock_cache.redis_client.incr = AsyncMock(return_value=7)
+        mock_cache.redis_client.eval = AsyncMock(return_value=1)
+        yield mock_cache
+
+
+@pytest.mark.asyncio
+async def test_acquire_lease_draws_fencing_token(leader, mock_cache):
+    """Test acquiring the lease makes the instance leader with a new token."""
+    await leader.refresh()
+
+    assert leader.is_leader is True
+    assert leader.token == 7
+    args, kwargs = mock_cache.redis_client.set.call_args
+    assert args == ("leader:test", leader.instance_id)
+    assert kwargs["nx"] is True
+
+
+@pytest.mark.asyncio
+async def test_lease_held_elsewhere(leader, mock_cache):
+    """Test an instance that loses the SET NX race stays a follower."""
+    mock_cache.redis_client.set.return_value = None
+
+    await leader.refresh()
+
+    assert leader.is_leader is False
+    mock_cache.redis_client.incr.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failed_renewal_steps_down(leader, mock_cache):
+    """Test a leader whose lease expired or was taken over steps down."""
+    await leader.refresh()
+    mock_cache.redis_client.eval.return_value = 0
+
+    await leader.refresh()
+
+    assert leader.is_leader is False
+    assert mock_cache.redis_client.eval.call_args.args[0] == RENEW_SCRIPT
+
+
+@pytest.mark.asyncio
+async def test_run_exclusive_only_on_leader(leader, mock_cache):
+    """Test jobs run on the leader and are skipped on followers."""
+    job = AsyncMock(return_value="done")
+
+    assert await leader.run_exclusive("daily_rate_fetch", job) is None
+    job.assert_not_awaited()
+
+    await leader.refresh()
+    assert await leader.run_exclusive("daily_rate_fetch", job) == "done"
+
+    args = mock_cache.redis_client.eval.call_args.args
+    assert args[0] == CLAIM_SCRIPT
+    assert args[3] == "leader:test:fence:daily_rate_fetch"
+    assert args[5] == 7
+
+
+@pytest.mark.asyncio
+async def test_run_exclusive_rejects_stale_token(leader, mock_cache):
+    """Test a leader with a stale fencing token does not run the job."""
+    await leader.refresh()
+    mock_cache.redis_client.eval.return_value = 0
+    job = AsyncMock()
+
+    assert await leader.run_exclusive("daily_rate_fetch", job) is None
+    job.assert_not_awaited()
+    assert leader.is_leader is False
+
+
+@pytest.fixture
+def lock_conn():
+    """Database connection stand-in answering pg_try_advisory_lock, with Redis down."""
+    conn = MagicMock()
+    conn.scalar = AsyncMock(return_value=True)
+    conn.execute = AsyncMock()
+    conn.close = AsyncMock()
+    with patch('app.services.leader_service.cache_service') as mock_cache:
+        mock_cache.is_connected = AsyncMock(return_value=False)
+        with patch('app.services.leader_service.engine') as mock_engine:
+            mock_engine.connect = AsyncMock(return_value=conn)
+            yield conn
+
+
+@pytest.mark.asyncio
+async def test_run_exclusive_without_redis_takes_database_lock(leader, lock_conn):
+    """Test jobs run under a database advisory lock while Redis is unavailable."""
+    job = AsyncMock(return_value="done")
+
+    assert await leader.run_exclusive("daily_rate_fetch", job) == "done"
+
+    key = lock_conn.scalar.call_args.args[1]["key"]
+    assert key == leader._advisory_lock_key("daily_rate_fetch")
+    assert lock_conn.execute.call_args.args[1] == {"key": key}
+    lock_conn.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_run_exclusive_without_redis_skips_when_locked_elsewhere(leader, lock_conn):
+    """Test only one worker runs a job while Redis is down."""
+    lock_conn.scalar.return_value = False
+    job = AsyncMock()
+
+    assert await leader.run_exclusive("daily_rate_fetch", job) is None
+    job.assert_not_awaited()
+    lock_conn.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_run_exclusive_without_redis_or_database_skips(leader, lock_conn):
+    """Test a job is skipped, not run everywhere, when no lock can be taken at all."""
+    lock_conn.scalar.side_effect = ConnectionError("database down")
+    job = AsyncMock()
+
+    assert await leader.run_exclusive("daily_rate_fetch", job) is None
+    job.assert_not_awaited()
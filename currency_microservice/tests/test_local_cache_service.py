@@ -0,0 +1,133 @@
+"""
+Tests for the in-process rate cache and its cross-worker invalidation.
+"""
+import asyncio
+import pytest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from app.services.cache_service import CacheService
+from app.services.local_cache_service import LocalCacheService
+from app.services.memory_cache import MemoryCache
+
+
+DAY_1 = date(2024, 6, 28)
+DAY_2 = date(2024, 6, 29)
+
+
+@pytest.fixture
+def cache():
+    """Cache service backed by an in-process cache, shared by the workers of a test."""
+    service = CacheService()
+    service.redis_client = MemoryCache(max_entries=100)
+    with patch('app.services.local_cache_service.cache_service', service):
+        yield service
+
+
+@pytest.fixture
+def snapshot():
+    """Snapshot service stand-in recording retirements."""
+    with patch('app.services.local_cache_service.snapshot_service') as mock_snapshot:
+        yield mock_snapshot
+
+
+def fill(worker: LocalCacheService):
+    """Cache rates for two bases and dates plus a latest-rates body."""
+    generation = worker.generation
+    worker.set_rate("USD", "EUR", DAY_1, Decimal("0.92"), generation)
+    worker.set_rate("USD", "EUR", DAY_2, Decimal("0.93"), generation)
+    worker.set_rate("EUR", "USD", DAY_2, Decimal("1.07"), generation)
+    worker.set_rendered_rates("USD", "{}", generation)
+
+
+def test_invalidate_evicts_matching_bases_and_dates(snapshot):
+    """Test only the named cells and the base's latest-rates entries are evicted."""
+    worker = LocalCacheService()
+    fill(worker)
+
+    worker.invalidate(["USD"], [DAY_2])
+
+    assert worker.get_rate("USD", "EUR", DAY_1) == Decimal("0.92")
+    assert worker.get_rate("USD", "EUR", DAY_2) is None
+    assert worker.get_rate("EUR", "USD", DAY_2) == Decimal("1.07")
+    assert worker.get_rendered_rates("USD") is None
+    snapshot.retire.assert_called_once_with({DAY_2}, None)
+
+
+def test_reads_started_before_an_eviction_are_not_cached(snapshot):
+    """Test a value read before an eviction cannot be stored after it."""
+    worker = LocalCacheService()
+    generation = worker.generation
+
+    worker.invalidate(["USD"], [DAY_1])
+    worker.set_rate("USD", "EUR", DAY_1, Decimal("0.92"), generation)
+
+    assert worker.get_rate("USD", "EUR", DAY_1) is None
+
+
+def test_entries_expire_and_stay_bounded(snapshot):
+    """Test entries expire after the TTL and the least recently used go first."""
+    worker = LocalCacheService()
+    with patch('app.services.local_cache_service.settings.local_cache_max_entries', 2):
+        fill(worker)
+    assert len(worker) == 2
+    assert worker.get_rate("USD", "EUR", DAY_1) is None
+
+    with patch('app.services.local_cache_service.settings.local_cache_ttl_seconds', -1):
+        worker.set_rate("GBP", "USD", DAY_1, Decimal("1.27"), worker.generation)
+    assert worker.get_rate("GBP", "USD", DAY_1) is None
+
+
+@pytest.mark.asyncio
+async def test_published_changes_reach_other_workers(cache, snapshot):
+    """Test a write on one worker evicts the same cells on every subscribed worker."""
+    writer, reader = LocalCacheService(), LocalCacheService()
+    await reader.start()
+    try:
+        await asyncio.sleep(0.01)
+        fill(reader)
+
+        assert await writer.publish(["USD"], [DAY_2]) == 1
+        await asyncio.sleep(0.01)
+
+        assert reader.version == 1
+        assert reader.get_rate("USD", "EUR", DAY_2) is None
+        assert reader.get_rate("USD", "EUR", DAY_1) == Decimal("0.92")
+    finally:
+        await reader.stop()
+
+
+def test_missed_events_drop_the_whole_cache(snapshot):
+    """Test a gap in event numbers evicts everything and retires the snapshot."""
+    worker = LocalCacheService()
+    fill(worker)
+
+    worker._apply({"version": 3, "bases": ["EUR"], "dates": ["2024-06-29"], "snapshot": None})
+
+    assert len(worker) == 0
+    assert worker.version == 3
+    snapshot.retire.assert_called_once_with(None, None)
+
+
+def test_snapshot_version_is_passed_on(snapshot):
+    """Test ingest events do not retire a snapshot that already holds the change."""
+    worker = LocalCacheService()
+
+    worker._apply({"version": 1, "bases": ["USD"], "dates": ["2024-06-29"], "snapshot": 7})
+
+    snapshot.retire.assert_called_once_with({DAY_2}, 7)
+
+
+@pytest.mark.asyncio
+async def test_poll_drops_the_cache_when_the_counter_moved(cache, snapshot):
+    """Test the polling fallback evicts everything once events were published unseen."""
+    worker = LocalCacheService()
+    fill(worker)
+    assert await worker.poll() is False
+
+    await cache.publish_invalidation({"bases": ["EUR"], "dates": ["2024-06-29"], "snapshot": None})
+
+    assert await worker.poll() is True
+    assert len(worker) == 0
+    assert worker.version == 1
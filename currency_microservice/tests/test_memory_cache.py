@@ -0,0 +1,93 @@
+"""
+Tests for the in-process cache used in embedded mode.
+"""
+import pytest
+from unittest.mock import patch
+
+from app.services.memory_cache import MemoryCache
+
+
+@pytest.fixture
+def cache():
+    """Create a small in-process cache."""
+    return MemoryCache(max_entries=3)
+
+
+@pytest.mark.asyncio
+async def test_values_round_trip_as_strings(cache):
+    """Test values come back decoded like a decode_responses Redis client."""
+    await cache.setex("rate:USD:EUR:2024-06-28", 60, 0.92)
+    await cache.mset({"a": 1, "b": 2})
+
+    assert await cache.get("rate:USD:EUR:2024-06-28") == "0.92"
+    assert await cache.mget(["a", "b", "missing"]) == ["1", "2", None]
+    assert await cache.incr("a") == 2
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_key_is_evicted(cache):
+    """Test the cache stays within max_entries by evicting the coldest key."""
+    for key in ("a", "b", "c"):
+        await cache.set(key, key)
+    await cache.get("a")
+    await cache.set("d", "d")
+
+    assert await cache.get("b") is None
+    assert await cache.keys("*") == ["c", "a", "d"]
+
+
+@pytest.mark.asyncio
+async def test_keys_expire(cache):
+    """Test TTLs are honoured, and nx only sets absent keys."""
+    with patch('app.services.memory_cache.time.time', return_value=1000.0):
+        await cache.set("lease", "worker-1", px=30000, nx=True)
+        assert await cache.set("lease", "worker-2", px=30000, nx=True) is None
+
+    with patch('app.services.memory_cache.time.time', return_value=1031.0):
+        assert await cache.get("lease") is None
+        assert await cache.set("lease", "worker-2", px=30000, nx=True)
+
+
+@pytest.mark.asyncio
+async def test_hashes_and_pipeline(cache):
+    """Test hash commands and pipelines used by cache warming and compaction."""
+    async with cache.pipeline(transaction=True) as pipe:
+        pipe.hset("cross_rates:2024-06-28", mapping={"EUR:GBP": "0.85"})
+        pipe.expire("cross_rates:2024-06-28", 60)
+        pipe.setex("latest_rates:USD", 60, "{}")
+        results = await pipe.execute()
+
+    assert results == [1, True, True]
+    assert await cache.hget("cross_rates:2024-06-28", "EUR:GBP") == "0.85"
+    assert await cache.hdel("cross_rates:2024-06-28", "EUR:GBP") == 1
+    assert await cache.get("cross_rates:2024-06-28") is None
+
+
+@pytest.mark.asyncio
+async def test_scan_walks_every_key(cache):
+    """Test SCAN visits each key once and ends with cursor 0."""
+    for key in ("a", "b", "c"):
+        await cache.set(key, key)
+
+    cursor, first = await cache.scan(cursor=0, count=2)
+    cursor, rest = await cache.scan(cursor=cursor, count=2)
+
+    assert cursor == 0
+    assert first + rest == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_subscribers(cache):
+    """Test published messages reach each subscriber on the channel, decoded."""
+    pubsub = cache.pubsub()
+    await pubsub.subscribe("events:rates")
+
+    assert (await pubsub.get_message())["type"] == "subscribe"
+    assert await cache.publish("events:rates", '{"version":1}') == 1
+    assert await cache.publish("other", "ignored") == 0
+    message = await pubsub.get_message(ignore_subscribe_messages=True)
+    assert message == {"type": "message", "channel": "events:rates", "data": '{"version":1}'}
+
+    await pubsub.aclose()
+    assert await cache.publish("events:rates", "late") == 0
+    assert await pubsub.get_message() is None
@@ -0,0 +1,105 @@
+"""
+Tests for provider circuit breakers and adaptive ordering.
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.external_api_service import ExternalAPIService
+from app.services.provider_health_service import ProviderHealthService, CLOSED, OPEN, HALF_OPEN
+
+
+@pytest.fixture
+def health():
+    """Create provider health service instance."""
+    return ProviderHealthService()
+
+
+def test_breaker_opens_after_consecutive_failures(health):
+    """Test the breaker opens at the failure threshold and rejects calls."""
+    with patch('app.services.provider_health_service.settings.circuit_breaker_failure_threshold', 2):
+        health.record("fixer_io", False, 1.0)
+        assert health.get("fixer_io").state == CLOSED
+        health.record("fixer_io", False, 1.0)
+
+    assert health.get("fixer_io").state == OPEN
+    assert health.allow_request("fixer_io") is False
+
+
+def test_breaker_half_open_trial(health):
+    """Test an expired breaker allows one trial; failure re-opens, success closes."""
+    provider = health.get("fixer_io")
+    provider.state = OPEN
+    provider.opened_at = 0.0
+
+    assert health.allow_request("fixer_io") is True
+    assert provider.state == HALF_OPEN
+    assert health.allow_request("fixer_io") is False
+
+    health.record("fixer_io", False, 0.5)
+    assert provider.state == OPEN
+
+    provider.opened_at = 0.0
+    assert health.allow_request("fixer_io") is True
+    health.record("fixer_io", True, 0.5)
+    assert provider.state == CLOSED
+    assert provider.consecutive_failures == 0
+
+
+def test_ewma_latency(health):
+    """Test latency is smoothed with the configured EWMA factor."""
+    with patch('app.services.provider_health_service.settings.provider_latency_ewma_alpha', 0.5):
+        health.record("free_api", True, 1.0)
+        health.record("free_api", True, 3.0)
+
+    assert health.get("free_api").ewma_latency == pytest.approx(2.0)
+
+
+def test_rank_prefers_healthy_fast_providers(health):
+    """Test ordering: open last, then success rate, then latency; untried keep config order."""
+    health.record("exchangerate_api", True, 2.0)
+    health.record("fixer_io", True, 0.2)
+    health.get("free_api").state = OPEN
+
+    assert health.rank(["free_api", "exchangerate_api", "fixer_io", "other"]) == [
+        "fixer_io", "exchangerate_api", "other", "free_api"
+    ]
+
+    health.record("fixer_io", False, 0.2)
+    assert health.rank(["exchangerate_api", "fixer_io"]) == ["exchangerate_api", "fixer_io"]
+
+
+@pytest.mark.asyncio
+async def test_call_provider_skips_open_breaker(health):
+    """Test an open provider is skipped without an upstream call."""
+    service = ExternalAPIService(http_client=MagicMock(), provider_health=health)
+    raw = AsyncMock(return_value={"EUR": Decimal("0.85")})
+    health.get("fixer_io").state = OPEN
+    health.get("fixer_io").opened_at = float("inf")
+
+    with patch.object(service, '_provider_methods', return_value={"fixer_io": raw}):
+        with patch('app.services.external_api_service.quota_service') as mock_quota:
+            mock_quota.get_cached_response = AsyncMock(return_value=None)
+            mock_quota.has_budget = AsyncMock(return_value=True)
+
+            result = await service.fetch_from_provider("fixer_io", "USD")
+
+    assert result is None
+    raw.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_call_provider_records_outcome(health):
+    """Test empty provider responses count as failures."""
+    service = ExternalAPIService(http_client=MagicMock(), provider_health=health)
+    raw = AsyncMock(return_value=None)
+
+    with patch.object(service, '_provider_methods', return_value={"fixer_io": raw}):
+        with patch('app.services.external_api_service.quota_service') as mock_quota:
+            mock_quota.get_cached_response = AsyncMock(return_value=None)
+            mock_quota.has_budget = AsyncMock(return_value=True)
+
+            await service.fetch_from_provider("fixer_io", "USD")
+
+    assert health.get("fixer_io").consecutive_failures == 1
+    assert health.get("fixer_io").success_rate == 0.0
@@ -0,0 +1,131 @@
+"""
+Tests for upstream quota accounting and provider response reuse.
+"""
+import pytest
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.services.external_api_service import ExternalAPIService
+from app.services.quota_service import QuotaService
+
+
+@pytest.fixture
+def quota_service():
+    """Create quota service instance."""
+    return QuotaService()
+
+
+@pytest.fixture
+def mock_cache():
+    """Mock cache service with a connected Redis client."""
+    with patch('app.services.quota_service.cache_service') as mock_cache:
+        mock_cache.connected = True
+        mock_cache.redis_client = MagicMock()
+        mock_cache.redis_client.mget = AsyncMock()
+        mock_cache.redis_client.setex = AsyncMock()
+        yield mock_cache
+
+
+@pytest.mark.asyncio
+async def test_record_call_increments_day_and_month(quota_service, mock_cache):
+    """Test a call increments both counters in one pipeline."""
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    mock_cache.redis_client.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    mock_cache.redis_client.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    assert await quota_service.record_call("fixer_io") is True
+
+    incremented = [call.args[0] for call in pipe.incr.call_args_list]
+    assert any(key.startswith("quota:fixer_io:day:") for key in incremented)
+    assert any(key.startswith("quota:fixer_io:month:") for key in incremented)
+    assert pipe.expire.call_count == 2
+    pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_has_budget_respects_reserve(quota_service, mock_cache):
+    """Test a provider past the reserve share of its monthly limit is skipped."""
+    mock_cache.redis_client.mget.return_value = [b"3", b"95"]
+
+    with patch('app.services.quota_service.settings.provider_monthly_limits', {"fixer_io": 100}):
+        with patch('app.services.quota_service.settings.provider_quota_reserve', 0.9):
+            assert await quota_service.has_budget("fixer_io") is False
+
+        with patch('app.services.quota_service.settings.provider_quota_reserve', 1.0):
+            assert await quota_service.has_budget("fixer_io") is True
+
+
+@pytest.mark.asyncio
+async def test_has_budget_fails_open_without_redis(quota_service):
+    """Test quotas are not enforced while Redis is unavailable."""
+    with patch('app.services.quota_service.cache_service') as mock_cache:
+        mock_cache.connected = False
+
+        with patch('app.services.quota_service.settings.provider_monthly_limits', {"fixer_io": 1}):
+            assert await quota_service.has_budget("fixer_io") is True
+
+
+@pytest.mark.asyncio
+async def test_get_cached_response_returns_first_hit(quota_service, mock_cache):
+    """Test any provider's cached payload is reused, in provider order."""
+    mock_cache.redis_client.mget.return_value = [None, json.dumps({"EUR": "0.85"})]
+
+    result = await quota_service.get_cached_response(["exchangerate_api", "fixer_io"], "USD")
+
+    assert result == ("fixer_io", {"EUR": Decimal("0.85")})
+    keys = mock_cache.redis_client.mget.call_args.args[0]
+    today = datetime.now(timezone.utc).date().isoformat()
+    assert keys == [f"provider_response:exchangerate_api:USD:latest:{today}", f"provider_response:fixer_io:USD:latest:{today}"]
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_are_handled_without_pinging(quota_service, mock_cache):
+    """Test a failing Redis costs one attempted command, never an extra PING."""
+    mock_cache.redis_client.mget.side_effect = RedisConnectionError("down")
+
+    assert await quota_service.get_cached_response(["fixer_io"], "USD") is None
+    assert await quota_service.has_budget("fixer_io") is True
+    mock_cache.redis_client.ping.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_call_provider_skips_exhausted_provider():
+    """Test a provider without budget is skipped without an upstream call."""
+    service = ExternalAPIService(http_client=MagicMock())
+    raw = AsyncMock(return_value={"EUR": Decimal("0.85")})
+
+    with patch.object(service, '_provider_methods', return_value={"fixer_io": raw}):
+        with patch('app.services.external_api_service.quota_service') as mock_quota:
+            mock_quota.get_cached_response = AsyncMock(return_value=None)
+            mock_quota.has_budget = AsyncMock(return_value=False)
+            before_call = AsyncMock()
+
+            result = await service.fetch_from_provider("fixer_io", "USD", before_call=before_call)
+
+    assert result is None
+    raw.assert_not_awaited()
+    before_call.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_call_provider_caches_fresh_response():
+    """Test a successful upstream payload is cached for reuse."""
+    service = ExternalAPIService(http_client=MagicMock())
+    rates = {"EUR": Decimal("0.85")}
+    raw = AsyncMock(return_value=rates)
+
+    with patch.object(service, '_provider_methods', return_value={"fixer_io": raw}):
+        with patch('app.services.external_api_service.quota_service') as mock_quota:
+            mock_quota.get_cached_response = AsyncMock(return_value=None)
+            mock_quota.has_budget = AsyncMock(return_value=True)
+            mock_quota.cache_response = AsyncMock(return_value=True)
+
+            result = await service.fetch_from_provider("fixer_io", "USD")
+
+    assert result == rates
+    mock_quota.cache_response.assert_awaited_once_with("fixer_io", "USD", None, rates)
@@ -0,0 +1,69 @@
+"""
+Tests for lightweight rate records and their JSON rendering.
+"""
+import json
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict
+
+from pydantic import TypeAdapter
+
+from app.models.exchange_rate import ExchangeRateResponse, RateQuoteResponse
+from app.models.rate_record import RateRecord, render_rate, render_rates
+
+RATES_ADAPTER = TypeAdapter(Dict[str, RateQuoteResponse])
+
+
+def _response(record: RateRecord) -> RateQuoteResponse:
+    return RateQuoteResponse(**record.to_dict())
+
+
+@pytest.mark.parametrize("rate", [Decimal("0.900000"), Decimal("1E-7"), Decimal("151.123456"), Decimal("12")])
+def test_render_rate_matches_response_model(rate):
+    """Test the fast path emits byte-identical JSON to pydantic."""
+    record = RateRecord("USD", "EUR", rate, date(2024, 1, 1))
+
+    assert render_rate(record) == _response(record).model_dump_json()
+
+
+def test_render_rates_matches_response_model():
+    """Test a rendered rates map matches the Dict[str, RateQuoteResponse] body."""
+    records = {
+        target: RateRecord("USD", target, rate, date(2024, 6, 28))
+        for target, rate in (("EUR", Decimal("0.930000")), ("JPY", Decimal("160.123456")))
+    }
+
+    body = render_rates(records)
+
+    assert body == RATES_ADAPTER.dump_json({k: _response(v) for k, v in records.items()}).decode()
+    assert json.loads(body)["JPY"]["rate"] == "160.123456"
+    assert render_rates({}) == "{}"
+
+
+def test_render_accepts_stored_rate_models():
+    """Test stored rates render as quotes, without their row id or storage time."""
+    response = ExchangeRateResponse(
+        id=1, base_currency="USD", target_currency="GBP", rate=Decimal("0.790000"),
+        date=date(2024, 1, 1), created_at=datetime(2024, 1, 1)
+    )
+
+    assert render_rate(response) == RateQuoteResponse.model_validate(response).model_dump_json()
+
+
+def test_from_cached_round_trips_cache_payload():
+    """Test records rebuild from the JSON stored in the latest-rates cache."""
+    record = RateRecord("USD", "EUR", Decimal("0.930000"), date(2024, 6, 28))
+    cached = json.loads(json.dumps(record.to_dict(), default=str))
+
+    assert RateRecord.from_cached(cached) == record
+    assert RateRecord.from_cached({**cached, "id": 3, "created_at": "2024-06-28T09:30:00"}) == record
+
+
+def test_records_use_slots():
+    """Test records carry no per-instance dict."""
+    record = RateRecord("USD", "EUR", Decimal("1"), date(2024, 1, 1))
+
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.extra = 1
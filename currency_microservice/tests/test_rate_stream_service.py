@@ -0,0 +1,99 @@
+"""
+Tests for pushing rate snapshot events to streaming clients.
+"""
+import asyncio
+import json
+import pytest
+from datetime import date
+from unittest.mock import patch
+
+from app.services.cache_service import CacheService
+from app.services.memory_cache import MemoryCache
+from app.services.rate_stream_service import RateStreamService
+
+
+@pytest.fixture
+def cache():
+    """Cache service backed by an in-process cache."""
+    service = CacheService()
+    service.redis_client = MemoryCache(max_entries=100)
+    with patch('app.services.rate_stream_service.cache_service', service):
+        yield service
+
+
+@pytest.mark.asyncio
+async def test_publish_wakes_waiting_clients(cache):
+    """Test every waiting client receives a published event once."""
+    service = RateStreamService()
+    clients = [service.events() for _ in range(3)]
+    waiting = [asyncio.create_task(client.__anext__()) for client in clients]
+    await asyncio.sleep(0)
+
+    event = await service.publish(date(2024, 6, 28), ["USD", "EUR"], version=5)
+
+    assert event == {"version": 5, "date": "2024-06-28", "bases": ["USD", "EUR"]}
+    assert await asyncio.gather(*waiting) == [event] * 3
+    assert await cache.get_last_rate_event() == event
+    for client in clients:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_clients_hold_a_slot_while_connected(cache):
+    """Test SSE and WebSocket clients count against the limit until they disconnect."""
+    service = RateStreamService()
+    stream = service.sse()
+
+    with patch('app.services.rate_stream_service.settings.rate_stream_max_connections', 2):
+        await stream.__anext__()
+        assert service.accepting()
+        with service.connection():
+            assert service.connections == 2
+            assert not service.accepting()
+        await stream.aclose()
+
+    assert service.connections == 0
+
+
+@pytest.mark.asyncio
+async def test_clients_resume_from_last_version(cache):
+    """Test a client is sent the current event unless it already has it."""
+    service = RateStreamService()
+    service._deliver({"version": 5, "date": "2024-06-28", "bases": ["USD"]})
+    service._deliver({"version": 4, "date": "2024-06-27", "bases": ["USD"]})
+
+    assert (await service.events().__anext__())["version"] == 5
+    with patch('app.services.rate_stream_service.settings.rate_stream_heartbeat_seconds', 0.01):
+        assert await service.events(last_version=5).__anext__() is None
+
+
+@pytest.mark.asyncio
+async def test_sse_framing(cache):
+    """Test the event stream carries retry, event id and compact JSON data."""
+    service = RateStreamService()
+    service._deliver({"version": 5, "date": "2024-06-28", "bases": ["USD"]})
+    stream = service.sse()
+
+    with patch('app.services.rate_stream_service.settings.rate_stream_retry_ms', 2000):
+        assert await stream.__anext__() == "retry: 2000\n\n"
+    assert await stream.__anext__() == (
+        'id: 5\nevent: snapshot\ndata: {"version":5,"date":"2024-06-28","bases":["USD"]}\n\n'
+    )
+    with patch('app.services.rate_stream_service.settings.rate_stream_heartbeat_seconds', 0.01):
+        assert await stream.__anext__() == ": keepalive\n\n"
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_subscriber_delivers_events_from_other_workers(cache):
+    """Test events published on the channel by another worker reach local clients."""
+    service = RateStreamService()
+    await service.start()
+    try:
+        await asyncio.sleep(0.01)
+        event = {"version": 9, "date": "2024-06-29", "bases": ["EUR"]}
+        await cache.redis_client.publish("events:rates", json.dumps(event))
+
+        assert await asyncio.wait_for(service.events(last_version=8).__anext__(), 1) == event
+    finally:
+        await service.stop()
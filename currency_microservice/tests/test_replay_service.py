@@ -0,0 +1,107 @@
+"""
+Tests for the offline replay provider and the local upstream stub.
+"""
+import pytest
+import httpx
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.external_api_service import ExternalAPIService
+from app.services.provider_health_service import ProviderHealthService
+from app.services.replay_service import ERROR, TIMEOUT, FaultInjector, ReplayStore
+from app.upstream_stub import create_stub_app
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Replay store with a latest and one historical USD recording."""
+    store = ReplayStore(str(tmp_path))
+    store.save("USD", None, {"EUR": Decimal("0.85"), "GBP": Decimal("0.75")})
+    store.save("USD", date(2024, 1, 2), {"EUR": Decimal("0.90"), "GBP": Decimal("0.80")})
+    return store
+
+
+@pytest.fixture
+def no_faults():
+    """Fault injector that never delays or fails."""
+    return FaultInjector(latency_ms=0, jitter_ms=0, error_rate=0, timeout_rate=0, seed=1)
+
+
+@pytest.fixture
+def no_quota():
+    """Disable quota accounting and response reuse."""
+    with patch('app.services.external_api_service.quota_service') as mock_quota:
+        mock_quota.get_cached_response = AsyncMock(return_value=None)
+        mock_quota.has_budget = AsyncMock(return_value=True)
+        mock_quota.record_call = AsyncMock(return_value=True)
+        mock_quota.cache_response = AsyncMock(return_value=True)
+        yield mock_quota
+
+
+def test_store_falls_back_to_latest(store):
+    """Test dated lookups without a recording replay the latest snapshot."""
+    assert store.load("USD", date(2024, 1, 2))["EUR"] == Decimal("0.90")
+    assert store.load("USD", date(2020, 5, 5))["EUR"] == Decimal("0.85")
+    assert store.load("JPY") is None
+
+
+@pytest.mark.asyncio
+async def test_fault_injector_is_reproducible():
+    """Test seeded injectors draw the same outcomes."""
+    first = FaultInjector(latency_ms=0, jitter_ms=0, error_rate=0.3, timeout_rate=0.3, seed=42)
+    second = FaultInjector(latency_ms=0, jitter_ms=0, error_rate=0.3, timeout_rate=0.3, seed=42)
+
+    outcomes = [await first.apply() for _ in range(20)]
+
+    assert outcomes == [await second.apply() for _ in range(20)]
+    assert {ERROR, TIMEOUT, None} <= set(outcomes)
+
+
+@pytest.mark.asyncio
+async def test_replay_provider(store, no_faults, no_quota):
+    """Test the replay provider serves recordings through the normal fetch path."""
+    service = ExternalAPIService(http_client=MagicMock(), provider_health=ProviderHealthService())
+    service.replay_store = store
+    service.replay_faults = no_faults
+
+    with patch('app.services.external_api_service.settings.providers', ["replay"]):
+        rates = await service.fetch_exchange_rates("USD", date(2024, 1, 2))
+
+    assert rates == {"EUR": Decimal("0.90"), "GBP": Decimal("0.80")}
+
+
+@pytest.mark.asyncio
+async def test_stub_speaks_provider_wire_formats(store, no_faults, no_quota):
+    """Test the real provider clients parse responses from the local stub."""
+    stub = create_stub_app(store, no_faults)
+    http_client = MagicMock()
+    http_client.get_client.return_value = httpx.AsyncClient(app=stub)
+    service = ExternalAPIService(http_client=http_client, provider_health=ProviderHealthService())
+
+    with patch.multiple(
+        'app.services.external_api_service.settings',
+        exchange_api_base_url="http://stub/v6",
+        fixer_api_base_url="http://stub/fixer",
+        free_api_base_url="http://stub/free",
+        exchange_api_key="key",
+        fixer_api_key="key",
+    ):
+        exchange = await service.fetch_from_provider("exchangerate_api", "USD", date(2024, 1, 2))
+        fixer = await service.fetch_from_provider("fixer_io", "USD")
+        free = await service.fetch_from_provider("free_api", "USD")
+
+    assert exchange == {"EUR": Decimal("0.9"), "GBP": Decimal("0.8")}
+    assert fixer["EUR"] == Decimal("0.85")
+    assert free["GBP"] == Decimal("0.75")
+
+
+@pytest.mark.asyncio
+async def test_stub_injected_error(store):
+    """Test injected errors surface as HTTP 503."""
+    stub = create_stub_app(store, FaultInjector(latency_ms=0, jitter_ms=0, error_rate=1.0, timeout_rate=0, seed=1))
+
+    async with httpx.AsyncClient(app=stub, base_url="http://stub") as client:
+        response = await client.get("/fixer/latest", params={"base": "USD"})
+
+    assert response.status_code == 503
@@ -0,0 +1,87 @@
+"""
+Tests for sampled ASGI request logging.
+"""
+import atexit
+import logging
+import pytest
+from unittest.mock import patch
+
+from app.core.request_logging import RequestLoggingMiddleware, setup_logging
+
+
+def _app(status: int = 200, error: Exception = None):
+    """Minimal ASGI app answering with a status or raising."""
+    async def app(scope, receive, send):
+        if error:
+            raise error
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+    return app
+
+
+async def _call(middleware):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/rates/USD"}
+    await middleware(scope, None, send)
+    return sent
+
+
+@pytest.mark.asyncio
+async def test_logs_one_structured_record(caplog):
+    """Test a request produces a single access record with its attributes."""
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        sent = await _call(RequestLoggingMiddleware(_app(200), sample_rate=1.0))
+
+    assert sent[0]["status"] == 200
+    (record,) = caplog.records
+    assert record.getMessage().startswith("GET /api/v1/rates/USD 200 ")
+    assert record.http_status == 200
+    assert record.duration_ms >= 0
+
+
+@pytest.mark.asyncio
+async def test_sampling_skips_fast_successes_but_keeps_errors(caplog):
+    """Test unsampled requests are dropped unless they fail."""
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        with patch('app.core.request_logging.random.random', return_value=0.5):
+            await _call(RequestLoggingMiddleware(_app(200), sample_rate=0.1))
+            await _call(RequestLoggingMiddleware(_app(503), sample_rate=0.1))
+            with pytest.raises(RuntimeError):
+                await _call(RequestLoggingMiddleware(_app(error=RuntimeError("boom")), sample_rate=0.1))
+
+    assert [record.http_status for record in caplog.records] == [503, 500]
+
+
+@pytest.mark.asyncio
+async def test_non_http_scopes_pass_through(caplog):
+    """Test lifespan and websocket scopes are not logged."""
+    called = []
+
+    async def app(scope, receive, send):
+        called.append(scope["type"])
+
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        await RequestLoggingMiddleware(app)({"type": "lifespan"}, None, None)
+
+    assert called == ["lifespan"]
+    assert not caplog.records
+
+
+def test_setup_logging_formats_each_record_once(capsys):
+    """Test records queued to the writer thread are not pre-formatted."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    try:
+        listener = setup_logging(logging.INFO)
+        logging.getLogger("app.test").warning("Rates stale")
+        atexit.unregister(listener.stop)
+        listener.stop()
+    finally:
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+    assert capsys.readouterr().out.rstrip().endswith(" - app.test - WARNING - Rates stale")
@@ -4,9 +4,10 @@ Tests for scheduler service with daily cache optimization.
 import pytest
 import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
 
 from app.services.scheduler_service import SchedulerService
+from app.services.exchange_rate_service import ingest_bases
 from app.core.config import settings
 
 
@@ -149,5 +150,60 @@ def test_scheduler_multiple_start_calls(scheduler_service):
     scheduler_service.scheduler.start.assert_called_once()
 
 
+def test_retry_delay_backs_off_with_jitter(scheduler_service):
+    """Test retry delays grow exponentially up to the cap, jittered within the upper half."""
+    with patch('app.services.scheduler_service.settings.daily_fetch_retry_base_seconds', 10):
+        with patch('app.services.scheduler_service.settings.daily_fetch_retry_max_seconds', 100):
+            assert 5 <= scheduler_service._retry_delay(0) <= 10
+            assert 20 <= scheduler_service._retry_delay(2) <= 40
+            assert 50 <= scheduler_service._retry_delay(8) <= 100
+
+
+def test_failed_fetch_schedules_retry_within_window(scheduler_service):
+    """Test a failed attempt schedules a retry, and none once the window has closed."""
+    scheduler_service.scheduler = MagicMock()
+    now = datetime.now(timezone.utc)
+
+    assert scheduler_service._schedule_retry(0, now + timedelta(hours=6)) is True
+    args = scheduler_service.scheduler.add_job.call_args.kwargs["args"]
+    assert args[0] == 'daily_rate_fetch_retry'
+    assert args[2] == 1
+
+    scheduler_service.scheduler.add_job.reset_mock()
+    assert scheduler_service._schedule_retry(3, now) is False
+    scheduler_service.scheduler.add_job.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_catch_up_backfills_missed_dates(scheduler_service):
+    """Test startup catch-up backfills the gap and then fetches today."""
+    latest = date.today() - timedelta(days=4)
+    with patch('app.services.scheduler_service.async_session_factory', MagicMock()):
+        with patch('app.services.scheduler_service.exchange_rate_service') as mock_exchange:
+            mock_exchange.get_latest_rate_date = AsyncMock(return_value=latest)
+            with patch('app.services.scheduler_service.backfill_service') as mock_backfill:
+                mock_backfill.run_backfill_job = AsyncMock(return_value=MagicMock(status="completed"))
+                with patch.object(scheduler_service, '_fetch_daily_rates_job', AsyncMock()) as mock_fetch:
+                    await scheduler_service._catch_up_job()
+
+    mock_backfill.run_backfill_job.assert_awaited_once_with(
+        settings.base_currency, latest + timedelta(days=1), date.today() - timedelta(days=1),
+        bases=ingest_bases(settings.base_currency)
+    )
+    mock_fetch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_catch_up_skips_when_current(scheduler_service):
+    """Test catch-up does nothing when today's snapshot exists."""
+    with patch('app.services.scheduler_service.async_session_factory', MagicMock()):
+        with patch('app.services.scheduler_service.exchange_rate_service') as mock_exchange:
+            mock_exchange.get_latest_rate_date = AsyncMock(return_value=date.today())
+            with patch.object(scheduler_service, '_fetch_daily_rates_job', AsyncMock()) as mock_fetch:
+                await scheduler_service._catch_up_job()
+
+    mock_fetch.assert_not_awaited()
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Tests for the shared-memory rate table.
+"""
+import uuid
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from app.services.shared_rates import SharedRateTable
+from app.services.snapshot_service import RateSnapshot, SnapshotService
+
+
+DAY = date(2024, 6, 28)
+
+
+def _snapshot(version: int, eur: str) -> bytes:
+    return RateSnapshot.encode(version, {"USD": {DAY: {"EUR": Decimal(eur)}}})
+
+
+@pytest.fixture
+def table():
+    """Shared table under a unique name, removed after the test."""
+    shared = SharedRateTable(f"test_rates_{uuid.uuid4().hex[:8]}", 64 * 1024)
+    yield shared
+    shared.close()
+    shared.unlink()
+
+
+def test_publish_alternates_slots_and_rejects_older_versions(table):
+    """Test each publish lands in the other slot under an even sequence."""
+    assert table.read_control().version == 0
+
+    assert table.publish(1, _snapshot(1, "0.91"))
+    first = table.read_control()
+    assert table.publish(2, _snapshot(2, "0.92"))
+    second = table.read_control()
+    assert not table.publish(2, _snapshot(2, "0.99"))
+
+    assert (first.slot, second.slot) == (0, 1)
+    assert second.seq == first.seq + 2
+    snapshot = RateSnapshot(table.slot_view(second))
+    assert snapshot.get_rate("USD", "EUR", DAY) == Decimal("0.920000")
+    snapshot.close()
+
+
+def test_publish_rejects_oversized_snapshot(table):
+    """Test a snapshot larger than a slot is refused."""
+    with pytest.raises(ValueError):
+        table.publish(1, b"\0" * (table.capacity + 1))
+
+
+def test_workers_switch_together(table, tmp_path):
+    """Test a snapshot loaded by one worker is served by every worker attached to the table."""
+    path = tmp_path / "rates.snap"
+    RateSnapshot.write(path, 5, {"USD": {DAY: {"EUR": Decimal("0.93")}}})
+    other = SharedRateTable(table.name, table.capacity)
+
+    loader = SnapshotService(str(path), shared=table)
+    follower = SnapshotService(str(tmp_path / "missing.snap"), shared=other)
+    assert loader.load()
+    assert follower.get_rate("USD", "EUR", DAY) == Decimal("0.930000")
+
+    table.publish(6, _snapshot(6, "0.94"))
+    assert follower.get_rate("USD", "EUR", DAY) == Decimal("0.940000")
+    assert loader.get_rate("USD", "EUR", DAY) == Decimal("0.940000")
+    follower.close()
+    loader.snapshot.close()
+
+
+def test_read_retries_when_publish_races(table, tmp_path):
+    """Test a read that overlaps a publish is repeated against the new snapshot."""
+    table.publish(1, _snapshot(1, "0.91"))
+    service = SnapshotService(str(tmp_path / "missing.snap"), shared=table)
+
+    def racing_read(snapshot):
+        if snapshot.version == 1:
+            table.publish(2, _snapshot(2, "0.92"))
+        return snapshot.get_rate("USD", "EUR", DAY)
+
+    assert service._read(racing_read) == Decimal("0.920000")
+    service.snapshot.close()
@@ -0,0 +1,156 @@
+"""
+Tests for the memory-mapped rate snapshot.
+"""
+import pytest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+from app.services.snapshot_service import RateSnapshot, SnapshotService
+
+
+DAY_1 = date(2024, 6, 28)
+DAY_2 = date(2024, 6, 29)
+
+RATES = {
+    "USD": {
+        DAY_1: {"EUR": Decimal("0.920000"), "JPY": Decimal("160.123456")},
+        DAY_2: {"EUR": Decimal("0.930000"), "GBP": Decimal("0.790000")},
+    },
+    "EUR": {
+        DAY_2: {"USD": Decimal("1.075269")},
+    },
+}
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    """Path of a written snapshot file."""
+    return RateSnapshot.write(tmp_path / "rates.snap", 7, RATES)
+
+
+def test_round_trip(snapshot_path):
+    """Test rates read back exactly, with missing cells reported as absent."""
+    snapshot = RateSnapshot.open(snapshot_path)
+
+    assert snapshot.version == 7
+    assert snapshot.dates == [DAY_1, DAY_2]
+    assert snapshot.latest_date == DAY_2
+    assert snapshot.get_rate("USD", "JPY", DAY_1) == Decimal("160.123456")
+    assert snapshot.get_rate("EUR", "USD", DAY_2) == Decimal("1.075269")
+    assert snapshot.get_rate("USD", "GBP", DAY_1) is None
+    assert snapshot.get_rate("GBP", "USD", DAY_2) is None
+    assert snapshot.get_rates("USD", DAY_2) == {"EUR": Decimal("0.930000"), "GBP": Decimal("0.790000")}
+    snapshot.close()
+
+
+def test_rejects_foreign_file(tmp_path):
+    """Test files without the snapshot header are refused."""
+    path = tmp_path / "rates.snap"
+    path.write_bytes(b"\0" * 64)
+
+    with pytest.raises(ValueError):
+        RateSnapshot.open(path)
+
+
+def test_load_keeps_newer_mapping(snapshot_path):
+    """Test an older file on disk never replaces the mapped snapshot."""
+    service = SnapshotService(str(snapshot_path))
+    assert service.load()
+    assert service.get_latest_rates("USD") == (DAY_2, RATES["USD"][DAY_2])
+
+    RateSnapshot.write(snapshot_path, 3, RATES)
+    assert not service.load()
+    assert service.snapshot.version == 7
+
+
+@pytest.mark.asyncio
+async def test_sync_remaps_or_retires_snapshot(snapshot_path):
+    """Test a newer live version remaps the file, or stops serving when none is on disk."""
+    service = SnapshotService(str(snapshot_path))
+    service.load()
+
+    with patch('app.services.snapshot_service.cache_service') as mock_cache:
+        mock_cache.get_snapshot_version = AsyncMock(return_value=None)
+        await service.sync()
+        assert service.get_rate("USD", "EUR", DAY_2) == Decimal("0.930000")
+
+        RateSnapshot.write(snapshot_path, 8, RATES)
+        mock_cache.get_snapshot_version.return_value = 8
+        await service.sync()
+        assert service.snapshot.version == 8
+
+        mock_cache.get_snapshot_version.return_value = 9
+        await service.sync()
+
+    assert service.superseded
+    assert service.get_rate("USD", "EUR", DAY_2) is None
+
+
+@pytest.mark.asyncio
+async def test_start_serves_file_only_once_confirmed(snapshot_path):
+    """Test a file found at startup is not served until Redis confirms its version."""
+    service = SnapshotService(str(snapshot_path))
+
+    with patch('app.services.snapshot_service.cache_service') as mock_cache, \
+            patch('app.services.snapshot_service.settings') as mock_settings:
+        mock_settings.snapshot_enabled = True
+        mock_settings.shared_rates_enabled = False
+        mock_settings.snapshot_sync_interval_seconds = 3600
+        mock_cache.get_snapshot_version = AsyncMock(return_value=None)
+        mock_cache.is_connected = AsyncMock(return_value=False)
+        await service.start()
+        try:
+            assert service.get_rate("USD", "EUR", DAY_2) is None
+
+            mock_cache.get_snapshot_version.return_value = 7
+            await service.sync()
+            assert service.get_rate("USD", "EUR", DAY_2) == Decimal("0.930000")
+        finally:
+            await service.stop()
+
+        service = SnapshotService(str(RateSnapshot.write(snapshot_path, 7, RATES)))
+        mock_cache.get_snapshot_version.return_value = 9
+        await service.start()
+        try:
+            assert service.superseded
+            assert service.get_rate("USD", "EUR", DAY_2) is None
+        finally:
+            await service.stop()
+
+
+def test_retire_on_rate_change(snapshot_path):
+    """Test a change to a covered date retires the snapshot until a newer one is mapped."""
+    service = SnapshotService(str(snapshot_path))
+    service.load()
+
+    service.retire([date(2024, 1, 2)])
+    service.retire([DAY_2], version=7)
+    assert service.get_rate("USD", "EUR", DAY_2) == Decimal("0.930000")
+
+    service.retire([DAY_2])
+    assert service.get_rate("USD", "EUR", DAY_2) is None
+
+    RateSnapshot.write(snapshot_path, 8, RATES)
+    service.load()
+    assert service.get_rate("USD", "EUR", DAY_2) == Decimal("0.930000")
+
+
+@pytest.mark.asyncio
+async def test_publish_writes_and_announces(tmp_path):
+    """Test ingest writes the stored window to disk, maps it and publishes its version."""
+    db = AsyncMock()
+    db.execute.return_value = [
+        ("USD", "EUR", DAY_2, Decimal("0.930000")),
+        ("USD", "GBP", DAY_2, Decimal("0.790000")),
+    ]
+    service = SnapshotService(str(tmp_path / "rates.snap"))
+
+    with patch('app.services.snapshot_service.cache_service') as mock_cache:
+        mock_cache.set_snapshot_version = AsyncMock(return_value=True)
+
+        version = await service.publish(db, DAY_2, ["USD"])
+
+    mock_cache.set_snapshot_version.assert_awaited_once_with(version)
+    assert service.snapshot.version == version
+    assert service.get_rate("USD", "GBP", DAY_2) == Decimal("0.790000")